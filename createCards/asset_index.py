@@ -0,0 +1,198 @@
+"""
+Asset Index for Card Images and Scripts
+Maps card IDs to the files present in pics/ and script/ from one directory scan
+"""
+
+import os
+import stat
+import threading
+from typing import List, Optional, Set
+
+
+# Extensions recognised as card images in the pics directory, in lookup order
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+
+
+def _card_id(stem: str) -> Optional[int]:
+    """
+    Card ID named by a file stem, or None
+    
+    Only the canonical spelling counts: EDOPro looks files up by the ID
+    itself, so 0123.jpg is not card 123's image.
+    """
+    if stem.isdigit() and str(int(stem)) == stem:
+        return int(stem)
+    return None
+
+
+def _read_umask() -> int:
+    """Process umask (read once at import: setting it is the only way to read it)"""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+UMASK = _read_umask()
+
+
+def replace_file(temp_path: str, path: str):
+    """
+    Move a finished temporary file into place with os.replace
+    
+    tempfile.mkstemp creates files readable by the owner only. The temporary
+    file takes the mode of the file it replaces, or the usual mode for a new
+    file (0o666 minus the umask), so pics, scripts and caches stay readable
+    by the game and other users.
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~UMASK
+    os.chmod(temp_path, mode)
+    os.replace(temp_path, path)
+
+
+class AssetIndex:
+    """
+    Index of card images and Lua scripts keyed by card ID
+    
+    Each directory is read with a single os.scandir pass instead of probing
+    os.path.exists once per card and extension. Lookups re-check the
+    directory's mtime (one stat per directory, not per card) and rescan only
+    when files were added, removed or renamed since the last scan.
+    """
+    
+    def __init__(self, pics_directory: Optional[str] = "../pics",
+                 script_directory: Optional[str] = "../script", auto_refresh: bool = True):
+        """
+        Initialize asset index
+        
+        Args:
+            pics_directory: Directory containing card images (None to skip)
+            script_directory: Directory containing c<ID>.lua scripts (None to skip)
+            auto_refresh: Check directory mtimes on every lookup
+        """
+        self.pics_directory = pics_directory
+        self.script_directory = script_directory
+        self.auto_refresh = auto_refresh
+        self._images = {}
+        self._scripts = set()
+        self._stamps = {'pics': None, 'script': None}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _directory_stamp(directory: Optional[str]) -> Optional[int]:
+        """Modification time of a directory, or None if it does not exist"""
+        if not directory:
+            return None
+        try:
+            return os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _extension(filename: str) -> str:
+        """Lower-case extension of a file name"""
+        return os.path.splitext(filename)[1].lower()
+    
+    def _scan_pics(self):
+        """Rebuild the image map (card ID -> file names) from one pass over the pics directory"""
+        images = {}
+        if self.pics_directory and os.path.isdir(self.pics_directory):
+            with os.scandir(self.pics_directory) as entries:
+                for entry in entries:
+                    stem, ext = os.path.splitext(entry.name)
+                    card_id = _card_id(stem)
+                    if card_id is not None and ext.lower() in IMAGE_EXTENSIONS and entry.is_file():
+                        images.setdefault(card_id, []).append(entry.name)
+        for filenames in images.values():
+            filenames.sort(key=lambda name: (IMAGE_EXTENSIONS.index(self._extension(name)), name))
+        self._images = images
+    
+    def _scan_scripts(self):
+        """Rebuild the script set from one pass over the script directory"""
+        scripts = set()
+        if self.script_directory and os.path.isdir(self.script_directory):
+            with os.scandir(self.script_directory) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith('c') and name.endswith('.lua'):
+                        card_id = _card_id(name[1:-4])
+                        if card_id is not None:
+                            scripts.add(card_id)
+        self._scripts = scripts
+    
+    def refresh(self, force: bool = False):
+        """
+        Rescan any directory whose mtime changed since the last scan
+        
+        Args:
+            force: Rescan both directories unconditionally
+        """
+        with self._lock:
+            stamp = self._directory_stamp(self.pics_directory)
+            if force or stamp is None or stamp != self._stamps['pics']:
+                self._scan_pics()
+                self._stamps['pics'] = stamp
+            
+            stamp = self._directory_stamp(self.script_directory)
+            if force or stamp is None or stamp != self._stamps['script']:
+                self._scan_scripts()
+                self._stamps['script'] = stamp
+    
+    def invalidate(self):
+        """Force the next lookup to rescan (e.g. after writing several files quickly)"""
+        with self._lock:
+            self._stamps = {'pics': None, 'script': None}
+    
+    def _fresh(self):
+        """Refresh before a lookup when auto_refresh is on or nothing was scanned yet"""
+        if self.auto_refresh or self._stamps['pics'] is None and self._stamps['script'] is None:
+            self.refresh()
+    
+    def image_extensions(self, card_id: int) -> List[str]:
+        """Image extensions present for a card (lower case), in IMAGE_EXTENSIONS order"""
+        self._fresh()
+        return [self._extension(name) for name in self._images.get(card_id, [])]
+    
+    def image_path(self, card_id: int) -> Optional[str]:
+        """Path of the preferred image for a card as named on disk, or None if it has none"""
+        self._fresh()
+        filenames = self._images.get(card_id)
+        if not filenames:
+            return None
+        return os.path.join(self.pics_directory, filenames[0])
+    
+    def has_image(self, card_id: int, extensions: Optional[List[str]] = None) -> bool:
+        """
+        Check whether a card has an image
+        
+        Args:
+            card_id: Card ID to check
+            extensions: Only count these extensions (default: any image extension)
+        """
+        present = self.image_extensions(card_id)
+        if extensions is None:
+            return bool(present)
+        return any(ext in present for ext in extensions)
+    
+    def has_script(self, card_id: int) -> bool:
+        """Check whether script/c<ID>.lua exists"""
+        self._fresh()
+        return card_id in self._scripts
+    
+    def script_path(self, card_id: int) -> Optional[str]:
+        """Path of a card's script, or None if it has none"""
+        if not self.has_script(card_id):
+            return None
+        return os.path.join(self.script_directory, f"c{card_id}.lua")
+    
+    def image_ids(self) -> Set[int]:
+        """IDs of all cards with at least one image"""
+        self._fresh()
+        return set(self._images)
+    
+    def script_ids(self) -> Set[int]:
+        """IDs of all cards with a script"""
+        self._fresh()
+        return set(self._scripts)
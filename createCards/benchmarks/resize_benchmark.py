@@ -0,0 +1,114 @@
+"""
+Resize Pipeline Benchmark
+Compares the original full-decode resize with the draft/reduce resize path
+
+Usage:
+    python benchmarks/resize_benchmark.py [image.jpg ...] [--runs 5]
+
+Without arguments a synthetic 4032x3024 JPEG (a typical phone photo) is used.
+Each variant runs in a fresh process so the peak memory figures are not
+shared between them (peak RSS is only reported where the resource module
+exists, i.e. not on Windows).
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image
+from image_downloader import ImageDownloader, _to_card_image
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+WIDTH = ImageDownloader.RECOMMENDED_WIDTH
+HEIGHT = ImageDownloader.RECOMMENDED_HEIGHT
+LANCZOS = Image.Resampling.LANCZOS if hasattr(Image, 'Resampling') else Image.LANCZOS
+
+
+def resize_full_decode(path: str):
+    """Original path: decode at native resolution, then LANCZOS resize"""
+    with Image.open(path) as img:
+        img.load()
+        peak_pixels = img.size[0] * img.size[1]
+        return img.resize((WIDTH, HEIGHT), LANCZOS).convert('RGB'), peak_pixels
+
+
+def resize_draft_reduce(path: str):
+    """New path: draft decode and Image.reduce before the final resample"""
+    with Image.open(path) as img:
+        result = _to_card_image(img, WIDTH, HEIGHT)
+        return result, img.size[0] * img.size[1]
+
+
+VARIANTS = {
+    'full-decode': resize_full_decode,
+    'draft+reduce': resize_draft_reduce,
+}
+
+
+def _run_variant(name: str, path: str, runs: int, queue):
+    """Time one variant in its own process and report peak memory"""
+    func = VARIANTS[name]
+    func(path)  # warm up
+    start = time.perf_counter()
+    for _ in range(runs):
+        _, decoded_pixels = func(path)
+    elapsed = (time.perf_counter() - start) / runs
+    
+    peak_rss = None
+    if resource is not None:
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            peak_rss //= 1024  # bytes on macOS, KiB elsewhere
+    queue.put((elapsed, decoded_pixels, peak_rss))
+
+
+def benchmark(path: str, runs: int):
+    """Run every variant for one image and print a comparison"""
+    with Image.open(path) as img:
+        print(f"\n{os.path.basename(path)}: {img.size[0]}x{img.size[1]} {img.format}")
+    print(f"  {'variant':14} {'ms/image':>10} {'decoded px':>12} {'peak RSS':>10}")
+    
+    for name in VARIANTS:
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=_run_variant, args=(name, path, runs, queue))
+        process.start()
+        elapsed, decoded_pixels, peak_rss = queue.get()
+        process.join()
+        rss = f"{peak_rss / 1024:.1f} MB" if peak_rss else "n/a"
+        print(f"  {name:14} {elapsed * 1000:10.1f} {decoded_pixels:12,} {rss:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the card image resize path')
+    parser.add_argument('images', nargs='*', help='Source images (default: synthetic phone photo)')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per variant (default: 5)')
+    args = parser.parse_args()
+    
+    images = args.images
+    temp_path = None
+    if not images:
+        fd, temp_path = tempfile.mkstemp(suffix='.jpg')
+        os.close(fd)
+        sample = Image.linear_gradient('L').resize((4032, 3024)).convert('RGB')
+        sample.save(temp_path, 'JPEG', quality=90)
+        images = [temp_path]
+    
+    try:
+        for path in images:
+            benchmark(path, args.runs)
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+
+
+if __name__ == "__main__":
+    main()
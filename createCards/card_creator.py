@@ -5,23 +5,52 @@ Creates custom cards by managing database entries, Lua scripts, and images
 """
 
 import argparse
+import csv
+import json
 import sys
 import os
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
 
 # Add current directory to path for imports
 sys.path.insert(0, os.path.dirname(__file__))
 
 from constants import *
-from database_manager import DatabaseManager
-from script_generator import ScriptGenerator
-from image_downloader import ImageDownloader
+from database_manager import DatabaseManager, CONNECTION_PROFILES, DEFAULT_ID_RANGE
+from collision_checker import CollisionChecker
+from script_generator import ScriptGenerator, EffectSpec
+from image_downloader import ImageDownloader, normalize_pics_main, thumbnails_main
+from script_linter import lint_scripts_main
 
 
+SPELL_TYPES = {
+    'normal': TYPE_SPELL,
+    'quickplay': TYPE_SPELL_QUICKPLAY,
+    'continuous': TYPE_SPELL_CONTINUOUS,
+    'equip': TYPE_SPELL_EQUIP,
+    'field': TYPE_SPELL_FIELD
+}
+
+TRAP_TYPES = {
+    'normal': TYPE_TRAP,
+    'continuous': TYPE_TRAP_CONTINUOUS,
+    'counter': TYPE_TRAP_COUNTER
+}
+
+# Default number of worker threads for script/image processing in batch mode
+BATCH_WORKERS = 8
+
+# Manifest fields that are converted to integers when loaded from CSV
+MANIFEST_INT_FIELDS = ['id', 'alias', 'setcode', 'atk', 'def', 'level', 'category', 'effect_amount']
+# CSV fields that hold either a number or a name ('spell', 'LIGHT', 'Dragon');
+# numbers are converted, names are kept for build_card_data
+MANIFEST_NAME_OR_INT_FIELDS = ['ot', 'type', 'attribute', 'race']
+
 class CardCreator:
     """Main card creation interface"""
     
-    def __init__(self, db_path: str = None, script_dir: str = None, pics_dir: str = None):
+    def __init__(self, db_path: str = None, script_dir: str = None, pics_dir: str = None,
+                 db_profile: str = 'default', duplicate_check: bool = False):
         """
         Initialize card creator
         
@@ -29,6 +58,13 @@ class CardCreator:
             db_path: Path to card database
             script_dir: Directory for Lua scripts
             pics_dir: Directory for card images
+            db_profile: Database connection profile (see CONNECTION_PROFILES)
+            duplicate_check: Reject new cards whose name duplicates an existing
+                custom card (ignoring case, punctuation and accents)
+        
+        New cards are checked against every other database EDOPro loads
+        (config/configs.json), so an ID that would shadow an existing card
+        is rejected.
         """
         if db_path is None:
             db_path = "../expansions/cards.cdb"
@@ -38,12 +74,14 @@ class CardCreator:
             pics_dir = "../pics"
         
         self.db_path = db_path
-        self.db_manager = DatabaseManager(db_path)
+        self.db_manager = DatabaseManager(db_path, profile=db_profile,
+                                          collision_checker=CollisionChecker(exclude=[db_path]),
+                                          duplicate_check=duplicate_check)
         self.script_generator = ScriptGenerator(output_dir=script_dir)
         self.image_downloader = ImageDownloader(pics_directory=pics_dir)
     
     def create_card(self, card_data: Dict[str, Any], image_url: Optional[str] = None,
-                   effect_pattern: Optional[str] = None, effect_params: Optional[Dict[str, Any]] = None,
+                   effect_pattern: EffectSpec = None, effect_params: Optional[Dict[str, Any]] = None,
                    generate_script: bool = True, overwrite: bool = False) -> bool:
         """
         Create a complete card with database entry, script, and image
@@ -51,7 +89,8 @@ class CardCreator:
         Args:
             card_data: Card information dictionary
             image_url: URL to download card image from
-            effect_pattern: Effect pattern for script generation
+            effect_pattern: Effect pattern for script generation, or a list
+                of effects to compose (see ScriptGenerator.compose_effects)
             effect_params: Parameters for effect pattern
             generate_script: Whether to generate Lua script
             overwrite: Whether to overwrite existing files
@@ -84,17 +123,7 @@ class CardCreator:
         # Step 3: Download or copy image (if URL/path provided)
         if image_url:
             print(f"\n[3/3] Processing card image...")
-            # Check if it's a local file path or URL
-            is_local_file = not image_url.lower().startswith(('http://', 'https://'))
-            
-            if is_local_file:
-                # Local file - copy it
-                result = self.image_downloader.copy_local_image(image_url, card_id, 
-                                                                resize=True, overwrite=overwrite)
-            else:
-                # URL - download it
-                result = self.image_downloader.download_with_retry(image_url, card_id, 
-                                                                   resize=True, overwrite=overwrite)
+            result = self._process_image(image_url, card_id, overwrite)
             
             if not result:
                 print(f"⚠ Warning: Failed to process image (card is still in database)")
@@ -107,6 +136,117 @@ class CardCreator:
         print("=" * 70)
         return True
     
+    def _process_image(self, image_url: str, card_id: int, overwrite: bool,
+                       verbose: bool = True) -> Optional[str]:
+        """Copy a local image or download a remote one for a card"""
+        # Check if it's a local file path or URL
+        is_local_file = not image_url.lower().startswith(('http://', 'https://'))
+        
+        if is_local_file:
+            # Local file - copy it
+            return self.image_downloader.copy_local_image(image_url, card_id, resize=True,
+                                                          overwrite=overwrite, verbose=verbose)
+        # URL - download it
+        return self.image_downloader.download_with_retry(image_url, card_id, resize=True,
+                                                         overwrite=overwrite, verbose=verbose)
+    
+    def create_batch(self, entries: List[Dict[str, Any]], overwrite: bool = False,
+                     workers: int = BATCH_WORKERS, verbose: bool = False,
+                     id_range: str = DEFAULT_ID_RANGE) -> Dict[str, Any]:
+        """
+        Create many cards from manifest entries
+        
+        All database rows are written in one transaction; scripts and images
+        for the cards that were written are then processed concurrently.
+        
+        Args:
+            entries: Manifest entries (see build_card_data for the keys)
+            overwrite: Whether to overwrite existing scripts and images
+            workers: Number of worker threads for scripts and images
+            verbose: Show per-card output from the script and image steps
+            id_range: Reserved ID range for entries without an ID
+        
+        Returns:
+            Summary dictionary with 'added', 'scripts', 'images' counts and
+            a 'failures' list of (card_id or name, step, reason) tuples
+        """
+        summary = {'added': 0, 'scripts': 0, 'images': 0, 'failures': []}
+        jobs = []
+        unassigned = []
+        
+        # Step 1: Convert manifest entries to card rows
+        for entry in entries:
+            try:
+                card_data = build_card_data(entry)
+            except ValueError as e:
+                summary['failures'].append((entry.get('id') or entry.get('name'), 'manifest', str(e)))
+                continue
+            if card_data.get('id') is None:
+                unassigned.append(card_data)
+            jobs.append((card_data, entry))
+        
+        # Allocate IDs for every entry without one in a single round trip
+        allocated = []
+        if unassigned:
+            explicit = [card_data['id'] for card_data, _ in jobs if card_data.get('id') is not None]
+            # One block of consecutive IDs keeps a set together; a fragmented
+            # range falls back to reusing its gaps
+            allocated = self.db_manager.allocate_ids(len(unassigned), range_name=id_range,
+                                                     contiguous=True, exclude=explicit)
+            if not allocated and len(unassigned) > 1:
+                allocated = self.db_manager.allocate_ids(len(unassigned), range_name=id_range,
+                                                         exclude=explicit)
+            if not allocated:
+                summary['failures'].extend((card_data['name'], 'id', f"No free IDs in range '{id_range}'")
+                                           for card_data in unassigned)
+                jobs = [job for job in jobs if job[0].get('id') is not None]
+            for card_data, card_id in zip(unassigned, allocated):
+                card_data['id'] = card_id
+        
+        # Step 2: Write every row in a single transaction
+        result = self.db_manager.add_cards((card_data for card_data, _ in jobs), verbose=verbose)
+        summary['added'] = result['written']
+        if 'error' in result:
+            summary['failures'].append((None, 'database', result['error']))
+            self.db_manager.release_ids(allocated)
+            return summary
+        failed_rows = {index for index, _, _ in result['failed']}
+        if allocated and failed_rows:
+            # Hand auto-assigned IDs of rejected rows back to the range
+            allocated_ids = set(allocated)
+            self.db_manager.release_ids(jobs[index][0]['id'] for index in failed_rows
+                                        if jobs[index][0]['id'] in allocated_ids)
+        for index, card_id, reason in result['failed']:
+            summary['failures'].append((card_id, 'database', reason))
+        jobs = [job for index, job in enumerate(jobs) if index not in failed_rows]
+        
+        # Step 3: Scripts and images, concurrently
+        script_jobs = []
+        for card_data, entry in jobs:
+            if not _is_false(entry.get('script', True)):
+                script_jobs.append((card_data, manifest_effect(entry), manifest_effect_params(entry)))
+        image_jobs = [(card_data['id'], entry.get('image') or entry.get('image_url'))
+                      for card_data, entry in jobs if entry.get('image') or entry.get('image_url')]
+        
+        def process_image(job: Tuple[int, str]) -> Tuple[int, bool]:
+            card_id, image = job
+            return card_id, bool(self._process_image(image, card_id, overwrite, verbose))
+        
+        scripts = self.script_generator.generate_many(script_jobs, overwrite, workers, verbose)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            images = list(executor.map(process_image, image_jobs))
+        
+        summary['scripts'] = scripts['written']
+        summary['failures'].extend((card_id, 'script', 'already exists') for card_id in scripts['skipped'])
+        summary['failures'].extend((card_id, 'script', reason) for card_id, reason in scripts['failed'])
+        for card_id, ok in images:
+            if ok:
+                summary['images'] += 1
+            else:
+                summary['failures'].append((card_id, 'image', 'failed'))
+        
+        return summary
+    
     def create_monster(self, card_id: int, name: str, desc: str, atk: int, def_val: int,
                       level: int, attribute: int, race: int, 
                       is_normal: bool = True, image_url: Optional[str] = None,
@@ -166,15 +306,7 @@ class CardCreator:
         Returns:
             True if successful
         """
-        spell_types = {
-            'normal': TYPE_SPELL,
-            'quickplay': TYPE_SPELL_QUICKPLAY,
-            'continuous': TYPE_SPELL_CONTINUOUS,
-            'equip': TYPE_SPELL_EQUIP,
-            'field': TYPE_SPELL_FIELD
-        }
-        
-        card_type = spell_types.get(spell_type.lower(), TYPE_SPELL)
+        card_type = SPELL_TYPES.get(spell_type.lower(), TYPE_SPELL)
         
         card_data = {
             'id': card_id,
@@ -204,13 +336,7 @@ class CardCreator:
         Returns:
             True if successful
         """
-        trap_types = {
-            'normal': TYPE_TRAP,
-            'continuous': TYPE_TRAP_CONTINUOUS,
-            'counter': TYPE_TRAP_COUNTER
-        }
-        
-        card_type = trap_types.get(trap_type.lower(), TYPE_TRAP)
+        card_type = TRAP_TYPES.get(trap_type.lower(), TYPE_TRAP)
         
         card_data = {
             'id': card_id,
@@ -223,6 +349,445 @@ class CardCreator:
         return self.create_card(card_data, image_url, effect_pattern, effect_params)
 
 
+def _is_false(value: Any) -> bool:
+    """Interpret manifest booleans, which may come from CSV as strings"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('0', 'false', 'no', 'n', '')
+    return not value
+
+
+def build_card_data(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a manifest entry into a database card dictionary
+    
+    Manifest keys mirror the command line options:
+        id (optional - next free ID is used if missing), name, desc,
+        type ('monster', 'spell', 'trap' or a raw type value),
+        spell_type, trap_type, effect_monster, atk, def, level,
+        attribute, race, ot, setcode, alias, category,
+        effect, effect_amount / effect_params, effects, image, script
+    
+    'effects' is a list of effects to compose into one script (pattern
+    names or objects with pattern, trigger, cost and params) and takes the
+    place of 'effect'.
+    
+    Args:
+        entry: Manifest entry
+    
+    Returns:
+        Card dictionary accepted by DatabaseManager.add_card
+    
+    Raises:
+        ValueError: If the entry is incomplete or uses unknown names
+    """
+    for field in ('name', 'desc', 'type'):
+        if entry.get(field) in (None, ''):
+            raise ValueError(f"Missing required field '{field}'")
+    
+    card_data = {
+        'id': entry.get('id'),
+        'name': entry['name'],
+        'desc': entry['desc'],
+        'ot': entry.get('ot', SCOPE_OCG_TCG)
+    }
+    for field in ('setcode', 'alias', 'category'):
+        if entry.get(field) is not None:
+            card_data[field] = entry[field]
+    
+    card_kind = entry['type']
+    if isinstance(card_kind, int):
+        card_data['type'] = card_kind
+        kind = 'monster' if is_monster(card_kind) else 'other'
+    else:
+        kind = str(card_kind).lower()
+    
+    if kind == 'spell':
+        spell_type = str(entry.get('spell_type') or 'normal').lower()
+        if spell_type not in SPELL_TYPES:
+            raise ValueError(f"Invalid spell type '{spell_type}'")
+        card_data['type'] = SPELL_TYPES[spell_type]
+    elif kind == 'trap':
+        trap_type = str(entry.get('trap_type') or 'normal').lower()
+        if trap_type not in TRAP_TYPES:
+            raise ValueError(f"Invalid trap type '{trap_type}'")
+        card_data['type'] = TRAP_TYPES[trap_type]
+    elif kind == 'monster':
+        for field in ('atk', 'def', 'level', 'attribute', 'race'):
+            if entry.get(field) in (None, ''):
+                raise ValueError(f"Monsters require '{field}'")
+        attribute = entry['attribute']
+        race = entry['race']
+        if isinstance(attribute, str):
+            attribute = parse_attribute(attribute)
+        if isinstance(race, str):
+            race = parse_race(race)
+        if attribute is None:
+            raise ValueError(f"Invalid attribute '{entry['attribute']}'")
+        if race is None:
+            raise ValueError(f"Invalid race '{entry['race']}'")
+        if 'type' not in card_data:
+            is_effect = not _is_false(entry.get('effect_monster', False))
+            card_data['type'] = TYPE_MONSTER_EFFECT if is_effect else TYPE_MONSTER_NORMAL
+        card_data.update({
+            'atk': entry['atk'],
+            'def': entry['def'],
+            'level': entry['level'],
+            'attribute': attribute,
+            'race': race
+        })
+    elif kind != 'other':
+        raise ValueError(f"Invalid card type '{card_kind}'")
+    
+    return card_data
+
+
+def manifest_effect(entry: Dict[str, Any]) -> EffectSpec:
+    """Effect pattern of a manifest entry ('effects' list, or the single 'effect')"""
+    return entry.get('effects') or entry.get('effect')
+
+
+def manifest_effect_params(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Effect parameters of a manifest entry (effect_params, or effect_amount as 'amount')"""
+    params = entry.get('effect_params')
+    if params is None and entry.get('effect_amount') is not None:
+        params = {'amount': entry['effect_amount']}
+    return params
+
+
+def _manifest_int(value: str) -> int:
+    """Parse a CSV manifest number: decimal (leading zeros allowed) or 0x hexadecimal"""
+    value = value.strip()
+    if value.lstrip('+-')[:2].lower() == '0x':
+        return int(value, 0)
+    return int(value, 10)
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Load card definitions from a JSON or CSV manifest
+    
+    JSON manifests contain a list of entries (or an object with a 'cards'
+    list); CSV manifests have one entry per row with the same column names.
+    
+    Args:
+        path: Path to the manifest file
+    
+    Returns:
+        List of manifest entries
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            entries = []
+            for row in csv.DictReader(f):
+                entry = {key: value for key, value in row.items() if key and value not in (None, '')}
+                for field in MANIFEST_INT_FIELDS:
+                    if field in entry:
+                        entry[field] = _manifest_int(entry[field])
+                for field in MANIFEST_NAME_OR_INT_FIELDS:
+                    if field in entry:
+                        try:
+                            entry[field] = _manifest_int(entry[field])
+                        except ValueError:
+                            pass
+                entries.append(entry)
+            return entries
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('cards', [])
+    return data
+
+
+def print_batch_summary(summary: Dict[str, Any], total: int):
+    """Print the result of a batch run"""
+    print("=" * 70)
+    print("BATCH CREATION SUMMARY")
+    print("=" * 70)
+    print(f"Manifest entries: {total}")
+    print(f"Cards added to database: {summary['added']}")
+    print(f"Scripts generated: {summary['scripts']}")
+    print(f"Images processed: {summary['images']}")
+    if summary['failures']:
+        print(f"\n⚠ {len(summary['failures'])} problem(s):")
+        for card, step, reason in summary['failures']:
+            print(f"  [{step}] {card}: {reason}")
+    print("=" * 70)
+
+
+def batch_main(argv: List[str]) -> int:
+    """Entry point for 'card_creator.py batch <manifest>'"""
+    parser = argparse.ArgumentParser(
+        prog='card_creator.py batch',
+        description='Create many cards from a JSON or CSV manifest'
+    )
+    parser.add_argument('manifest', help='Path to manifest (.json or .csv)')
+    parser.add_argument('--db', type=str, help='Database path (default: ../expansions/cards.cdb)')
+    parser.add_argument('--script-dir', type=str, help='Script directory (default: ../script)')
+    parser.add_argument('--pics-dir', type=str, help='Images directory (default: ../pics)')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS,
+                        help=f'Worker threads for scripts and images (default: {BATCH_WORKERS})')
+    parser.add_argument('--overwrite', action='store_true', help='Overwrite existing files')
+    parser.add_argument('--verbose', action='store_true', help='Show per-card output')
+    parser.add_argument('--id-range', type=str, default=DEFAULT_ID_RANGE,
+                        help=f'Reserved ID range for entries without an id (default: {DEFAULT_ID_RANGE})')
+    parser.add_argument('--db-profile', choices=sorted(CONNECTION_PROFILES), default='default',
+                        help="Connection profile; 'concurrent' uses WAL so EDOPro can read meanwhile")
+    parser.add_argument('--check-names', action='store_true',
+                        help='Reject cards whose name duplicates an existing custom card')
+    args = parser.parse_args(argv)
+    
+    try:
+        entries = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not load manifest: {e}")
+        return 1
+    
+    creator = CardCreator(db_path=args.db, script_dir=args.script_dir, pics_dir=args.pics_dir,
+                          db_profile=args.db_profile, duplicate_check=args.check_names)
+    summary = creator.create_batch(entries, overwrite=args.overwrite, workers=args.workers,
+                                   verbose=args.verbose, id_range=args.id_range)
+    print_batch_summary(summary, len(entries))
+    return 0 if not summary['failures'] else 1
+
+
+def scripts_main(argv: List[str]) -> int:
+    """Entry point for 'card_creator.py scripts <manifest>'"""
+    parser = argparse.ArgumentParser(
+        prog='card_creator.py scripts',
+        description='Generate the Lua scripts of manifest entries (no database changes)'
+    )
+    parser.add_argument('manifest', help='Path to manifest (.json or .csv); entries need an id')
+    parser.add_argument('--script-dir', type=str, default='../script',
+                        help='Script directory (default: ../script)')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS,
+                        help=f'Worker threads (default: {BATCH_WORKERS})')
+    parser.add_argument('--overwrite', action='store_true', help='Overwrite existing scripts')
+    args = parser.parse_args(argv)
+    
+    try:
+        entries = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not load manifest: {e}")
+        return 1
+    
+    jobs = []
+    problems = 0
+    for entry in entries:
+        if _is_false(entry.get('script', True)):
+            continue
+        try:
+            card_data = build_card_data(entry)
+        except ValueError as e:
+            print(f"  [manifest] {entry.get('id') or entry.get('name')}: {e}")
+            problems += 1
+            continue
+        if card_data['id'] is None:
+            print(f"  [manifest] {card_data['name']}: No card ID")
+            problems += 1
+            continue
+        jobs.append((card_data, manifest_effect(entry), manifest_effect_params(entry)))
+    
+    result = ScriptGenerator(output_dir=args.script_dir).generate_many(
+        jobs, overwrite=args.overwrite, workers=args.workers)
+    for card_id in result['skipped']:
+        print(f"  [script] {card_id}: already exists (use --overwrite)")
+    for card_id, reason in result['failed']:
+        print(f"  [script] {card_id}: {reason}")
+    for card_id, names in result['unresolved'].items():
+        print(f"  [script] {card_id}: unresolved {', '.join('{' + name + '}' for name in names)}")
+    return 0 if not (problems or result['skipped'] or result['failed']) else 1
+
+
+def regen_main(argv: List[str]) -> int:
+    """Entry point for 'card_creator.py regen'"""
+    parser = argparse.ArgumentParser(
+        prog='card_creator.py regen',
+        description='Regenerate generated scripts from the database, keeping hand-edited ones'
+    )
+    parser.add_argument('--changed', action='store_true',
+                        help='Only rewrite scripts whose template, effect or card data changed')
+    parser.add_argument('--force', action='store_true', help='Also overwrite hand-edited scripts')
+    parser.add_argument('--db', type=str, default='../expansions/cards.cdb',
+                        help='Database path (default: ../expansions/cards.cdb)')
+    parser.add_argument('--script-dir', type=str, default='../script',
+                        help='Script directory (default: ../script)')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS,
+                        help=f'Worker threads (default: {BATCH_WORKERS})')
+    args = parser.parse_args(argv)
+    
+    if not os.path.exists(args.db):
+        print(f"Error: Database not found: {args.db}")
+        return 1
+    generator = ScriptGenerator(output_dir=args.script_dir)
+    ids = generator.manifest_ids()
+    if not ids:
+        print(f"No generated scripts recorded in {generator.manifest_path}")
+        print("Scripts are recorded when created by this tool (batch, scripts or single cards)")
+        return 0
+    
+    wanted = set(ids)
+    cards = {card.id: card.to_dict()
+             for card in DatabaseManager(args.db).iter_cards({'min_id': ids[0], 'max_id': ids[-1]})
+             if card.id in wanted}
+    result = generator.regenerate(cards, changed_only=args.changed, force=args.force,
+                                  workers=args.workers)
+    
+    print(f"Rewritten: {result['written']}, unchanged: {result['unchanged']}")
+    if result['edited']:
+        print(f"\n{len(result['edited'])} hand-edited script(s) kept (use --force to overwrite):")
+        for card_id in result['edited']:
+            print(f"  c{card_id}.lua")
+    if result['missing']:
+        print(f"\n{len(result['missing'])} card(s) no longer in the database: "
+              f"{', '.join(str(card_id) for card_id in result['missing'])}")
+    for card_id, reason in result['failed']:
+        print(f"  [script] {card_id}: {reason}")
+    return 0 if not result['failed'] else 1
+
+
+def migrate_main(argv: List[str]) -> int:
+    """Entry point for 'card_creator.py migrate'"""
+    parser = argparse.ArgumentParser(
+        prog='card_creator.py migrate',
+        description='Add the query indexes, the full-text search index, the ID allocator '
+                    'tables and the change log to an existing database'
+    )
+    parser.add_argument('--db', type=str, default='../expansions/cards.cdb',
+                        help='Database path (default: ../expansions/cards.cdb)')
+    args = parser.parse_args(argv)
+    
+    if not os.path.exists(args.db):
+        print(f"Error: Database not found: {args.db}")
+        return 1
+    
+    if not DatabaseManager(args.db).migrate():
+        return 1
+    print(f"✓ Database is up to date: {args.db}")
+    return 0
+
+
+def ids_main(argv: List[str]) -> int:
+    """Entry point for 'card_creator.py ids'"""
+    parser = argparse.ArgumentParser(
+        prog='card_creator.py ids',
+        description='Manage reserved card ID ranges'
+    )
+    parser.add_argument('--db', type=str, default='../expansions/cards.cdb',
+                        help='Database path (default: ../expansions/cards.cdb)')
+    actions = parser.add_subparsers(dest='action', required=True)
+    actions.add_parser('list', help='Show ranges and how many IDs are free')
+    reserve = actions.add_parser('reserve', help='Reserve a named range for a set or author')
+    reserve.add_argument('name')
+    reserve.add_argument('first_id', type=int)
+    reserve.add_argument('last_id', type=int)
+    reserve.add_argument('--owner', type=str, help='Author or set description')
+    allocate = actions.add_parser('allocate', help='Allocate IDs and print them')
+    allocate.add_argument('count', type=int)
+    allocate.add_argument('--range', dest='range_name', default=DEFAULT_ID_RANGE,
+                          help=f'Range to allocate from (default: {DEFAULT_ID_RANGE})')
+    allocate.add_argument('--contiguous', action='store_true', help='Require consecutive IDs')
+    rebuild = actions.add_parser('rebuild', help='Recompute a range\'s free list from the database')
+    rebuild.add_argument('name')
+    args = parser.parse_args(argv)
+    
+    if not os.path.exists(args.db):
+        print(f"Error: Database not found: {args.db}")
+        return 1
+    db = DatabaseManager(args.db)
+    
+    if args.action == 'list':
+        for id_range in db.list_id_ranges():
+            owner = f" ({id_range['owner']})" if id_range['owner'] else ''
+            print(f"  {id_range['name']:<16} {id_range['first_id']}-{id_range['last_id']}"
+                  f"  free: {id_range['free']}{owner}")
+        return 0
+    if args.action == 'reserve':
+        return 0 if db.reserve_id_range(args.name, args.first_id, args.last_id, args.owner) else 1
+    if args.action == 'allocate':
+        ids = db.allocate_ids(args.count, range_name=args.range_name, contiguous=args.contiguous)
+        for card_id in ids:
+            print(card_id)
+        return 0 if ids else 1
+    return 0 if db.rebuild_id_range(args.name) else 1
+
+
+def finalize_main(argv: List[str]) -> int:
+    """Entry point for 'card_creator.py finalize'"""
+    parser = argparse.ArgumentParser(
+        prog='card_creator.py finalize',
+        description='Checkpoint the WAL and restore the rollback journal before shipping the database'
+    )
+    parser.add_argument('--db', type=str, default='../expansions/cards.cdb',
+                        help='Database path (default: ../expansions/cards.cdb)')
+    parser.add_argument('--vacuum', action='store_true', help='Also compact the file')
+    args = parser.parse_args(argv)
+    
+    if not os.path.exists(args.db):
+        print(f"Error: Database not found: {args.db}")
+        return 1
+    return 0 if DatabaseManager(args.db).finalize_for_release(vacuum=args.vacuum) else 1
+
+
+def export_delta_main(argv: List[str]) -> int:
+    """Entry point for 'card_creator.py export-delta'"""
+    parser = argparse.ArgumentParser(
+        prog='card_creator.py export-delta',
+        description='Write the cards changed since a change log version to a patch database'
+    )
+    parser.add_argument('--since', type=int, required=True,
+                        help='Version the players already have (0 for every logged change)')
+    parser.add_argument('--db', type=str, default='../expansions/cards.cdb',
+                        help='Database path (default: ../expansions/cards.cdb)')
+    parser.add_argument('-o', '--output', type=str,
+                        help='Patch path (default: cards-delta-<since>-<version>.cdb in the current '
+                             'directory; not in expansions/, where EDOPro would load it as a database)')
+    args = parser.parse_args(argv)
+    
+    if not os.path.exists(args.db):
+        print(f"Error: Database not found: {args.db}")
+        return 1
+    db = DatabaseManager(args.db)
+    output = args.output
+    if output is None:
+        output = f"cards-delta-{args.since}-{db.change_log_version()}.cdb"
+    return 0 if db.export_delta(args.since, output) else 1
+
+
+def apply_delta_main(argv: List[str]) -> int:
+    """Entry point for 'card_creator.py apply-delta'"""
+    parser = argparse.ArgumentParser(
+        prog='card_creator.py apply-delta',
+        description='Apply a patch database written by export-delta'
+    )
+    parser.add_argument('patch', help='Patch .cdb written by export-delta')
+    parser.add_argument('--db', type=str, default='../expansions/cards.cdb',
+                        help='Database path (default: ../expansions/cards.cdb)')
+    args = parser.parse_args(argv)
+    
+    for path in (args.db, args.patch):
+        if not os.path.exists(path):
+            print(f"Error: Database not found: {path}")
+            return 1
+    return 0 if DatabaseManager(args.db).apply_delta(args.patch) else 1
+
+
+# Subcommands handled before the single-card argument parser
+COMMANDS = {
+    'apply-delta': apply_delta_main,
+    'batch': batch_main,
+    'export-delta': export_delta_main,
+    'finalize': finalize_main,
+    'ids': ids_main,
+    'lint-scripts': lint_scripts_main,
+    'migrate': migrate_main,
+    'normalize-pics': normalize_pics_main,
+    'regen': regen_main,
+    'scripts': scripts_main,
+    'thumbnails': thumbnails_main,
+}
+
+
 def parse_arguments():
     """Parse command line arguments"""
     parser = argparse.ArgumentParser(
@@ -244,6 +809,9 @@ Examples:
   python card_creator.py --id 10000102 --name "Mystic Warrior" --type monster \\
     --desc "When summoned: Draw 1 card" --atk 1800 --def 1200 --level 4 \\
     --attribute LIGHT --race Warrior --effect-monster
+  
+  # Create many cards from a manifest
+  python card_creator.py batch cards.json
         """
     )
     
@@ -269,7 +837,7 @@ Examples:
                        default='normal', help='Trap card type')
     
     # Effect pattern
-    parser.add_argument('--effect', type=str, help='Effect pattern (recover_lp, damage, draw, atk_boost, def_boost)')
+    parser.add_argument('--effect', type=str, help='Effect pattern (see --list-effects and templates/patterns/)')
     parser.add_argument('--effect-amount', type=int, help='Amount for effect (e.g., LP to recover, cards to draw)')
     
     # Image
@@ -281,6 +849,8 @@ Examples:
     parser.add_argument('--pics-dir', type=str, help='Images directory (default: ../pics)')
     parser.add_argument('--no-script', action='store_true', help='Skip Lua script generation')
     parser.add_argument('--overwrite', action='store_true', help='Overwrite existing files')
+    parser.add_argument('--check-names', action='store_true',
+                        help='Reject the card if its name duplicates an existing custom card')
     
     # List options
     parser.add_argument('--list-effects', action='store_true', help='List available effect patterns')
@@ -292,14 +862,18 @@ Examples:
 
 def main():
     """Main entry point"""
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        return COMMANDS[sys.argv[1]](sys.argv[2:])
+    
     args = parse_arguments()
     
     # Handle list commands
     if args.list_effects:
-        print("Available Effect Patterns:")
         generator = ScriptGenerator()
-        for name, desc in generator.list_available_patterns().items():
-            print(f"  {name:15} - {desc}")
+        for kind, title in (('effect', 'Effect Patterns'), ('trigger', 'Triggers'), ('cost', 'Costs')):
+            print(f"Available {title}:")
+            for name, desc in generator.list_available_patterns(kind).items():
+                print(f"  {name:15} - {desc}")
         return 0
     
     if args.list_attributes:
@@ -318,7 +892,8 @@ def main():
     creator = CardCreator(
         db_path=args.db,
         script_dir=args.script_dir,
-        pics_dir=args.pics_dir
+        pics_dir=args.pics_dir,
+        duplicate_check=args.check_names
     )
     
     # Prepare effect parameters
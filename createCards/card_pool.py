@@ -0,0 +1,261 @@
+"""
+Card Pool Across All EDOPro Databases
+Attaches expansions/*.cdb and every enabled repository database from
+config/configs.json to one SQLite connection and answers lookups the way
+EDOPro resolves them
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+from database_manager import (DatabaseManager, CARD_FIELDS, DATAS_COLUMNS, FIND_PAGE_SIZE)
+
+
+DEFAULT_CONFIG_PATH = "../config/configs.json"
+DEFAULT_EXPANSIONS_DIR = "../expansions"
+
+# EDOPro merges repositories from this file (next to configs.json) as well
+USER_CONFIG_FILENAME = "user_configs.json"
+
+# SQLite's compile-time default for SQLITE_MAX_ATTACHED, used when the Python
+# build cannot report the real limit
+DEFAULT_ATTACH_LIMIT = 10
+
+
+def _cdb_files(directory: str) -> List[str]:
+    """The .cdb files directly inside a directory, in name order"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith('.cdb'))
+
+
+def discover_databases(config_path: str = DEFAULT_CONFIG_PATH,
+                       expansions_dir: str = DEFAULT_EXPANSIONS_DIR) -> List[str]:
+    """
+    List the card databases EDOPro loads, in load order
+    
+    EDOPro reads expansions/ first and then each repository with
+    should_read enabled (configs.json, then user_configs.json), taking the
+    .cdb files in repo_path/data_path. When several databases define the same
+    card ID, the one loaded last wins.
+    
+    Args:
+        config_path: Path to configs.json
+        expansions_dir: Path to the expansions directory
+    
+    Returns:
+        Database paths, lowest precedence first
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(config_path)))
+    paths = _cdb_files(expansions_dir)
+    
+    config_files = [config_path, os.path.join(os.path.dirname(config_path), USER_CONFIG_FILENAME)]
+    for config_file in config_files:
+        if not os.path.exists(config_file):
+            continue
+        try:
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read {config_file}: {e}")
+            continue
+        for repo in config.get('repos', []):
+            if not repo.get('should_read', True) or not repo.get('repo_path'):
+                continue
+            directory = os.path.join(root, repo['repo_path'], repo.get('data_path', ''))
+            paths.extend(_cdb_files(os.path.normpath(directory)))
+    
+    # A database listed twice is loaded once, at its first position
+    seen = set()
+    unique = []
+    for path in paths:
+        key = os.path.normcase(os.path.realpath(path))
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+class CardPool:
+    """
+    Read-only view over every card database EDOPro loads
+    
+    All databases share one connection. The highest-precedence databases are
+    ATTACHed read-only, up to SQLite's attach limit; any older ones beyond
+    the limit are copied into in-memory tables instead. A temporary view
+    keeps only the winning row per card ID, so lookups and cross-database
+    checks are single queries.
+    """
+    
+    def __init__(self, databases: Optional[List[str]] = None,
+                 config_path: str = DEFAULT_CONFIG_PATH,
+                 expansions_dir: str = DEFAULT_EXPANSIONS_DIR):
+        """
+        Initialize card pool
+        
+        Args:
+            databases: Explicit database paths, lowest precedence first
+                (default: discover them from configs.json and expansions/)
+            config_path: Path to configs.json
+            expansions_dir: Path to the expansions directory
+        """
+        if databases is None:
+            databases = discover_databases(config_path, expansions_dir)
+        self.databases = [path for path in databases if os.path.exists(path)]
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def close(self):
+        """Close the shared connection (it is reopened on the next lookup)"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    @staticmethod
+    def _attach_limit(conn) -> int:
+        """Maximum number of databases that can be attached to conn"""
+        if hasattr(conn, 'getlimit'):
+            return conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        return DEFAULT_ATTACH_LIMIT
+    
+    @staticmethod
+    def _attach(conn, path: str, alias: str) -> bool:
+        """ATTACH a database read-only; False if it has no datas table"""
+        uri = Path(path).resolve().as_uri() + '?mode=ro'
+        conn.execute("ATTACH DATABASE ? AS " + alias, (uri,))
+        tables = {row[0] for row in conn.execute(
+            f"SELECT name FROM {alias}.sqlite_master WHERE type = 'table'")}
+        if 'datas' in tables and 'texts' in tables:
+            return True
+        conn.execute("DETACH DATABASE " + alias)
+        print(f"Warning: {path} is not a card database, skipped")
+        return False
+    
+    @staticmethod
+    def _card_select(schema: str, precedence: int) -> str:
+        """SELECT of one database's cards tagged with its precedence"""
+        columns = ', '.join(f'd.{c}' for c in DATAS_COLUMNS)
+        return (f"SELECT {columns}, t.name, t.desc, {precedence} AS precedence "
+                f"FROM {schema}.datas d LEFT JOIN {schema}.texts t ON t.id = d.id")
+    
+    def _open(self):
+        """Attach or copy every database and create the pool views"""
+        conn = sqlite3.connect(':memory:', uri=True, check_same_thread=False)
+        try:
+            limit = self._attach_limit(conn)
+            overflow = max(0, len(self.databases) - limit)
+            selects = []
+            
+            # Oldest databases beyond the attach limit: copy through one slot
+            for precedence, path in enumerate(self.databases[:overflow]):
+                if not self._attach(conn, path, 'src'):
+                    continue
+                table = f"cards_{precedence}"
+                conn.execute(f"CREATE TABLE {table} AS "
+                             f"SELECT * FROM ({self._card_select('src', precedence)})")
+                conn.execute(f"CREATE INDEX {table}_id ON {table}(id)")
+                conn.execute("DETACH DATABASE src")
+                selects.append(f"SELECT * FROM main.{table}")
+            
+            for precedence, path in enumerate(self.databases[overflow:], start=overflow):
+                alias = f"db{precedence}"
+                if self._attach(conn, path, alias):
+                    selects.append(self._card_select(alias, precedence))
+            
+            if not selects:
+                selects.append(self._card_select('main', 0))
+                for statement in ("CREATE TABLE datas (id INTEGER PRIMARY KEY, ot, alias, setcode, "
+                                  "type, atk, def, level, race, attribute, category)",
+                                  "CREATE TABLE texts (id INTEGER PRIMARY KEY, name, desc)"):
+                    conn.execute(statement)
+            
+            conn.execute("CREATE TEMP VIEW pool_all AS " + " UNION ALL ".join(selects))
+            conn.execute(f"""
+                CREATE TEMP VIEW pool_cards AS
+                SELECT {', '.join(CARD_FIELDS)}, precedence FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY id ORDER BY precedence DESC) AS rank
+                    FROM pool_all
+                ) WHERE rank = 1
+            """)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+    
+    def _query(self, query: str, params: List[Any]) -> List[tuple]:
+        """Run a query on the shared connection, opening it on first use"""
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._open()
+            return self._conn.execute(query, params).fetchall()
+    
+    def get_card(self, card_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a card as EDOPro sees it
+        
+        Args:
+            card_id: Card ID to retrieve
+        
+        Returns:
+            Dictionary with the same keys as DatabaseManager.get_card plus
+            'source' (the database it came from), or None if not found
+        """
+        rows = self._query(f"""
+            SELECT {', '.join(CARD_FIELDS)}, precedence FROM pool_all
+            WHERE id = ? ORDER BY precedence DESC LIMIT 1
+        """, [card_id])
+        if not rows:
+            return None
+        card = dict(zip(CARD_FIELDS, rows[0]))
+        card['source'] = self.databases[rows[0][-1]]
+        return card
+    
+    def card_sources(self, card_id: int) -> List[str]:
+        """
+        List every database that defines a card ID
+        
+        Args:
+            card_id: Card ID to look up
+        
+        Returns:
+            Database paths, winning database first (more than one entry means
+            the others are shadowed in game)
+        """
+        rows = self._query("SELECT precedence FROM pool_all WHERE id = ? ORDER BY precedence DESC",
+                           [card_id])
+        return [self.databases[row[0]] for row in rows]
+    
+    def find_cards(self, order_by: str = 'id', descending: bool = False,
+                   limit: Optional[int] = FIND_PAGE_SIZE, cursor: Optional[Tuple[Any, int]] = None,
+                   **filters) -> Dict[str, Any]:
+        """
+        Find cards across all databases (same arguments and result as
+        DatabaseManager.find_cards)
+        
+        Filters apply to the winning version of each card, so a card whose
+        errata changed its ATK is matched on the new value only.
+        """
+        query, params = DatabaseManager._find_query("pool_cards AS datas", 'datas', order_by,
+                                                    descending, limit, cursor, filters)
+        return DatabaseManager._find_page(self._query(query, params), limit)
+    
+    def names(self) -> List[Tuple[int, str]]:
+        """(card ID, name) of every card in the pool, winning version only"""
+        return self._query("SELECT id, name FROM pool_cards WHERE name IS NOT NULL", [])
+    
+    def count(self) -> int:
+        """Number of distinct card IDs in the pool"""
+        return self._query("SELECT COUNT(DISTINCT id) FROM pool_all", [])[0][0]
@@ -1,61 +1,82 @@
 """
 Check for duplicate card names and analyze database entries
 """
+import os
 from database_manager import DatabaseManager
-import sqlite3
+from duplicate_detector import DuplicateDetector, NameIndex, NEAR_DUPLICATE_THRESHOLD
+from card_pool import CardPool, discover_databases
 
-def check_duplicates():
-    db = DatabaseManager('../expansions/cards.cdb')
-    conn = db.connect()
-    cursor = conn.cursor()
+
+def check_duplicates(db_path: str = '../expansions/cards.cdb', min_id: int = 10000001,
+                     max_id: int = 19999999, threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                     check_other_databases: bool = True):
+    """
+    Report duplicate and near-duplicate names among custom cards
+    
+    Names are compared after normalizing case, punctuation and accents, so
+    "Blue-Eyes White Dragon" and "blue eyes white dragón" count as the same.
     
-    # Check for duplicate names
-    cursor.execute("""
-        SELECT name, COUNT(*) as count, GROUP_CONCAT(id) as ids
-        FROM texts 
-        WHERE id >= 10000001 AND id < 20000000
-        GROUP BY name
-        HAVING COUNT(*) > 1
-        ORDER BY count DESC
-    """)
-    duplicates = cursor.fetchall()
+    Returns:
+        Dictionary with 'exact' (groups of (id, name)), 'near'
+        ((id, id, similarity) pairs) and 'other_databases'
+        ((custom id, other id, other name, similarity) tuples)
+    """
+    db = DatabaseManager(db_path)
+    detector = DuplicateDetector(db, threshold=threshold)
     
-    if duplicates:
+    # Exact duplicates (same normalized name)
+    exact = detector.exact_duplicates(min_id, max_id)
+    if exact:
         print("⚠️  DUPLICATE CARD NAMES FOUND:")
         print("=" * 70)
-        for name, count, ids in duplicates:
-            print(f"  '{name}' appears {count} times")
-            print(f"    IDs: {ids}")
+        for group in exact:
+            print(f"  '{group[0][1]}' appears {len(group)} times")
+            print(f"    IDs: {', '.join(str(card_id) for card_id, _ in group)}")
             print()
     else:
         print("✅ No duplicate card names found in custom database")
     
-    # Check for cards with same name as official cards
+    # Near duplicates (similar names, e.g. typos)
     print("\n" + "=" * 70)
-    print("CHECKING FOR COMMON CARD NAMES:")
+    print(f"SIMILAR CARD NAMES (similarity >= {threshold:.0%}):")
     print("=" * 70)
+    near = detector.near_duplicates(min_id, max_id)
+    for first_id, second_id, similarity in near:
+        print(f"  {similarity:.0%}  {first_id} '{detector.index.name(first_id)}'"
+              f"  ~  {second_id} '{detector.index.name(second_id)}'")
+    if not near:
+        print("  None")
     
-    common_names = ['Blue-Eyes White Dragon', 'Dark Magician', 'Exodia']
-    for name in common_names:
-        cursor.execute("""
-            SELECT id, name FROM texts 
-            WHERE name LIKE ? AND id >= 10000001 AND id < 20000000
-        """, (f'%{name}%',))
-        results = cursor.fetchall()
-        if results:
-            print(f"\n'{name}' found in custom database:")
-            for card_id, card_name in results:
-                print(f"  ID: {card_id}, Name: {card_name}")
+    # Custom names that match cards from the other databases EDOPro loads
+    other_matches = []
+    if check_other_databases:
+        print("\n" + "=" * 70)
+        print("CUSTOM NAMES MATCHING CARDS IN OTHER DATABASES:")
+        print("=" * 70)
+        own = os.path.normcase(os.path.realpath(db_path))
+        others = [path for path in discover_databases()
+                  if os.path.normcase(os.path.realpath(path)) != own]
+        with CardPool(others) as pool:
+            other_index = NameIndex(pool.names(), threshold=threshold)
+        for card_id in sorted(detector.index.ids()):
+            if not min_id <= card_id <= max_id:
+                continue
+            name = detector.index.name(card_id)
+            # Same ID in another database is a collision (see collision_checker.py)
+            for other_id, similarity in other_index.similar(name, exclude_id=card_id)[:3]:
+                other_matches.append((card_id, other_id, other_index.name(other_id), similarity))
+                print(f"  {card_id} '{name}'  ~  {other_id} '{other_index.name(other_id)}' "
+                      f"({similarity:.0%})")
+        if not other_matches:
+            print(f"  None ({len(others)} other database(s) checked)")
     
     # Total card count
-    cursor.execute("SELECT COUNT(*) FROM datas WHERE id >= 10000001 AND id < 20000000")
-    total = cursor.fetchone()[0]
+    total = sum(1 for card_id in detector.index.ids() if min_id <= card_id <= max_id)
     print(f"\n" + "=" * 70)
     print(f"Total custom cards in database: {total}")
     print("=" * 70)
     
-    conn.close()
+    return {'exact': exact, 'near': near, 'other_databases': other_matches}
 
 if __name__ == "__main__":
     check_duplicates()
-
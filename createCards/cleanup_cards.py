@@ -4,9 +4,12 @@ Analyzes and deletes cards from the database that don't have corresponding image
 """
 
 from database_manager import DatabaseManager
-import os
+from asset_index import AssetIndex
 from typing import List, Tuple
 
+# Image formats EDOPro actually loads
+LOADABLE_IMAGE_EXTENSIONS = ['.jpg', '.png']
+
 
 def analyze_cards_without_images(db_path: str = '../expansions/cards.cdb', 
                                   pics_dir: str = '../pics',
@@ -40,6 +43,9 @@ def analyze_cards_without_images(db_path: str = '../expansions/cards.cdb',
     all_cards = cursor.fetchall()
     conn.close()
     
+    # One directory scan instead of two os.path.exists calls per card
+    index = AssetIndex(pics_dir, script_directory=None)
+    
     missing_images = []
     cards_with_images = []
     
@@ -47,10 +53,7 @@ def analyze_cards_without_images(db_path: str = '../expansions/cards.cdb',
         if card_name is None:
             card_name = f"Unknown (ID: {card_id})"
         
-        jpg_path = os.path.join(pics_dir, f'{card_id}.jpg')
-        png_path = os.path.join(pics_dir, f'{card_id}.png')
-        
-        if os.path.exists(jpg_path) or os.path.exists(png_path):
+        if index.has_image(card_id, LOADABLE_IMAGE_EXTENSIONS):
             cards_with_images.append((card_id, card_name))
         else:
             missing_images.append((card_id, card_name))
@@ -0,0 +1,208 @@
+"""
+Card ID Collision Checker
+Detects custom card IDs that are already used by another database EDOPro
+loads (official cards, other repositories). EDOPro silently lets one of the
+two cards shadow the other, so these must be caught before a card is written.
+"""
+
+import os
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from card_pool import discover_databases, DEFAULT_CONFIG_PATH, DEFAULT_EXPANSIONS_DIR
+
+
+def _contains(ids, card_id: int) -> bool:
+    """Binary search for card_id in an ascending sequence"""
+    index = bisect_left(ids, card_id)
+    return index < len(ids) and ids[index] == card_id
+
+
+def _intersect_sorted(left: array, right: List[int]) -> List[int]:
+    """Merge-intersect two ascending sequences in O(len(left) + len(right))"""
+    found = []
+    i = j = 0
+    left_len, right_len = len(left), len(right)
+    while i < left_len and j < right_len:
+        a, b = left[i], right[j]
+        if a < b:
+            i += 1
+        elif a > b:
+            j += 1
+        else:
+            found.append(a)
+            i += 1
+            j += 1
+    return found
+
+
+class CollisionChecker:
+    """
+    Sorted ID sets of every configured card database
+    
+    Each database's IDs are read once into a compact array('q') and reloaded
+    only when the file changes. Checking a handful of IDs uses binary search;
+    checking many (e.g. a whole custom database) merge-intersects the sorted
+    sequences in linear time.
+    """
+    
+    def __init__(self, databases: Optional[List[str]] = None,
+                 exclude: Optional[Iterable[str]] = None,
+                 config_path: str = DEFAULT_CONFIG_PATH,
+                 expansions_dir: str = DEFAULT_EXPANSIONS_DIR):
+        """
+        Initialize collision checker
+        
+        Args:
+            databases: Database paths to check against (default: every
+                database EDOPro loads, see card_pool.discover_databases)
+            exclude: Databases to leave out, normally the one being written
+            config_path: Path to configs.json
+            expansions_dir: Path to the expansions directory
+        """
+        if databases is None:
+            databases = discover_databases(config_path, expansions_dir)
+        excluded = {self._key(path) for path in (exclude or [])}
+        self.databases = [path for path in databases if self._key(path) not in excluded]
+        self._ids = {}
+        self._stamps = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(path: str) -> str:
+        """Normalized path used to compare database locations"""
+        return os.path.normcase(os.path.realpath(path))
+    
+    @staticmethod
+    def _stamp(path: str) -> Optional[tuple]:
+        """(mtime, size) of a database file, or None if it is missing"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    @staticmethod
+    def _read_ids(path: str) -> array:
+        """All card IDs of a database as a sorted array"""
+        conn = sqlite3.connect(Path(path).resolve().as_uri() + '?mode=ro', uri=True)
+        try:
+            # The primary key index returns the IDs already sorted
+            return array('q', (row[0] for row in conn.execute("SELECT id FROM datas ORDER BY id")))
+        finally:
+            conn.close()
+    
+    def refresh(self, force: bool = False):
+        """
+        Reload the ID set of every database that changed since it was read
+        
+        Args:
+            force: Reload all databases unconditionally
+        """
+        with self._lock:
+            for path in self.databases:
+                stamp = self._stamp(path)
+                if stamp is None:
+                    self._ids.pop(path, None)
+                    self._stamps.pop(path, None)
+                    continue
+                if force or self._stamps.get(path) != stamp:
+                    try:
+                        self._ids[path] = self._read_ids(path)
+                    except sqlite3.Error as e:
+                        print(f"Warning: Could not read card IDs from {path}: {e}")
+                        self._ids[path] = array('q')
+                    self._stamps[path] = stamp
+    
+    def _id_sets(self) -> Dict[str, array]:
+        """Current ID arrays keyed by database path"""
+        self.refresh()
+        return dict(self._ids)
+    
+    def sources(self, card_id: int) -> List[str]:
+        """
+        List the databases that already use a card ID
+        
+        Args:
+            card_id: Card ID to check
+        
+        Returns:
+            Database paths (empty if the ID is free everywhere)
+        """
+        return [path for path, ids in self._id_sets().items() if _contains(ids, card_id)]
+    
+    def is_taken(self, card_id: int) -> bool:
+        """Check whether any configured database uses a card ID"""
+        return bool(self.sources(card_id))
+    
+    def taken_in_range(self, first_id: int, last_id: int) -> List[int]:
+        """
+        IDs between first_id and last_id (inclusive) used by any database
+        
+        Returns:
+            Sorted list of IDs
+        """
+        taken = set()
+        for ids in self._id_sets().values():
+            taken.update(ids[bisect_left(ids, first_id):bisect_right(ids, last_id)])
+        return sorted(taken)
+    
+    def collisions(self, card_ids: Iterable[int]) -> Dict[int, List[str]]:
+        """
+        Find which of the given IDs are used by other databases
+        
+        Args:
+            card_ids: IDs to check (any order)
+        
+        Returns:
+            Dictionary mapping each colliding ID to the databases using it
+        """
+        wanted = sorted(set(card_ids))
+        result = {}
+        if not wanted:
+            return result
+        
+        for path, ids in self._id_sets().items():
+            if len(wanted) * max(1, len(ids).bit_length()) < len(ids):
+                # Few IDs against a large database: binary search is cheaper
+                common = [card_id for card_id in wanted if _contains(ids, card_id)]
+            else:
+                common = _intersect_sorted(ids, wanted)
+            for card_id in common:
+                result.setdefault(card_id, []).append(path)
+        return result
+
+
+def check_collisions(db_path: str = '../expansions/cards.cdb',
+                     min_id: int = 10000001, max_id: int = 99999999) -> Dict[int, List[str]]:
+    """Report custom card IDs that collide with other configured databases"""
+    checker = CollisionChecker(exclude=[db_path])
+    custom_ids = CollisionChecker._read_ids(db_path)
+    custom_ids = custom_ids[bisect_left(custom_ids, min_id):bisect_right(custom_ids, max_id)]
+    
+    print("=" * 70)
+    print("CARD ID COLLISIONS")
+    print("=" * 70)
+    print(f"Custom cards checked: {len(custom_ids)}")
+    print(f"Other databases: {len(checker.databases)}")
+    for path in checker.databases:
+        print(f"  - {path}")
+    
+    collisions = checker.collisions(custom_ids)
+    if collisions:
+        print(f"\n⚠️  {len(collisions)} custom ID(s) are also used elsewhere "
+              f"(EDOPro will show only one of the cards):")
+        for card_id in sorted(collisions):
+            print(f"  {card_id}: {', '.join(collisions[card_id])}")
+    else:
+        print("\n✅ No custom card IDs collide with other databases")
+    print("=" * 70)
+    return collisions
+
+
+if __name__ == "__main__":
+    check_collisions()
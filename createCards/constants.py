@@ -278,3 +278,10 @@ def is_trap(card_type):
     """Check if card type is a trap"""
     return bool(card_type & TYPE_TRAP)
 
+
+def _discard(*args, **kwargs):
+    """Stand-in for print when a call's output is turned off"""
+
+def printer(verbose):
+    """Get print for verbose calls, or a function that discards its arguments"""
+    return print if verbose else _discard
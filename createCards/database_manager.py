@@ -5,27 +5,688 @@ Handles all database operations for card creation, updating, and querying
 
 import sqlite3
 import os
-from typing import Optional, Dict, Any, List
+import random
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple
 from constants import *
+from duplicate_detector import DuplicateDetector, name_key
+
+
+# Size of the per-connection prepared statement cache used by sessions
+STATEMENT_CACHE_SIZE = 256
+
+# Connection profiles: PRAGMAs applied to every connection (None keeps the
+# database's or SQLite's own setting). 'default' leaves the rollback journal
+# that EDOPro ships with; 'concurrent' switches the file to WAL so EDOPro can
+# keep reading while creation scripts write. cache_size follows SQLite's
+# convention (negative values are KiB).
+CONNECTION_PROFILES = {
+    'default': {
+        'journal_mode': None,
+        'busy_timeout': 5000,
+        'synchronous': None,
+        'cache_size': None,
+    },
+    'concurrent': {
+        'journal_mode': 'WAL',
+        'busy_timeout': 10000,
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+    },
+}
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+# Write transactions that still hit "database is locked" after busy_timeout
+# are retried with exponential backoff (seconds)
+WRITE_RETRIES = 5
+WRITE_RETRY_DELAY = 0.05
+WRITE_RETRY_MAX_DELAY = 2.0
+
+# Column order of the datas and texts tables
+DATAS_COLUMNS = ['id', 'ot', 'alias', 'setcode', 'type', 'atk', 'def', 'level',
+                 'race', 'attribute', 'category']
+TEXTS_COLUMNS = ['id', 'name', 'desc'] + [f'str{i}' for i in range(1, 17)]
+
+# Statements are kept as constants so repeated calls on a session connection
+# hit sqlite3's prepared statement cache
+SQL_CARD_EXISTS = "SELECT id FROM datas WHERE id = ?"
+SQL_INSERT_DATAS = (f"INSERT INTO datas ({', '.join(DATAS_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(DATAS_COLUMNS))})")
+SQL_INSERT_TEXTS = (f"INSERT INTO texts ({', '.join(TEXTS_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(TEXTS_COLUMNS))})")
+SQL_DELETE_DATAS = "DELETE FROM datas WHERE id = ?"
+SQL_DELETE_TEXTS = "DELETE FROM texts WHERE id = ?"
+SQL_REPLACE_DATAS = SQL_INSERT_DATAS.replace("INSERT INTO", "INSERT OR REPLACE INTO", 1)
+SQL_REPLACE_TEXTS = SQL_INSERT_TEXTS.replace("INSERT INTO", "INSERT OR REPLACE INTO", 1)
+
+# Full-text search index over texts.name/texts.desc (external content FTS5
+# table kept in sync by triggers)
+SEARCH_TABLE = 'texts_fts'
+SEARCH_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        name, desc, content='texts', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON texts BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, name, desc) VALUES (new.id, new.name, new.desc);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON texts BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, desc)
+        VALUES ('delete', old.id, old.name, old.desc);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE ON texts BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, desc)
+        VALUES ('delete', old.id, old.name, old.desc);
+        INSERT INTO {SEARCH_TABLE}(rowid, name, desc) VALUES (new.id, new.name, new.desc);
+    END""",
+]
+
+# Search result ranking: matches in the name weigh more than matches in the text
+SEARCH_NAME_WEIGHT = 10.0
+SEARCH_DESC_WEIGHT = 1.0
+
+# Fields every new card must provide
+REQUIRED_CARD_FIELDS = ['id', 'name', 'desc', 'type', 'ot']
+
+# Number of cards validated and written per executemany() call in bulk imports
+BULK_CHUNK_SIZE = 500
+SQL_GET_CARD = """
+    SELECT datas.id, datas.ot, datas.alias, datas.setcode, datas.type, 
+           datas.atk, datas.def, datas.level, datas.race, datas.attribute, 
+           datas.category, texts.name, texts.desc
+    FROM datas
+    LEFT JOIN texts ON datas.id = texts.id
+    WHERE datas.id = ?
+"""
+
+# Keys of the card dictionaries returned by get_card and find_cards
+CARD_FIELDS = DATAS_COLUMNS + ['name', 'desc']
+
+# Hint/prompt strings stored in texts.str1..str16
+STRING_COLUMNS = TEXTS_COLUMNS[3:]
+
+# Rows fetched per fetchmany() call by iter_cards
+ITER_CHUNK_SIZE = 256
+
+# Secondary indexes for find_cards: range filters and ordering on stats, and
+# equality lookups on attribute/race. The rowid (card ID) is implicitly the
+# last column of every index, so (column, id) keyset pagination stays indexed.
+# Level is indexed on its low byte (the rest holds Pendulum scales).
+QUERY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_datas_type ON datas(type)",
+    "CREATE INDEX IF NOT EXISTS idx_datas_attribute ON datas(attribute)",
+    "CREATE INDEX IF NOT EXISTS idx_datas_race ON datas(race)",
+    "CREATE INDEX IF NOT EXISTS idx_datas_atk ON datas(atk)",
+    "CREATE INDEX IF NOT EXISTS idx_datas_def ON datas(def)",
+    "CREATE INDEX IF NOT EXISTS idx_datas_level ON datas((level & 255))",
+    "CREATE INDEX IF NOT EXISTS idx_texts_name ON texts(name)",
+]
+
+# Columns find_cards can order (and paginate) by
+ORDER_COLUMNS = {
+    'id': 'datas.id',
+    'name': 'texts.name',
+    'atk': 'datas.atk',
+    'def': 'datas.def',
+    'level': '(datas.level & 255)',
+}
+
+# Columns accepted as exact / _min / _max range filters
+RANGE_COLUMNS = {
+    'atk': 'datas.atk',
+    'def': 'datas.def',
+    'level': '(datas.level & 255)',
+    'id': 'datas.id',
+}
+
+# Default page size of find_cards
+FIND_PAGE_SIZE = 100
+
+# Card ID allocator: named ID ranges (per set or author) and the free
+# intervals left in each. Deleting a card hands its ID back to the innermost
+# range that contains it, so gaps are reused; inserting one takes its ID out
+# of the free list. INSERT OR REPLACE fires both (recursive_triggers is on):
+# the delete trigger runs once the old row is gone, so the insert trigger is
+# what keeps the replaced card's ID from staying free.
+# IDs 10000001-10000099 are kept for system and test cards, so the default
+# range starts where get_next_available_id does.
+DEFAULT_ID_RANGE = 'custom'
+DEFAULT_ID_RANGE_BOUNDS = (10000100, 99999999)
+# Bounds of the default range in databases migrated before the reserved block
+LEGACY_ID_RANGE_BOUNDS = (10000001, 99999999)
+
+
+def _free_interval_at(card_id: str, op: str) -> str:
+    """
+    Trigger subquery: (range_name, first_id) of the free interval in each range
+    containing card_id whose first_id compares to card_id with op
+    
+    Intervals of one range never overlap, so the candidate is the one with
+    the largest first_id; each lookup is a seek on the primary key instead
+    of a scan of the free list.
+    """
+    return (f"SELECT ranges.name, (SELECT first_id FROM id_free WHERE range_name = ranges.name "
+            f"AND first_id {op} {card_id} ORDER BY first_id DESC LIMIT 1) FROM id_ranges AS ranges "
+            f"WHERE {card_id} BETWEEN ranges.first_id AND ranges.last_id")
+
+
+ID_ALLOCATOR_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS id_ranges (
+        name TEXT PRIMARY KEY,
+        first_id INTEGER NOT NULL,
+        last_id INTEGER NOT NULL,
+        owner TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS id_free (
+        range_name TEXT NOT NULL,
+        first_id INTEGER NOT NULL,
+        last_id INTEGER NOT NULL,
+        PRIMARY KEY (range_name, first_id)
+    ) WITHOUT ROWID""",
+    """CREATE TRIGGER IF NOT EXISTS id_free_ad AFTER DELETE ON datas BEGIN
+        INSERT INTO id_free (range_name, first_id, last_id)
+        SELECT inner_range.name, old.id, old.id FROM (
+            SELECT name FROM id_ranges WHERE old.id BETWEEN first_id AND last_id
+            ORDER BY last_id - first_id LIMIT 1
+        ) AS inner_range
+        WHERE IFNULL((SELECT last_id FROM id_free WHERE range_name = inner_range.name
+                      AND first_id <= old.id ORDER BY first_id DESC LIMIT 1), 0) < old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS id_free_ai AFTER INSERT ON datas BEGIN
+        INSERT INTO id_free (range_name, first_id, last_id)
+        SELECT range_name, new.id + 1, last_id FROM id_free
+        WHERE (range_name, first_id) IN ({_free_interval_at('new.id', '<=')}) AND last_id > new.id
+          AND NOT EXISTS (SELECT 1 FROM id_free AS next_free
+                          WHERE next_free.range_name = id_free.range_name
+                          AND next_free.first_id = new.id + 1);
+        DELETE FROM id_free WHERE (range_name, first_id) IN ({_free_interval_at('new.id', '=')});
+        UPDATE id_free SET last_id = new.id - 1
+        WHERE (range_name, first_id) IN ({_free_interval_at('new.id', '<')}) AND last_id >= new.id;
+    END""",
+]
+
+# Allocator triggers whose stored SQL differs from ID_ALLOCATOR_SCHEMA (older
+# versions) are dropped and recreated by ensure_id_allocator
+ALLOCATOR_TRIGGERS = ['id_free_ad', 'id_free_ai']
+
+
+# Change log: one row per card written since the log was created, kept by
+# triggers so every write is recorded. op is the last change to the card's
+# datas row ('insert', 'update' or 'delete'); text-only edits keep the op and
+# only take a new version. Versions increase with each change, so a delta
+# since version N holds every card whose version is greater than N.
+CHANGE_LOG_TABLE = 'card_changes'
+_NEXT_VERSION = f"(SELECT IFNULL(MAX(version), 0) + 1 FROM {CHANGE_LOG_TABLE})"
+
+
+def _log_card_change(card_id: str, op: str, condition: str = '1') -> str:
+    """Trigger statements recording op for a card"""
+    # UPDATE, then INSERT if missing: deleting the row could lower MAX(version)
+    # and a conflict clause would be overridden by the outer statement's
+    return (f"UPDATE {CHANGE_LOG_TABLE} SET op = '{op}', changed_at = datetime('now'), "
+            f"version = {_NEXT_VERSION} WHERE id = {card_id} AND {condition};\n"
+            f"        INSERT INTO {CHANGE_LOG_TABLE} (id, op, changed_at, version) "
+            f"SELECT {card_id}, '{op}', datetime('now'), {_NEXT_VERSION} WHERE {condition} "
+            f"AND NOT EXISTS (SELECT 1 FROM {CHANGE_LOG_TABLE} WHERE id = {card_id});")
+
+
+def _log_text_change(card_id: str) -> str:
+    """Trigger statements giving a card a new version after a texts change"""
+    return (f"UPDATE {CHANGE_LOG_TABLE} SET changed_at = datetime('now'), version = {_NEXT_VERSION} "
+            f"WHERE id = {card_id} AND op != 'delete';\n"
+            f"        INSERT INTO {CHANGE_LOG_TABLE} (id, op, changed_at, version) "
+            f"SELECT {card_id}, 'update', datetime('now'), {_NEXT_VERSION} "
+            f"WHERE EXISTS (SELECT 1 FROM datas WHERE id = {card_id}) "
+            f"AND NOT EXISTS (SELECT 1 FROM {CHANGE_LOG_TABLE} WHERE id = {card_id});")
+
+
+CHANGE_LOG_SCHEMA = [
+    f"""CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} (
+        id INTEGER PRIMARY KEY,
+        op TEXT NOT NULL,
+        changed_at TEXT NOT NULL,
+        version INTEGER NOT NULL
+    )""",
+    f"CREATE INDEX IF NOT EXISTS idx_{CHANGE_LOG_TABLE}_version ON {CHANGE_LOG_TABLE}(version)",
+    f"""CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG_TABLE}_datas_ai AFTER INSERT ON datas BEGIN
+        {_log_card_change('new.id', 'insert')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG_TABLE}_datas_au AFTER UPDATE ON datas BEGIN
+        {_log_card_change('old.id', 'delete', 'old.id != new.id')}
+        {_log_card_change('new.id', 'update')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG_TABLE}_datas_ad AFTER DELETE ON datas BEGIN
+        {_log_card_change('old.id', 'delete')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG_TABLE}_texts_ai AFTER INSERT ON texts BEGIN
+        {_log_text_change('new.id')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG_TABLE}_texts_au AFTER UPDATE ON texts BEGIN
+        {_log_text_change('new.id')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG_TABLE}_texts_ad AFTER DELETE ON texts BEGIN
+        {_log_text_change('old.id')}
+    END""",
+]
+
+# Extra tables of a delta .cdb (besides datas, texts and card_changes)
+DELTA_SCHEMA = [
+    "CREATE TABLE delta_info (from_version INTEGER NOT NULL, to_version INTEGER NOT NULL, "
+    "created_at TEXT NOT NULL, source TEXT)",
+    "CREATE TABLE deleted_cards (id INTEGER PRIMARY KEY)",
+]
+
+
+def _id_runs(ids: Iterable[int]) -> List[Tuple[int, int]]:
+    """Collapse card IDs into sorted (first, last) runs of consecutive IDs"""
+    runs = []
+    for card_id in sorted(set(ids)):
+        if runs and card_id == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], card_id)
+        else:
+            runs.append((card_id, card_id))
+    return runs
+
+
+def _merge_intervals(intervals: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sort (first, last) intervals and merge overlapping or adjacent ones"""
+    merged = []
+    for first, last in sorted(intervals):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def _subtract_intervals(intervals: Iterable[Tuple[int, int]],
+                        removed: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Remove every ID covered by removed from intervals"""
+    result = []
+    removed = _merge_intervals(removed)
+    for first, last in _merge_intervals(intervals):
+        for cut_first, cut_last in removed:
+            if cut_last < first or cut_first > last:
+                continue
+            if cut_first > first:
+                result.append((first, cut_first - 1))
+            first = cut_last + 1
+            if first > last:
+                break
+        if first <= last:
+            result.append((first, last))
+    return result
+
+
+def _take_blocks(free: List[Tuple[int, int]], count: int,
+                 contiguous: bool) -> Optional[List[Tuple[int, int]]]:
+    """Pick count IDs from the free intervals, lowest first (None if too few)"""
+    if contiguous:
+        for first, last in free:
+            if last - first + 1 >= count:
+                return [(first, first + count - 1)]
+        return None
+    
+    blocks = []
+    for first, last in free:
+        take = min(count, last - first + 1)
+        blocks.append((first, first + take - 1))
+        count -= take
+        if count == 0:
+            return blocks
+    return None
+
+
+class Card:
+    """
+    Compact read-only record for one card: the datas columns plus name and desc
+    
+    Uses __slots__ instead of a per-row dict. Since 'def' is a Python keyword
+    the defense column is the attribute defense, but card['def'] works like
+    the dictionaries returned by get_card. The 16 str* hint texts are only
+    read from the database when first accessed.
+    """
+    
+    __slots__ = ('id', 'ot', 'alias', 'setcode', 'type', 'atk', 'defense', 'level',
+                 'race', 'attribute', 'category', 'name', 'desc', '_strings', '_source')
+    
+    def __init__(self, row: tuple, strings: Optional[tuple] = None, source=None):
+        """
+        Args:
+            row: Values in CARD_FIELDS order
+            strings: str1..str16 if already loaded
+            source: DatabaseManager used to load the strings on demand
+        """
+        (self.id, self.ot, self.alias, self.setcode, self.type, self.atk, self.defense,
+         self.level, self.race, self.attribute, self.category, self.name, self.desc) = row
+        self._strings = strings
+        self._source = source
+    
+    @property
+    def strings(self) -> Tuple[Optional[str], ...]:
+        """str1..str16, loaded from the database on first access"""
+        if self._strings is None:
+            if self._source is None:
+                return (None,) * len(STRING_COLUMNS)
+            self._strings = self._source.get_card_strings(self.id)
+        return self._strings
+    
+    def __getitem__(self, key: str) -> Any:
+        if key == 'def':
+            return self.defense
+        if key in STRING_COLUMNS:
+            return self.strings[STRING_COLUMNS.index(key)]
+        if key in CARD_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def to_dict(self, strings: bool = False) -> Dict[str, Any]:
+        """Same dictionary as get_card (optionally with str1..str16)"""
+        card = {field: self[field] for field in CARD_FIELDS}
+        if strings:
+            card.update(zip(STRING_COLUMNS, self.strings))
+        return card
+    
+    def __repr__(self) -> str:
+        return f"Card(id={self.id}, name={self.name!r})"
+
+
+# Every live DatabaseManager, so finalize_for_release can find the other
+# managers of the same file in this process
+_OPEN_MANAGERS = weakref.WeakSet()
+
+
+def _same_file(path: str, other: str) -> bool:
+    """Check whether two paths name the same existing file"""
+    try:
+        return os.path.samefile(path, other)
+    except OSError:
+        return False
 
 
 class DatabaseManager:
     """Manages SQLite database operations for Yu-Gi-Oh! cards"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, cache_size: int = 0, profile: Any = 'default',
+                 collision_checker=None, duplicate_check: bool = False):
         """
         Initialize database manager
         
         Args:
             db_path: Path to the .cdb database file
+            cache_size: Number of cards kept in the get_card/card_exists
+                LRU cache (0 disables caching)
+            profile: Name from CONNECTION_PROFILES, or a dictionary overriding
+                keys of the 'default' profile
+            collision_checker: Optional CollisionChecker; new cards and
+                allocated IDs must not be used by any database it covers
+            duplicate_check: Reject new cards whose normalized name already
+                exists and warn about similar names
+        
+        Raises:
+            ValueError: For unknown profiles or invalid PRAGMA values
         """
         self.db_path = db_path
+        self.profile = self._resolve_profile(profile)
+        self.collision_checker = collision_checker
+        self.duplicate_detector = DuplicateDetector(self) if duplicate_check else None
+        self._journal_ready = False
+        self._session_conn = None
+        self._session_depth = 0
+        self._search_ready = False
+        self._allocator_ready = False
+        self._change_log_ready = False
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_version = None
+        self._cache_watch = None
+        self._cache_hits = 0
+        self._cache_misses = 0
+        _OPEN_MANAGERS.add(self)
+    
+    def __enter__(self):
+        self.open_session()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None and self._session_conn is not None:
+            self._session_conn.rollback()
+        self.close_session()
+        return False
+        
+    @staticmethod
+    def _resolve_profile(profile: Any) -> Dict[str, Any]:
+        """Validate a connection profile and fill in defaults"""
+        if isinstance(profile, str):
+            if profile not in CONNECTION_PROFILES:
+                raise ValueError(f"Unknown connection profile: {profile}")
+            profile = CONNECTION_PROFILES[profile]
+        unknown = set(profile) - set(CONNECTION_PROFILES['default'])
+        if unknown:
+            raise ValueError(f"Unknown connection profile keys: {', '.join(sorted(unknown))}")
         
+        resolved = dict(CONNECTION_PROFILES['default'], **profile)
+        for key, choices in (('journal_mode', JOURNAL_MODES),
+                             ('synchronous', SYNCHRONOUS_LEVELS)):
+            if resolved[key] is not None:
+                resolved[key] = str(resolved[key]).upper()
+                if resolved[key] not in choices:
+                    raise ValueError(f"{key} must be one of {', '.join(choices)}")
+        for key in ('busy_timeout', 'cache_size'):
+            if resolved[key] is not None and not isinstance(resolved[key], int):
+                raise ValueError(f"{key} must be an integer")
+        return resolved
+    
     def connect(self):
-        """Create a database connection"""
+        """Create a database connection configured by the connection profile"""
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(f"Database file not found: {self.db_path}")
-        return sqlite3.connect(self.db_path)
+        profile = self.profile
+        timeout = (profile['busy_timeout'] or 0) / 1000
+        conn = sqlite3.connect(self.db_path, timeout=timeout,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        # INSERT OR REPLACE must fire the delete triggers that keep the
+        # search index in sync
+        conn.execute("PRAGMA recursive_triggers = ON")
+        if profile['synchronous'] is not None:
+            conn.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+        if profile['cache_size'] is not None:
+            conn.execute(f"PRAGMA cache_size = {profile['cache_size']}")
+        
+        # The journal mode is stored in the file, so it only needs setting once
+        if profile['journal_mode'] is not None and not self._journal_ready:
+            mode = self._retry_locked(lambda: conn.execute(
+                f"PRAGMA journal_mode = {profile['journal_mode']}").fetchone()[0])
+            if mode.upper() != profile['journal_mode']:
+                print(f"Warning: Could not switch {self.db_path} to "
+                      f"{profile['journal_mode']} journal (still {mode})")
+            self._journal_ready = True
+        return conn
+    
+    @staticmethod
+    def _retry_locked(operation):
+        """
+        Run operation, retrying with exponential backoff while the database is locked
+        
+        busy_timeout already waits inside SQLite; this covers longer waits
+        (e.g. EDOPro holding a read lock during a big query) and the cases
+        where SQLite gives up immediately to avoid a deadlock.
+        """
+        delay = WRITE_RETRY_DELAY
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                return operation()
+            except sqlite3.OperationalError as e:
+                message = str(e).lower()
+                if attempt == WRITE_RETRIES or ('locked' not in message and 'busy' not in message):
+                    raise
+            time.sleep(delay * (1 + random.random()))
+            delay = min(delay * 2, WRITE_RETRY_MAX_DELAY)
+    
+    @property
+    def in_session(self) -> bool:
+        """True while a persistent session connection is open"""
+        return self._session_conn is not None
+    
+    def open_session(self):
+        """
+        Open a persistent connection shared by all following calls
+        
+        Sessions nest: each open_session() must be matched by a close_session(),
+        and the connection is only closed when the outermost session ends.
+        """
+        if self._session_conn is None:
+            self._session_conn = self.connect()
+        self._session_depth += 1
+    
+    def close_session(self):
+        """Close the persistent connection opened by open_session()"""
+        if self._session_depth == 0:
+            return
+        self._session_depth -= 1
+        if self._session_depth == 0:
+            conn = self._session_conn
+            self._session_conn = None
+            try:
+                conn.commit()
+            finally:
+                conn.close()
+    
+    @contextmanager
+    def session(self):
+        """
+        Context manager that keeps one connection alive across calls
+        
+        Example:
+            with db.session():
+                for card in cards:
+                    db.update_card(card)
+        """
+        self.open_session()
+        try:
+            yield self
+        except Exception:
+            if self._session_conn is not None:
+                self._session_conn.rollback()
+            raise
+        finally:
+            self.close_session()
+    
+    @contextmanager
+    def _connection(self):
+        """
+        Yield the session connection, or a short-lived one outside a session
+        
+        Uncommitted work is rolled back if the block raises, so a failed call
+        never leaks a half-written card into the next commit of a session.
+        """
+        if self._session_conn is not None:
+            try:
+                yield self._session_conn
+            except Exception:
+                self._session_conn.rollback()
+                raise
+            return
+        
+        conn = self.connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def _write_transaction(self):
+        """
+        Yield a cursor inside a BEGIN IMMEDIATE transaction and commit on exit
+        
+        IMMEDIATE takes the write lock up front, so two writers are serialized
+        instead of both reading the same state (e.g. the ID free list) and one
+        failing later. Lock contention can then only surface at BEGIN or
+        COMMIT, and both are retried with backoff.
+        """
+        with self._connection() as conn:
+            if not conn.in_transaction:
+                self._retry_locked(lambda: conn.execute("BEGIN IMMEDIATE"))
+            cursor = conn.cursor()
+            yield cursor
+            self._retry_locked(conn.commit)
+    
+    def connection(self):
+        """
+        Context manager yielding a connection for tools built on this manager
+        
+        Inside a session this is the session connection, otherwise a
+        short-lived one that is closed on exit.
+        """
+        return self._connection()
+    
+    def write_transaction(self):
+        """
+        Context manager yielding a cursor inside a BEGIN IMMEDIATE transaction
+        
+        The transaction commits when the block exits normally; lock contention
+        is retried with backoff like every write made by this manager.
+        """
+        return self._write_transaction()
+    
+    @staticmethod
+    def _card_exists(cursor, card_id: int) -> bool:
+        """Check card existence using an already open cursor"""
+        cursor.execute(SQL_CARD_EXISTS, (card_id,))
+        return cursor.fetchone() is not None
+    
+    @staticmethod
+    def _datas_row(card_data: Dict[str, Any]) -> tuple:
+        """Build the datas row for a card, filling optional columns with defaults"""
+        return (
+            card_data['id'],
+            card_data.get('ot', SCOPE_OCG_TCG),
+            card_data.get('alias', 0),
+            card_data.get('setcode', 0),
+            card_data['type'],
+            card_data.get('atk', 0),
+            card_data.get('def', 0),
+            card_data.get('level', 0),
+            card_data.get('race', 0),
+            card_data.get('attribute', 0),
+            card_data.get('category', 0)
+        )
+    
+    @staticmethod
+    def _texts_row(card_data: Dict[str, Any]) -> tuple:
+        """Build the texts row for a card, filling str1-str16 with empty strings"""
+        return (card_data['id'], card_data['name'], card_data['desc']) + tuple(
+            card_data.get(f'str{i}', '') for i in range(1, 17)
+        )
+    
+    @staticmethod
+    def _validate_card(card_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Check that a card dictionary can be written as a new row
+        
+        Returns:
+            Error message, or None if the card is valid
+        """
+        if not isinstance(card_data, dict):
+            return f"Card must be a dictionary, got {type(card_data).__name__}"
+        for field in REQUIRED_CARD_FIELDS:
+            if field not in card_data:
+                return f"Missing required field '{field}'"
+        if not isinstance(card_data['id'], int) or card_data['id'] <= 0:
+            return f"Invalid card ID: {card_data['id']!r}"
+        if not isinstance(card_data['type'], int):
+            return f"Invalid card type: {card_data['type']!r}"
+        return None
     
     def card_exists(self, card_id: int) -> bool:
         """
@@ -38,12 +699,10 @@ class DatabaseManager:
             True if card exists, False otherwise
         """
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM datas WHERE id = ?", (card_id,))
-            result = cursor.fetchone()
-            conn.close()
-            return result is not None
+            if self.cache_size > 0:
+                return self._cached_card(card_id) is not None
+            with self._connection() as conn:
+                return self._card_exists(conn.cursor(), card_id)
         except Exception as e:
             print(f"Error checking card existence: {e}")
             return False
@@ -59,43 +718,124 @@ class DatabaseManager:
             Dictionary with card data or None if not found
         """
         try:
-            conn = self.connect()
+            if self.cache_size > 0:
+                card = self._cached_card(card_id)
+                return dict(card) if card is not None else None
+            return self._read_card(card_id)
+        except Exception as e:
+            print(f"Error retrieving card: {e}")
+            return None
+    
+    def _read_card(self, card_id: int) -> Optional[Dict[str, Any]]:
+        """Read one card from the database (errors propagate)"""
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             # Get data from both datas and texts tables
-            cursor.execute("""
-                SELECT datas.id, datas.ot, datas.alias, datas.setcode, datas.type, 
-                       datas.atk, datas.def, datas.level, datas.race, datas.attribute, 
-                       datas.category, texts.name, texts.desc
-                FROM datas
-                LEFT JOIN texts ON datas.id = texts.id
-                WHERE datas.id = ?
-            """, (card_id,))
-            
+            cursor.execute(SQL_GET_CARD, (card_id,))
             row = cursor.fetchone()
-            conn.close()
-            
-            if not row:
-                return None
-            
-            return {
-                'id': row[0],
-                'ot': row[1],
-                'alias': row[2],
-                'setcode': row[3],
-                'type': row[4],
-                'atk': row[5],
-                'def': row[6],
-                'level': row[7],
-                'race': row[8],
-                'attribute': row[9],
-                'category': row[10],
-                'name': row[11],
-                'desc': row[12]
-            }
-        except Exception as e:
-            print(f"Error retrieving card: {e}")
+        
+        if not row:
             return None
+        
+        return dict(zip(CARD_FIELDS, row))
+    
+    def _data_version(self) -> int:
+        """
+        PRAGMA data_version seen by a dedicated watcher connection
+        
+        The value changes whenever any other connection (another process,
+        another DatabaseManager or one of our own write connections) commits
+        to the file, which makes it a cheap staleness check for the cache.
+        The watcher is opened read-only, so a wrong path raises
+        FileNotFoundError instead of creating an empty database.
+        """
+        if self._cache_watch is None:
+            if not os.path.exists(self.db_path):
+                raise FileNotFoundError(f"Database file not found: {self.db_path}")
+            self._cache_watch = sqlite3.connect(Path(self.db_path).resolve().as_uri() + '?mode=ro',
+                                                uri=True, check_same_thread=False)
+        return self._cache_watch.execute("PRAGMA data_version").fetchone()[0]
+    
+    def data_version(self) -> int:
+        """
+        Change counter of the database file
+        
+        Two calls return different values whenever a commit (from any
+        connection or process) happened in between; the value itself has no
+        meaning.
+        """
+        with self._cache_lock:
+            return self._data_version()
+    
+    def _names_synced(self) -> bool:
+        """
+        True if the duplicate name index has seen every commit so far
+        
+        Call inside a write transaction: the write lock keeps other
+        connections from committing until ours does.
+        """
+        return self.duplicate_detector is not None and self.duplicate_detector.is_synced()
+    
+    def _index_written_names(self, records: List[Tuple[int, str]], synced: bool):
+        """Add cards this manager just committed to the duplicate name index"""
+        if synced:
+            self.duplicate_detector.index_written(records)
+    
+    def _cached_card(self, card_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Look a card up through the LRU cache (None if the card does not exist)
+        
+        Missing cards are cached too, so repeated card_exists() checks for
+        free IDs stay cheap. The whole cache is dropped when the database was
+        written since the last lookup.
+        """
+        with self._cache_lock:
+            version = self._data_version()
+            if version != self._cache_version:
+                self._cache.clear()
+                self._cache_version = version
+            if card_id in self._cache:
+                self._cache.move_to_end(card_id)
+                self._cache_hits += 1
+                return self._cache[card_id]
+        
+        card = self._read_card(card_id)
+        with self._cache_lock:
+            self._cache_misses += 1
+            if self._cache_version == version:
+                self._cache[card_id] = card
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return card
+    
+    def invalidate_cache(self, card_id: Optional[int] = None):
+        """
+        Drop cached cards
+        
+        Args:
+            card_id: Card to drop (None drops the whole cache)
+        """
+        with self._cache_lock:
+            if card_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(card_id, None)
+    
+    def close_cache(self):
+        """Clear the cache and close its watcher connection"""
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_version = None
+            if self._cache_watch is not None:
+                self._cache_watch.close()
+                self._cache_watch = None
+    
+    def cache_info(self) -> Dict[str, int]:
+        """Cache statistics: hits, misses, size and maxsize"""
+        with self._cache_lock:
+            return {'hits': self._cache_hits, 'misses': self._cache_misses,
+                    'size': len(self._cache), 'maxsize': self.cache_size}
     
     def add_card(self, card_data: Dict[str, Any]) -> bool:
         """
@@ -111,70 +851,41 @@ class DatabaseManager:
         """
         try:
             # Validate required fields
-            required_fields = ['id', 'name', 'desc', 'type', 'ot']
-            for field in required_fields:
-                if field not in card_data:
-                    print(f"Error: Missing required field '{field}'")
-                    return False
+            error = self._validate_card(card_data)
+            if error:
+                print(f"Error: {error}")
+                return False
             
             card_id = card_data['id']
             
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            # Check if card already exists
-            if self.card_exists(card_id):
-                print(f"Warning: Card with ID {card_id} already exists.")
-                conn.close()
-                return False
-            
-            # Insert into datas table
-            cursor.execute("""
-                INSERT INTO datas (id, ot, alias, setcode, type, atk, def, level, race, attribute, category)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                card_id,
-                card_data.get('ot', SCOPE_OCG_TCG),
-                card_data.get('alias', 0),
-                card_data.get('setcode', 0),
-                card_data['type'],
-                card_data.get('atk', 0),
-                card_data.get('def', 0),
-                card_data.get('level', 0),
-                card_data.get('race', 0),
-                card_data.get('attribute', 0),
-                card_data.get('category', 0)
-            ))
+            if self.collision_checker is not None:
+                sources = self.collision_checker.sources(card_id)
+                if sources:
+                    print(f"Error: Card ID {card_id} is already used by {', '.join(sources)}")
+                    return False
             
-            # Insert into texts table
-            cursor.execute("""
-                INSERT INTO texts (id, name, desc, str1, str2, str3, str4, str5, str6, 
-                                  str7, str8, str9, str10, str11, str12, str13, str14, str15, str16)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                card_id,
-                card_data['name'],
-                card_data['desc'],
-                card_data.get('str1', ''),
-                card_data.get('str2', ''),
-                card_data.get('str3', ''),
-                card_data.get('str4', ''),
-                card_data.get('str5', ''),
-                card_data.get('str6', ''),
-                card_data.get('str7', ''),
-                card_data.get('str8', ''),
-                card_data.get('str9', ''),
-                card_data.get('str10', ''),
-                card_data.get('str11', ''),
-                card_data.get('str12', ''),
-                card_data.get('str13', ''),
-                card_data.get('str14', ''),
-                card_data.get('str15', ''),
-                card_data.get('str16', '')
-            ))
+            if self.duplicate_detector is not None:
+                matches = self.duplicate_detector.check_name(card_data['name'], exclude_id=card_id)
+                if matches['exact']:
+                    other_id, other_name = matches['exact'][0]
+                    print(f"Error: A card named '{other_name}' already exists (ID: {other_id})")
+                    return False
+                for other_id, other_name, similarity in matches['near'][:3]:
+                    print(f"Warning: Name is similar to '{other_name}' "
+                          f"(ID: {other_id}, {similarity:.0%} similar)")
             
-            conn.commit()
-            conn.close()
+            with self._write_transaction() as cursor:
+                # Check if card already exists (inside the write transaction)
+                if self._card_exists(cursor, card_id):
+                    print(f"Warning: Card with ID {card_id} already exists.")
+                    return False
+                
+                # Insert into datas and texts tables
+                cursor.execute(SQL_INSERT_DATAS, self._datas_row(card_data))
+                cursor.execute(SQL_INSERT_TEXTS, self._texts_row(card_data))
+                synced = self._names_synced()
+            self.invalidate_cache(card_id)
+            self._index_written_names([(card_id, card_data['name'])], synced)
             
             print(f"✓ Successfully added card: {card_data['name']} (ID: {card_id})")
             return True
@@ -186,6 +897,190 @@ class DatabaseManager:
             print(f"✗ Error: {e}")
             return False
     
+    def add_cards(self, cards: Iterable[Dict[str, Any]],
+                  chunk_size: int = BULK_CHUNK_SIZE, verbose: bool = True) -> Dict[str, Any]:
+        """
+        Add many new cards in a single transaction
+        
+        Cards are consumed lazily in chunks, so a generator can feed very large
+        imports without holding every card in memory. Invalid cards and IDs that
+        already exist are reported per row and do not abort the batch.
+        
+        Args:
+            cards: Iterable of card dictionaries (same keys as add_card)
+            chunk_size: Number of cards written per executemany() call
+            verbose: Print the result summary
+        
+        Returns:
+            Dictionary with 'written' (count) and 'failed'
+            (list of (index, card_id, reason) tuples)
+        """
+        return self._write_cards(cards, replace=False, chunk_size=chunk_size, verbose=verbose)
+    
+    def upsert_cards(self, cards: Iterable[Dict[str, Any]],
+                     chunk_size: int = BULK_CHUNK_SIZE, verbose: bool = True) -> Dict[str, Any]:
+        """
+        Insert or fully replace many cards in a single transaction
+        
+        Unlike update_card, each card replaces the whole row, so every card
+        must provide the same required fields as add_card.
+        
+        Args:
+            cards: Iterable of card dictionaries (same keys as add_card)
+            chunk_size: Number of cards written per executemany() call
+            verbose: Print the result summary
+        
+        Returns:
+            Dictionary with 'written' (count) and 'failed'
+            (list of (index, card_id, reason) tuples)
+        """
+        return self._write_cards(cards, replace=True, chunk_size=chunk_size, verbose=verbose)
+    
+    def _write_cards(self, cards: Iterable[Dict[str, Any]], replace: bool,
+                     chunk_size: int, verbose: bool = True) -> Dict[str, Any]:
+        """Shared implementation of add_cards and upsert_cards"""
+        log = printer(verbose)
+        result = {'written': 0, 'failed': []}
+        datas_sql = SQL_REPLACE_DATAS if replace else SQL_INSERT_DATAS
+        texts_sql = SQL_REPLACE_TEXTS if replace else SQL_INSERT_TEXTS
+        seen_ids = set()
+        seen_keys = {}
+        written_names = []
+        
+        try:
+            if self.duplicate_detector is not None:
+                # Bring the name keys up to date before taking the write lock
+                self.duplicate_detector.sync()
+            
+            # The explicit transaction makes the per-chunk savepoints nest
+            # inside it instead of committing on release
+            with self._write_transaction() as cursor:
+                synced = self._names_synced()
+                iterator = enumerate(cards)
+                while True:
+                    chunk = list(islice(iterator, chunk_size))
+                    if not chunk:
+                        break
+                    
+                    valid = self._validate_chunk(cursor, chunk, seen_ids, replace,
+                                                 result['failed'], seen_keys)
+                    if valid:
+                        failed_before = len(result['failed'])
+                        result['written'] += self._insert_chunk(
+                            cursor, valid, datas_sql, texts_sql, result['failed'])
+                        if synced:
+                            rejected = {index for index, _, _ in result['failed'][failed_before:]}
+                            written_names.extend((card_data['id'], card_data['name'])
+                                                 for index, card_data in valid if index not in rejected)
+            self.invalidate_cache()
+            self._index_written_names(written_names, synced)
+        except Exception as e:
+            log(f"✗ Bulk write failed, batch rolled back: {e}")
+            result['written'] = 0
+            result['error'] = str(e)
+            return result
+        
+        result['failed'].sort(key=lambda failure: failure[0])
+        action = "upserted" if replace else "added"
+        log(f"✓ Successfully {action} {result['written']} cards "
+              f"({len(result['failed'])} failed)")
+        return result
+    
+    def _validate_chunk(self, cursor, chunk: List[Tuple[int, Dict[str, Any]]],
+                        seen_ids: set, replace: bool, failed: List[Tuple[int, Any, str]],
+                        seen_keys: Optional[Dict[str, int]] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        """Validate one chunk of a bulk import, recording rejected rows in failed"""
+        valid = []
+        for index, card_data in chunk:
+            card_id = card_data.get('id') if isinstance(card_data, dict) else None
+            error = self._validate_card(card_data)
+            if error is None and card_id in seen_ids:
+                error = f"Duplicate card ID {card_id} in batch"
+            if error:
+                failed.append((index, card_id, error))
+                continue
+            seen_ids.add(card_id)
+            valid.append((index, card_data))
+        
+        if not replace and valid:
+            # One lookup per chunk instead of one card_exists() call per card
+            ids = [card_data['id'] for _, card_data in valid]
+            placeholders = ', '.join('?' * len(ids))
+            cursor.execute(f"SELECT id FROM datas WHERE id IN ({placeholders})", ids)
+            existing = {row[0] for row in cursor.fetchall()}
+            if existing:
+                for index, card_data in valid:
+                    if card_data['id'] in existing:
+                        failed.append((index, card_data['id'],
+                                       f"Card with ID {card_data['id']} already exists"))
+                valid = [item for item in valid if item[1]['id'] not in existing]
+        
+        if self.duplicate_detector is not None and valid:
+            valid = self._reject_duplicate_names(valid, {} if seen_keys is None else seen_keys, failed)
+        
+        if self.collision_checker is not None and valid:
+            collisions = self.collision_checker.collisions(c['id'] for _, c in valid)
+            if collisions:
+                for index, card_data in valid:
+                    if card_data['id'] in collisions:
+                        failed.append((index, card_data['id'],
+                                       f"Card ID {card_data['id']} is already used by "
+                                       f"{', '.join(collisions[card_data['id']])}"))
+                valid = [item for item in valid if item[1]['id'] not in collisions]
+        
+        return valid
+    
+    def _reject_duplicate_names(self, valid: List[Tuple[int, Dict[str, Any]]],
+                                seen_keys: Dict[str, int],
+                                failed: List[Tuple[int, Any, str]]) -> List[Tuple[int, Dict[str, Any]]]:
+        """Drop cards whose normalized name exists in the database or earlier in the batch"""
+        existing = self.duplicate_detector.existing_keys((c['name'] for _, c in valid), synced=True)
+        kept = []
+        for index, card_data in valid:
+            key = name_key(card_data['name'])
+            others = [other for other in existing.get(key, []) if other != card_data['id']]
+            if not others and key in seen_keys:
+                others = [seen_keys[key]]
+            if key and others:
+                failed.append((index, card_data['id'],
+                               f"A card named '{card_data['name']}' already exists (ID: {others[0]})"))
+                continue
+            seen_keys[key] = card_data['id']
+            kept.append((index, card_data))
+        return kept
+    
+    def _insert_chunk(self, cursor, valid: List[Tuple[int, Dict[str, Any]]],
+                      datas_sql: str, texts_sql: str,
+                      failed: List[Tuple[int, Any, str]]) -> int:
+        """
+        Write a validated chunk with executemany()
+        
+        The chunk runs inside a savepoint; if a constraint fails, the chunk is
+        rolled back and retried row by row so only the offending cards fail.
+        """
+        cursor.execute("SAVEPOINT bulk_chunk")
+        try:
+            cursor.executemany(datas_sql, (self._datas_row(c) for _, c in valid))
+            cursor.executemany(texts_sql, (self._texts_row(c) for _, c in valid))
+            cursor.execute("RELEASE SAVEPOINT bulk_chunk")
+            return len(valid)
+        except sqlite3.IntegrityError:
+            cursor.execute("ROLLBACK TO SAVEPOINT bulk_chunk")
+        
+        written = 0
+        for index, card_data in valid:
+            try:
+                cursor.execute(datas_sql, self._datas_row(card_data))
+                cursor.execute(texts_sql, self._texts_row(card_data))
+                cursor.execute("RELEASE SAVEPOINT bulk_chunk")
+                cursor.execute("SAVEPOINT bulk_chunk")
+                written += 1
+            except sqlite3.IntegrityError as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT bulk_chunk")
+                failed.append((index, card_data['id'], str(e)))
+        cursor.execute("RELEASE SAVEPOINT bulk_chunk")
+        return written
+    
     def update_card(self, card_data: Dict[str, Any]) -> bool:
         """
         Update an existing card in the database
@@ -203,48 +1098,43 @@ class DatabaseManager:
             
             card_id = card_data['id']
             
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            # Check if card exists
-            if not self.card_exists(card_id):
-                print(f"Error: Card with ID {card_id} does not exist")
-                conn.close()
-                return False
-            
-            # Build update query for datas table
-            datas_fields = ['ot', 'alias', 'setcode', 'type', 'atk', 'def', 'level', 'race', 'attribute', 'category']
-            datas_updates = []
-            datas_values = []
-            
-            for field in datas_fields:
-                if field in card_data:
-                    datas_updates.append(f"{field} = ?")
-                    datas_values.append(card_data[field])
-            
-            if datas_updates:
-                datas_values.append(card_id)
-                query = f"UPDATE datas SET {', '.join(datas_updates)} WHERE id = ?"
-                cursor.execute(query, datas_values)
-            
-            # Build update query for texts table
-            texts_fields = ['name', 'desc', 'str1', 'str2', 'str3', 'str4', 'str5', 'str6',
-                           'str7', 'str8', 'str9', 'str10', 'str11', 'str12', 'str13', 'str14', 'str15', 'str16']
-            texts_updates = []
-            texts_values = []
-            
-            for field in texts_fields:
-                if field in card_data:
-                    texts_updates.append(f"{field} = ?")
-                    texts_values.append(card_data[field])
-            
-            if texts_updates:
-                texts_values.append(card_id)
-                query = f"UPDATE texts SET {', '.join(texts_updates)} WHERE id = ?"
-                cursor.execute(query, texts_values)
-            
-            conn.commit()
-            conn.close()
+            with self._write_transaction() as cursor:
+                # Check if card exists (inside the write transaction)
+                if not self._card_exists(cursor, card_id):
+                    print(f"Error: Card with ID {card_id} does not exist")
+                    return False
+                
+                # Build update query for datas table
+                datas_fields = ['ot', 'alias', 'setcode', 'type', 'atk', 'def', 'level', 'race', 'attribute', 'category']
+                datas_updates = []
+                datas_values = []
+                
+                for field in datas_fields:
+                    if field in card_data:
+                        datas_updates.append(f"{field} = ?")
+                        datas_values.append(card_data[field])
+                
+                if datas_updates:
+                    datas_values.append(card_id)
+                    query = f"UPDATE datas SET {', '.join(datas_updates)} WHERE id = ?"
+                    cursor.execute(query, datas_values)
+                
+                # Build update query for texts table
+                texts_fields = ['name', 'desc', 'str1', 'str2', 'str3', 'str4', 'str5', 'str6',
+                               'str7', 'str8', 'str9', 'str10', 'str11', 'str12', 'str13', 'str14', 'str15', 'str16']
+                texts_updates = []
+                texts_values = []
+                
+                for field in texts_fields:
+                    if field in card_data:
+                        texts_updates.append(f"{field} = ?")
+                        texts_values.append(card_data[field])
+                
+                if texts_updates:
+                    texts_values.append(card_id)
+                    query = f"UPDATE texts SET {', '.join(texts_updates)} WHERE id = ?"
+                    cursor.execute(query, texts_values)
+            self.invalidate_cache(card_id)
             
             print(f"✓ Successfully updated card ID: {card_id}")
             return True
@@ -267,21 +1157,16 @@ class DatabaseManager:
             True if successful, False otherwise
         """
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            # Check if card exists
-            if not self.card_exists(card_id):
-                print(f"Error: Card with ID {card_id} does not exist")
-                conn.close()
-                return False
-            
-            # Delete from both tables
-            cursor.execute("DELETE FROM datas WHERE id = ?", (card_id,))
-            cursor.execute("DELETE FROM texts WHERE id = ?", (card_id,))
-            
-            conn.commit()
-            conn.close()
+            with self._write_transaction() as cursor:
+                # Check if card exists (inside the write transaction)
+                if not self._card_exists(cursor, card_id):
+                    print(f"Error: Card with ID {card_id} does not exist")
+                    return False
+                
+                # Delete from both tables
+                cursor.execute(SQL_DELETE_DATAS, (card_id,))
+                cursor.execute(SQL_DELETE_TEXTS, (card_id,))
+            self.invalidate_cache(card_id)
             
             print(f"✓ Successfully deleted card ID: {card_id}")
             return True
@@ -305,38 +1190,653 @@ class DatabaseManager:
             List of dictionaries containing card data
         """
         try:
-            conn = self.connect()
+            return [{'id': card.id, 'name': card.name, 'type': card.type,
+                     'atk': card.atk, 'def': card.defense}
+                    for card in self.iter_cards({'min_id': min_id, 'max_id': max_id})]
+        except Exception as e:
+            print(f"Error listing cards: {e}")
+            return []
+    
+    def iter_cards(self, query: Optional[Dict[str, Any]] = None,
+                   chunk_size: int = ITER_CHUNK_SIZE, strings: bool = False) -> Iterable[Card]:
+        """
+        Stream cards in ID order as compact Card records
+        
+        Rows are read with fetchmany(), so a pass over the whole database
+        holds at most chunk_size rows at a time. The connection stays open
+        until the generator is exhausted or closed.
+        
+        Args:
+            query: Optional filters (same keys as find_cards)
+            chunk_size: Rows fetched per round trip
+            strings: Load str1..str16 with each row instead of on first access
+        
+        Yields:
+            Card records
+        
+        Raises:
+            ValueError: For unknown filters
+        """
+        where, params = self._filter_clause(query)
+        columns = [f'datas.{c}' for c in DATAS_COLUMNS] + ['texts.name', 'texts.desc']
+        if strings:
+            columns += [f'texts.{c}' for c in STRING_COLUMNS]
+        width = len(CARD_FIELDS)
+        
+        with self._connection() as conn:
             cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT datas.id, texts.name, datas.type, datas.atk, datas.def
+            cursor.arraysize = chunk_size
+            cursor.execute(f"""
+                SELECT {', '.join(columns)}
                 FROM datas
                 LEFT JOIN texts ON datas.id = texts.id
-                WHERE datas.id >= ? AND datas.id <= ?
+                WHERE 1{where}
                 ORDER BY datas.id
-            """, (min_id, max_id))
+            """, params)
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                for row in rows:
+                    if strings:
+                        yield Card(row[:width], row[width:])
+                    else:
+                        yield Card(row, source=self)
+    
+    def get_card_strings(self, card_id: int) -> Tuple[Optional[str], ...]:
+        """
+        Get the str1..str16 hint texts of a card
+        
+        Args:
+            card_id: Card ID
+        
+        Returns:
+            Tuple of 16 strings (None for unset values or a missing card)
+        """
+        with self._connection() as conn:
+            row = conn.execute(f"SELECT {', '.join(STRING_COLUMNS)} FROM texts WHERE id = ?",
+                               (card_id,)).fetchone()
+        return tuple(row) if row else (None,) * len(STRING_COLUMNS)
+    
+    def ensure_search_index(self, rebuild: bool = False) -> bool:
+        """
+        Create the full-text search index if it is missing (migration step)
+        
+        The index is an FTS5 table over texts.name and texts.desc, kept in
+        sync by triggers on texts. Creating it indexes every existing card.
+        
+        Args:
+            rebuild: Rebuild the index contents even if it already exists
+        
+        Returns:
+            True if the index is available, False if FTS5 is unsupported
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (SEARCH_TABLE,))
+                existed = cursor.fetchone() is not None
+                for statement in SEARCH_SCHEMA:
+                    cursor.execute(statement)
+                if rebuild or not existed:
+                    cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+                conn.commit()
+            self._search_ready = True
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"Warning: Full-text search unavailable ({e})")
+            return False
+    
+    @staticmethod
+    def _fts_query(text: str) -> str:
+        """Turn free text into an FTS5 query matching every word (last one as a prefix)"""
+        words = re.findall(r"\w+", text, re.UNICODE)
+        if not words:
+            return ''
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += '*'
+        return ' '.join(terms)
+    
+    @staticmethod
+    def _filter_clause(filters: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        """
+        Build a WHERE fragment over the datas table from simple filters
+        
+        Supported keys:
+            type: card must have all of the given TYPE_* bits
+            type_any: card must have at least one of the given TYPE_* bits
+            race, attribute, ot: card must have one of the given bits
+                (a single bit is matched by equality so the index is used)
+            atk, def, level, id: exact value; with a _min/_max suffix,
+                inclusive range (level ignores the Pendulum scale bytes)
+            min_id, max_id: aliases of id_min/id_max
+        
+        Raises:
+            ValueError: For unknown keys or non-integer values
+        """
+        clauses = []
+        params = []
+        for key, value in (filters or {}).items():
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"Filter {key} must be an integer, got {value!r}")
+            
+            if key == 'type':
+                clauses.append("(datas.type & ?) = ?")
+                params.extend([value, value])
+                continue
+            if key == 'type_any':
+                clauses.append("(datas.type & ?) != 0")
+            elif key in ('race', 'attribute', 'ot'):
+                if value & (value - 1) == 0:
+                    clauses.append(f"datas.{key} = ?")
+                else:
+                    clauses.append(f"(datas.{key} & ?) != 0")
+            elif key in ('min_id', 'max_id'):
+                clauses.append("datas.id >= ?" if key == 'min_id' else "datas.id <= ?")
+            else:
+                column, _, bound = key.rpartition('_')
+                if key in RANGE_COLUMNS:
+                    clauses.append(f"{RANGE_COLUMNS[key]} = ?")
+                elif column in RANGE_COLUMNS and bound in ('min', 'max'):
+                    operator = '>=' if bound == 'min' else '<='
+                    clauses.append(f"{RANGE_COLUMNS[column]} {operator} ?")
+                else:
+                    raise ValueError(f"Unknown filter: {key}")
+            params.append(value)
+        return ''.join(f" AND {clause}" for clause in clauses), params
+    
+    def ensure_query_indexes(self) -> bool:
+        """
+        Create the secondary indexes used by find_cards (migration step)
+        
+        Safe to run repeatedly; existing indexes are left untouched.
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                for statement in QUERY_INDEXES:
+                    cursor.execute(statement)
+                cursor.execute("ANALYZE datas")
+                conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"✗ Database error: {e}")
+            return False
+    
+    def migrate(self) -> bool:
+        """
+        Bring an existing database up to the current schema
+        
+        Adds the query indexes, the full-text search index, the ID allocator
+        tables and the change log. Databases created with create_blank_database
+        already have them.
+        
+        Returns:
+            True if every step succeeded, False otherwise
+        """
+        indexed = self.ensure_query_indexes()
+        searchable = self.ensure_search_index()
+        allocator = self.ensure_id_allocator()
+        logged = self.ensure_change_log()
+        return indexed and searchable and allocator and logged
+    
+    def ensure_change_log(self) -> bool:
+        """
+        Create the change log table and triggers (migration step)
+        
+        Writes are only logged once this has run (databases created with
+        create_blank_database have the log already). Cards written before
+        the log existed are not in it, so ship one full database after
+        creating the log and deltas from then on.
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        if self._change_log_ready:
+            return True
+        try:
+            with self._write_transaction() as cursor:
+                for statement in CHANGE_LOG_SCHEMA:
+                    cursor.execute(statement)
+            self._change_log_ready = True
+            return True
+        except sqlite3.Error as e:
+            print(f"✗ Database error: {e}")
+            return False
+    
+    @staticmethod
+    def _log_version(cursor) -> Optional[int]:
+        """Latest change log version (0 if empty), or None if there is no log"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                       (CHANGE_LOG_TABLE,))
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute(f"SELECT IFNULL(MAX(version), 0) FROM {CHANGE_LOG_TABLE}")
+        return cursor.fetchone()[0]
+    
+    def change_log_version(self) -> int:
+        """
+        Current change log version of the database
+        
+        A client holding a copy of this file passes this number as
+        export_delta's since to get the changes made after the copy.
+        
+        Returns:
+            Latest version (0 if nothing has been logged yet)
+        """
+        with self._connection() as conn:
+            return self._log_version(conn.cursor()) or 0
+    
+    def export_delta(self, since: int, output_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Write the cards changed after a change log version to a patch .cdb
+        
+        The patch has the usual datas and texts tables (holding the full rows
+        of added and changed cards), deleted_cards with the IDs to remove,
+        the matching card_changes rows and a one-row delta_info table with
+        from_version and to_version. It is written to a temporary file and
+        renamed into place, so a failed export never leaves a partial patch.
+        
+        Args:
+            since: Version the client already has (see change_log_version)
+            output_path: Path of the patch database to create
+        
+        Returns:
+            Dictionary with 'from_version', 'to_version', 'changed' and
+            'deleted' counts, or None if the export failed
+        
+        Raises:
+            ValueError: If since is negative
+        """
+        if since < 0:
+            raise ValueError("since must be a non-negative version")
+        temp_path = output_path + '.tmp'
+        
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                # One read transaction so the rows match to_version
+                started = not conn.in_transaction
+                if started:
+                    cursor.execute("BEGIN")
+                try:
+                    version = self._log_version(cursor)
+                    if version is None:
+                        print(f"Error: {self.db_path} has no change log (run 'card_creator.py migrate')")
+                        return None
+                    if since > version:
+                        print(f"Error: Version {since} is newer than the database (version {version})")
+                        return None
+                    result = self._write_delta(cursor, since, version, temp_path)
+                finally:
+                    if started:
+                        conn.rollback()
+            os.replace(temp_path, output_path)
+        except (sqlite3.Error, OSError) as e:
+            print(f"✗ Could not export delta: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        
+        print(f"✓ Wrote {output_path}: {result['changed']} changed, {result['deleted']} deleted "
+              f"(version {since} → {version})")
+        return result
+    
+    def _write_delta(self, source, since: int, version: int, path: str) -> Dict[str, Any]:
+        """Copy the changes after since from the source cursor into a new patch database"""
+        if os.path.exists(path):
+            os.remove(path)
+        patch = sqlite3.connect(path)
+        try:
+            cursor = patch.cursor()
+            cursor.execute("CREATE TABLE datas (id INTEGER PRIMARY KEY, " +
+                           ', '.join(f"{column} INTEGER" for column in DATAS_COLUMNS[1:]) + ")")
+            cursor.execute("CREATE TABLE texts (id INTEGER PRIMARY KEY, " +
+                           ', '.join(f"{column} TEXT" for column in TEXTS_COLUMNS[1:]) + ")")
+            cursor.execute(CHANGE_LOG_SCHEMA[0])
+            for statement in DELTA_SCHEMA:
+                cursor.execute(statement)
             
-            cards = []
-            for row in cursor.fetchall():
-                cards.append({
-                    'id': row[0],
-                    'name': row[1],
-                    'type': row[2],
-                    'atk': row[3],
-                    'def': row[4]
-                })
+            # card_changes.version is indexed, so only the changed rows are read
+            changed = f"FROM {CHANGE_LOG_TABLE} c JOIN datas d ON d.id = c.id"
+            source.execute(f"SELECT {', '.join('d.' + c for c in DATAS_COLUMNS)} {changed} "
+                           f"WHERE c.version > ?", (since,))
+            cursor.executemany(SQL_INSERT_DATAS, source)
+            source.execute(f"SELECT {', '.join('t.' + c for c in TEXTS_COLUMNS)} {changed} "
+                           f"JOIN texts t ON t.id = c.id WHERE c.version > ?", (since,))
+            cursor.executemany(SQL_INSERT_TEXTS, source)
+            source.execute(f"SELECT c.id FROM {CHANGE_LOG_TABLE} c WHERE c.version > ? "
+                           f"AND NOT EXISTS (SELECT 1 FROM datas d WHERE d.id = c.id)", (since,))
+            cursor.executemany("INSERT INTO deleted_cards (id) VALUES (?)", source)
+            source.execute(f"SELECT id, op, changed_at, version FROM {CHANGE_LOG_TABLE} "
+                           f"WHERE version > ?", (since,))
+            cursor.executemany(f"INSERT INTO {CHANGE_LOG_TABLE} (id, op, changed_at, version) "
+                               f"VALUES (?, ?, ?, ?)", source)
+            cursor.execute("INSERT INTO delta_info (from_version, to_version, created_at, source) "
+                           "VALUES (?, ?, datetime('now'), ?)",
+                           (since, version, os.path.basename(self.db_path)))
             
-            conn.close()
-            return cards
+            cursor.execute("SELECT COUNT(*) FROM datas")
+            changed_count = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM deleted_cards")
+            deleted_count = cursor.fetchone()[0]
+            patch.commit()
+        finally:
+            patch.close()
+        return {'from_version': since, 'to_version': version,
+                'changed': changed_count, 'deleted': deleted_count}
+    
+    def apply_delta(self, patch_path: str) -> bool:
+        """
+        Apply a patch written by export_delta to this database
+        
+        The database must be at the patch's from_version or later (a patch
+        can skip versions the database already has). Changed cards are
+        replaced whole, deleted cards are removed and the change log takes
+        the patch's versions, so the next delta can start from to_version.
+        
+        Args:
+            patch_path: Path of the patch .cdb
+        
+        Returns:
+            True if the database is now at the patch's to_version or later
+        """
+        try:
+            patch = sqlite3.connect(Path(patch_path).resolve().as_uri() + '?mode=ro', uri=True)
+            try:
+                from_version, to_version = patch.execute(
+                    "SELECT from_version, to_version FROM delta_info").fetchone()
+                datas_rows = patch.execute(f"SELECT {', '.join(DATAS_COLUMNS)} FROM datas").fetchall()
+                texts_rows = patch.execute(f"SELECT {', '.join(TEXTS_COLUMNS)} FROM texts").fetchall()
+                deleted = patch.execute("SELECT id FROM deleted_cards").fetchall()
+                changes = patch.execute(
+                    f"SELECT id, op, changed_at, version FROM {CHANGE_LOG_TABLE}").fetchall()
+            finally:
+                patch.close()
+        except (sqlite3.Error, TypeError) as e:
+            print(f"✗ Not a delta database: {patch_path} ({e})")
+            return False
+        
+        try:
+            with self._write_transaction() as cursor:
+                version = self._log_version(cursor)
+                if version is None:
+                    print(f"Error: {self.db_path} has no change log (run 'card_creator.py migrate')")
+                    return False
+                if version < from_version:
+                    print(f"Error: Database is at version {version}, "
+                          f"the delta starts at version {from_version}")
+                    return False
+                if version >= to_version:
+                    print(f"✓ Database already at version {version}")
+                    return True
+                cursor.executemany(SQL_DELETE_DATAS, deleted)
+                cursor.executemany(SQL_DELETE_TEXTS, deleted)
+                cursor.executemany(SQL_REPLACE_DATAS, datas_rows)
+                cursor.executemany(SQL_REPLACE_TEXTS, texts_rows)
+                # Replace the versions the triggers just assigned with the source's
+                cursor.executemany(f"INSERT OR REPLACE INTO {CHANGE_LOG_TABLE} "
+                                   f"(id, op, changed_at, version) VALUES (?, ?, ?, ?)", changes)
+            self.invalidate_cache()
+        except sqlite3.Error as e:
+            print(f"✗ Database error: {e}")
+            return False
+        
+        print(f"✓ Applied delta: {len(datas_rows)} changed, {len(deleted)} deleted "
+              f"(version {from_version} → {to_version})")
+        return True
+    
+    def finalize_for_release(self, vacuum: bool = False) -> bool:
+        """
+        Make the database file self-contained before shipping it to clients
+        
+        Checkpoints the WAL into the main file and switches back to the
+        rollback journal, so the .cdb works without its -wal/-shm companions
+        (and from read-only locations). Run it with no other writers active;
+        connections opened afterwards with the 'concurrent' profile switch
+        the file to WAL again. Other DatabaseManagers of the same file in
+        this process have their cache watcher connections closed; one with
+        an open session makes the call fail instead.
+        
+        Args:
+            vacuum: Also rebuild the file to drop free pages
+        
+        Returns:
+            True if the file is checkpointed and back in DELETE journal mode
+        """
+        if self.in_session:
+            print("Error: Close the session before finalizing the database")
+            return False
+        # Other managers of this file in the process keep connections that
+        # would make the checkpoint and the journal mode switch fail as locked
+        others = [manager for manager in list(_OPEN_MANAGERS)
+                  if manager is not self and _same_file(manager.db_path, self.db_path)]
+        if any(manager.in_session for manager in others):
+            print(f"Error: Another DatabaseManager has a session open on {self.db_path}; "
+                  f"close it before finalizing the database")
+            return False
+        for manager in others:
+            manager.close_cache()
+        self.close_cache()
+        
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=(self.profile['busy_timeout'] or 0) / 1000)
+            try:
+                busy, _, _ = self._retry_locked(
+                    lambda: conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone())
+                mode = self._retry_locked(
+                    lambda: conn.execute("PRAGMA journal_mode = DELETE").fetchone()[0])
+                if vacuum:
+                    self._retry_locked(lambda: conn.execute("VACUUM"))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            if 'locked' in str(e):
+                print(f"✗ Could not finalize {self.db_path}: another connection is still open "
+                      f"(EDOPro, another process or a plain sqlite3 connection)")
+            else:
+                print(f"✗ Database error: {e}")
+            return False
+        
+        for manager in [self] + others:
+            manager._journal_ready = False
+        if busy or mode.upper() != 'DELETE':
+            print(f"✗ Could not finalize {self.db_path}: another connection is still open")
+            return False
+        print(f"✓ Database ready to ship: {self.db_path}")
+        return True
+    
+    def find_cards(self, order_by: str = 'id', descending: bool = False,
+                   limit: Optional[int] = FIND_PAGE_SIZE, cursor: Optional[Tuple[Any, int]] = None,
+                   **filters) -> Dict[str, Any]:
+        """
+        Find cards by type, race, attribute and stats
+        
+        Results are paginated with a keyset cursor: pass the returned
+        next_cursor back in to get the following page. Unlike OFFSET, each page
+        costs the same no matter how deep it is.
+        
+        Example:
+            db.find_cards(type=TYPE_MONSTER, attribute=ATTRIBUTE_DARK,
+                          atk_min=2000, level_max=4, order_by='atk', descending=True)
+        
+        Args:
+            order_by: One of id, name, atk, def, level
+            descending: Sort in descending order
+            limit: Maximum number of cards per page (None for all)
+            cursor: next_cursor from the previous page
+            **filters: See _filter_clause
+        
+        Returns:
+            Dictionary with 'cards' (list of card dictionaries, same keys as
+            get_card) and 'next_cursor' (None on the last page)
+        
+        Raises:
+            ValueError: For unknown filters or order_by columns
+        """
+        # Rows without texts have no name to page on, so name ordering skips them
+        join = 'JOIN' if order_by == 'name' else 'LEFT JOIN'
+        query, params = self._find_query(f"datas {join} texts ON datas.id = texts.id", 'texts',
+                                         order_by, descending, limit, cursor, filters)
+        with self._connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return self._find_page(rows, limit)
+    
+    @classmethod
+    def _find_query(cls, source: str, texts_alias: str, order_by: str, descending: bool,
+                    limit: Optional[int], cursor: Optional[Tuple[Any, int]],
+                    filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """
+        Build a find_cards query
+        
+        Args:
+            source: FROM clause exposing the datas columns under the alias datas
+            texts_alias: Alias that provides the name and desc columns
+            (remaining arguments as in find_cards)
+        
+        Returns:
+            (query, params); each row is CARD_FIELDS followed by the sort key
+        """
+        if order_by not in ORDER_COLUMNS:
+            raise ValueError(f"Cannot order by {order_by!r}; "
+                             f"choose from {', '.join(ORDER_COLUMNS)}")
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be a positive integer or None")
+        
+        where, params = cls._filter_clause(filters)
+        sort_key = ORDER_COLUMNS[order_by].replace('texts.', f'{texts_alias}.')
+        direction = 'DESC' if descending else 'ASC'
+        
+        if cursor is not None:
+            last_value, last_id = cursor
+            if order_by == 'id':
+                where += f" AND datas.id {'<' if descending else '>'} ?"
+                params.append(last_id)
+            else:
+                where += f" AND ({sort_key}, datas.id) {'<' if descending else '>'} (?, ?)"
+                params.extend([last_value, last_id])
+        
+        order = f"datas.id {direction}" if order_by == 'id' else \
+            f"{sort_key} {direction}, datas.id {direction}"
+        query = f"""
+            SELECT {', '.join(f'datas.{c}' for c in DATAS_COLUMNS)},
+                   {texts_alias}.name, {texts_alias}.desc, {sort_key}
+            FROM {source}
+            WHERE 1{where}
+            ORDER BY {order}
+        """
+        if limit is not None:
+            # One extra row tells whether another page follows
+            query += " LIMIT ?"
+            params.append(limit + 1)
+        return query, params
+    
+    @staticmethod
+    def _find_page(rows: List[tuple], limit: Optional[int]) -> Dict[str, Any]:
+        """Turn the rows of a _find_query into a find_cards result"""
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][len(CARD_FIELDS)], rows[-1][0])
+        
+        return {
+            'cards': [dict(zip(CARD_FIELDS, row)) for row in rows],
+            'next_cursor': next_cursor,
+        }
+    
+    def search(self, text: str, filters: Optional[Dict[str, Any]] = None, limit: int = 20,
+               name_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        Search card names and effect text
+        
+        Results are ranked with BM25 (name matches weigh more) and include a
+        snippet with the matched words in [brackets]. Searching never changes
+        the database: without the full-text index (added by migrate and
+        create_blank_database) a LIKE scan is used instead.
+        
+        Args:
+            text: Words to search for (all must match; the last may be a prefix)
+            filters: Optional datas filters (same keys as find_cards)
+            limit: Maximum number of results
+            name_only: Only match against card names
+        
+        Returns:
+            List of dictionaries with id, name, snippet and rank
+        """
+        query = self._fts_query(text)
+        if not query:
+            return []
+        if name_only:
+            query = f"name : ({query})"
+        
+        try:
+            where, params = self._filter_clause(filters)
+            if not self._search_ready:
+                with self._connection() as conn:
+                    self._search_ready = conn.execute(
+                        "SELECT 1 FROM sqlite_master WHERE name = ?", (SEARCH_TABLE,)).fetchone() is not None
+                if not self._search_ready:
+                    return self._search_like(text, where, params, limit, name_only)
+            
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT texts.id, texts.name,
+                           snippet({SEARCH_TABLE}, -1, '[', ']', '...', 12),
+                           bm25({SEARCH_TABLE}, ?, ?) AS rank
+                    FROM {SEARCH_TABLE}
+                    JOIN texts ON texts.id = {SEARCH_TABLE}.rowid
+                    JOIN datas ON datas.id = texts.id
+                    WHERE {SEARCH_TABLE} MATCH ?{where}
+                    ORDER BY rank
+                    LIMIT ?
+                """, [SEARCH_NAME_WEIGHT, SEARCH_DESC_WEIGHT, query] + params + [limit])
+                rows = cursor.fetchall()
             
+            return [{'id': row[0], 'name': row[1], 'snippet': row[2], 'rank': row[3]}
+                    for row in rows]
         except Exception as e:
-            print(f"Error listing cards: {e}")
+            print(f"Error searching cards: {e}")
             return []
     
+    def _search_like(self, text: str, where: str, params: List[Any], limit: int,
+                     name_only: bool) -> List[Dict[str, Any]]:
+        """Fallback search with LIKE for databases without the full-text index"""
+        words = re.findall(r"\w+", text, re.UNICODE)
+        columns = ['texts.name'] if name_only else ['texts.name', 'texts.desc']
+        clauses = []
+        like_params = []
+        for word in words:
+            clauses.append('(' + ' OR '.join(f"{column} LIKE ?" for column in columns) + ')')
+            like_params.extend([f"%{word}%"] * len(columns))
+        
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT texts.id, texts.name, texts.desc
+                FROM texts
+                JOIN datas ON datas.id = texts.id
+                WHERE {' AND '.join(clauses)}{where}
+                ORDER BY texts.id
+                LIMIT ?
+            """, like_params + params + [limit])
+            rows = cursor.fetchall()
+        
+        return [{'id': row[0], 'name': row[1], 'snippet': (row[2] or '')[:80], 'rank': 0.0}
+                for row in rows]
+    
     def get_next_available_id(self, start_id: int = 10000100) -> int:
         """
         Get the next available card ID starting from the specified ID
         
+        This only peeks at MAX(id) and reserves nothing; use allocate_ids when
+        several creators may run at once or gaps should be reused.
+        
         Args:
             start_id: Starting ID to search from (default: 10000100)
         
@@ -344,16 +1844,15 @@ class DatabaseManager:
             Next available card ID
         """
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            # Find the highest ID >= start_id
-            cursor.execute("""
-                SELECT MAX(id) FROM datas WHERE id >= ?
-            """, (start_id,))
-            
-            result = cursor.fetchone()
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                # Find the highest ID >= start_id
+                cursor.execute("""
+                    SELECT MAX(id) FROM datas WHERE id >= ?
+                """, (start_id,))
+                
+                result = cursor.fetchone()
             
             if result[0] is None:
                 return start_id
@@ -363,6 +1862,347 @@ class DatabaseManager:
         except Exception as e:
             print(f"Error finding next available ID: {e}")
             return start_id
+    
+    def ensure_id_allocator(self) -> bool:
+        """
+        Create the ID allocator tables and the default range (migration step)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        if self._allocator_ready:
+            return True
+        try:
+            with self._write_transaction() as cursor:
+                cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'id_free'")
+                existing = cursor.fetchone() is not None
+                cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN "
+                               f"({', '.join('?' * len(ALLOCATOR_TRIGGERS))})", ALLOCATOR_TRIGGERS)
+                stored = dict(cursor.fetchall())
+                # Free lists of allocators without id_free_ai still hold IDs taken since
+                upgrade = existing and 'id_free_ai' not in stored
+                # sqlite_master keeps the statement without IF NOT EXISTS
+                current = {statement.split()[5]: statement.replace(
+                               'CREATE TRIGGER IF NOT EXISTS', 'CREATE TRIGGER', 1)
+                           for statement in ID_ALLOCATOR_SCHEMA if statement.startswith('CREATE TRIGGER')}
+                for trigger, sql in stored.items():
+                    if sql != current[trigger]:
+                        cursor.execute(f"DROP TRIGGER {trigger}")
+                for statement in ID_ALLOCATOR_SCHEMA:
+                    cursor.execute(statement)
+                if upgrade:
+                    self._scrub_free_lists(cursor)
+                cursor.execute("SELECT first_id, last_id FROM id_ranges WHERE name = ?",
+                               (DEFAULT_ID_RANGE,))
+                bounds = cursor.fetchone()
+                if bounds is None:
+                    self._insert_id_range(cursor, DEFAULT_ID_RANGE, *DEFAULT_ID_RANGE_BOUNDS, None)
+                elif tuple(bounds) == LEGACY_ID_RANGE_BOUNDS:
+                    self._shrink_default_range(cursor)
+            self._allocator_ready = True
+            return True
+        except sqlite3.Error as e:
+            print(f"✗ Database error: {e}")
+            return False
+    
+    @staticmethod
+    def _scrub_free_lists(cursor):
+        """Merge every free list and drop IDs that belong to existing cards"""
+        cursor.execute("SELECT range_name, first_id, last_id FROM id_free")
+        by_range = {}
+        for name, first, last in cursor.fetchall():
+            by_range.setdefault(name, []).append((first, last))
+        for name, intervals in by_range.items():
+            free = _merge_intervals(intervals)
+            used = []
+            for first, last in free:
+                cursor.execute("SELECT id FROM datas WHERE id BETWEEN ? AND ?", (first, last))
+                used.extend(row[0] for row in cursor.fetchall())
+            free = _subtract_intervals(free, _id_runs(used))
+            cursor.execute("DELETE FROM id_free WHERE range_name = ?", (name,))
+            cursor.executemany("INSERT INTO id_free (range_name, first_id, last_id) VALUES (?, ?, ?)",
+                               [(name, first, last) for first, last in free])
+    
+    @staticmethod
+    def _shrink_default_range(cursor):
+        """Move the start of a legacy default range past the system/test card IDs"""
+        first_id = DEFAULT_ID_RANGE_BOUNDS[0]
+        cursor.execute("""
+            SELECT name FROM id_ranges
+            WHERE name != ? AND first_id < ? AND last_id >= ?
+        """, (DEFAULT_ID_RANGE, first_id, first_id))
+        crossing = cursor.fetchone()
+        if crossing is not None:
+            print(f"Warning: ID range '{crossing[0]}' spans {first_id}; "
+                  f"'{DEFAULT_ID_RANGE}' still starts at {LEGACY_ID_RANGE_BOUNDS[0]}")
+            return
+        cursor.execute("SELECT first_id, last_id FROM id_free WHERE range_name = ?", (DEFAULT_ID_RANGE,))
+        free = _subtract_intervals(cursor.fetchall(), [(LEGACY_ID_RANGE_BOUNDS[0], first_id - 1)])
+        cursor.execute("DELETE FROM id_free WHERE range_name = ?", (DEFAULT_ID_RANGE,))
+        cursor.executemany("INSERT INTO id_free (range_name, first_id, last_id) VALUES (?, ?, ?)",
+                           [(DEFAULT_ID_RANGE, first, last) for first, last in free])
+        cursor.execute("UPDATE id_ranges SET first_id = ? WHERE name = ?", (first_id, DEFAULT_ID_RANGE))
+    
+    @staticmethod
+    def _range_gaps(cursor, name: str, first_id: int, last_id: int) -> List[Tuple[int, int]]:
+        """Free intervals of a range: IDs not used by a card or a nested range"""
+        cursor.execute("SELECT id FROM datas WHERE id BETWEEN ? AND ? ORDER BY id",
+                       (first_id, last_id))
+        occupied = _id_runs(row[0] for row in cursor.fetchall())
+        cursor.execute("""
+            SELECT first_id, last_id FROM id_ranges
+            WHERE name != ? AND first_id >= ? AND last_id <= ?
+        """, (name, first_id, last_id))
+        occupied.extend(cursor.fetchall())
+        return _subtract_intervals([(first_id, last_id)], occupied)
+    
+    def _insert_id_range(self, cursor, name: str, first_id: int, last_id: int,
+                         owner: Optional[str]):
+        """Record a new range, fill its free list and carve it out of enclosing ranges"""
+        cursor.execute("INSERT INTO id_ranges (name, first_id, last_id, owner) VALUES (?, ?, ?, ?)",
+                       (name, first_id, last_id, owner))
+        cursor.executemany("INSERT INTO id_free (range_name, first_id, last_id) VALUES (?, ?, ?)",
+                           [(name, first, last)
+                            for first, last in self._range_gaps(cursor, name, first_id, last_id)])
+        
+        cursor.execute("""
+            SELECT id_free.range_name, id_free.first_id, id_free.last_id
+            FROM id_free JOIN id_ranges ON id_ranges.name = id_free.range_name
+            WHERE id_ranges.name != ? AND id_ranges.first_id <= ? AND id_ranges.last_id >= ?
+              AND id_free.first_id <= ? AND id_free.last_id >= ?
+        """, (name, first_id, last_id, last_id, first_id))
+        for parent, first, last in cursor.fetchall():
+            cursor.execute("DELETE FROM id_free WHERE range_name = ? AND first_id = ?",
+                           (parent, first))
+            cursor.executemany("INSERT INTO id_free (range_name, first_id, last_id) VALUES (?, ?, ?)",
+                               [(parent, a, b) for a, b in
+                                _subtract_intervals([(first, last)], [(first_id, last_id)])])
+    
+    def reserve_id_range(self, name: str, first_id: int, last_id: int,
+                         owner: Optional[str] = None) -> bool:
+        """
+        Reserve a named ID range for a set or author
+        
+        A range may sit inside another one (e.g. a set inside the default
+        'custom' range) but may not partially overlap it. IDs in the new range
+        are no longer handed out from the enclosing range.
+        
+        Args:
+            name: Range name passed to allocate_ids
+            first_id: First ID of the range
+            last_id: Last ID of the range (inclusive)
+            owner: Optional author or set description
+        
+        Returns:
+            True if the range exists with these bounds, False otherwise
+        """
+        if first_id > last_id:
+            print(f"Error: Invalid ID range {first_id}-{last_id}")
+            return False
+        if not self.ensure_id_allocator():
+            return False
+        
+        try:
+            with self._write_transaction() as cursor:
+                cursor.execute("SELECT first_id, last_id FROM id_ranges WHERE name = ?", (name,))
+                existing = cursor.fetchone()
+                if existing is not None:
+                    if tuple(existing) == (first_id, last_id):
+                        return True
+                    print(f"Error: ID range '{name}' already exists "
+                          f"({existing[0]}-{existing[1]})")
+                    return False
+                
+                cursor.execute("""
+                    SELECT name, first_id, last_id FROM id_ranges
+                    WHERE first_id <= ? AND last_id >= ?
+                      AND NOT (first_id <= ? AND last_id >= ?)
+                      AND NOT (first_id >= ? AND last_id <= ?)
+                """, (last_id, first_id, first_id, last_id, first_id, last_id))
+                overlap = cursor.fetchone()
+                if overlap is not None:
+                    print(f"Error: ID range {first_id}-{last_id} overlaps "
+                          f"'{overlap[0]}' ({overlap[1]}-{overlap[2]})")
+                    return False
+                
+                self._insert_id_range(cursor, name, first_id, last_id, owner)
+            
+            print(f"✓ Reserved ID range '{name}': {first_id}-{last_id}")
+            return True
+        except sqlite3.Error as e:
+            print(f"✗ Database error: {e}")
+            return False
+    
+    def list_id_ranges(self) -> List[Dict[str, Any]]:
+        """
+        List reserved ID ranges
+        
+        Returns:
+            List of dictionaries with name, first_id, last_id, owner and free
+            (number of IDs still available), ordered by first_id
+        """
+        if not self.ensure_id_allocator():
+            return []
+        with self._connection() as conn:
+            rows = conn.execute("""
+                SELECT name, first_id, last_id, owner FROM id_ranges
+                ORDER BY first_id, last_id DESC
+            """).fetchall()
+            free = {}
+            for name, first, last in conn.execute("SELECT range_name, first_id, last_id FROM id_free"):
+                free.setdefault(name, []).append((first, last))
+        # Adjacent single IDs returned by deletes are only merged on the next
+        # allocation, so count merged intervals
+        return [{'name': row[0], 'first_id': row[1], 'last_id': row[2], 'owner': row[3],
+                 'free': sum(last - first + 1 for first, last in _merge_intervals(free.get(row[0], [])))}
+                for row in rows]
+    
+    def allocate_ids(self, count: int = 1, range_name: str = DEFAULT_ID_RANGE,
+                     contiguous: bool = False, exclude: Iterable[int] = ()) -> List[int]:
+        """
+        Allocate unused card IDs from a named range
+        
+        The free list is read and updated in one BEGIN IMMEDIATE transaction,
+        so concurrent creators never receive the same ID. Gaps left by deleted
+        cards are reused first. IDs taken by cards written without the
+        allocator, or by another database when a collision_checker is set,
+        are detected and dropped from the free list.
+        
+        Args:
+            count: Number of IDs to allocate
+            range_name: Reserved range to allocate from
+            contiguous: Require a single run of consecutive IDs
+            exclude: IDs not to hand out although no card uses them yet
+                (e.g. explicit IDs of a batch that is about to be written)
+        
+        Returns:
+            Sorted list of allocated IDs (empty if the range cannot satisfy the request)
+        """
+        if count < 1:
+            raise ValueError("count must be a positive integer")
+        if not self.ensure_id_allocator():
+            return []
+        excluded = sorted(set(exclude))
+        
+        try:
+            with self._write_transaction() as cursor:
+                cursor.execute("SELECT 1 FROM id_ranges WHERE name = ?", (range_name,))
+                if cursor.fetchone() is None:
+                    print(f"✗ Unknown ID range: {range_name}")
+                    return []
+                
+                cursor.execute("SELECT first_id, last_id FROM id_free WHERE range_name = ?",
+                               (range_name,))
+                free = _merge_intervals(cursor.fetchall())
+                # Excluded IDs are only skipped by this call; they stay free
+                available = _subtract_intervals(free, _id_runs(excluded)) if excluded else free
+                while True:
+                    blocks = _take_blocks(available, count, contiguous)
+                    if blocks is None:
+                        print(f"✗ ID range '{range_name}' has fewer than {count} "
+                              f"{'consecutive ' if contiguous else ''}free IDs")
+                        return []
+                    used = []
+                    for first, last in blocks:
+                        cursor.execute("SELECT id FROM datas WHERE id BETWEEN ? AND ?",
+                                       (first, last))
+                        used.extend(row[0] for row in cursor.fetchall())
+                        if self.collision_checker is not None:
+                            used.extend(self.collision_checker.taken_in_range(first, last))
+                    if not used:
+                        break
+                    free = _subtract_intervals(free, _id_runs(used))
+                    available = _subtract_intervals(available, _id_runs(used))
+                
+                cursor.execute("DELETE FROM id_free WHERE range_name = ?", (range_name,))
+                cursor.executemany("INSERT INTO id_free (range_name, first_id, last_id) VALUES (?, ?, ?)",
+                                   [(range_name, first, last)
+                                    for first, last in _subtract_intervals(free, blocks)])
+            
+            return [card_id for first, last in blocks for card_id in range(first, last + 1)]
+        except sqlite3.Error as e:
+            print(f"✗ Database error: {e}")
+            return []
+    
+    def release_ids(self, ids: Iterable[int]) -> int:
+        """
+        Return allocated but unused IDs to their ranges
+        
+        IDs that are in use by a card or outside every range are ignored.
+        
+        Args:
+            ids: Card IDs to release
+        
+        Returns:
+            Number of IDs released
+        """
+        ids = sorted(set(ids))
+        if not ids or not self.ensure_id_allocator():
+            return 0
+        
+        try:
+            with self._write_transaction() as cursor:
+                cursor.execute("SELECT name, first_id, last_id FROM id_ranges "
+                               "ORDER BY last_id - first_id")
+                ranges = cursor.fetchall()
+                used = set()
+                for first, last in _id_runs(ids):
+                    cursor.execute("SELECT id FROM datas WHERE id BETWEEN ? AND ?", (first, last))
+                    used.update(row[0] for row in cursor.fetchall())
+                
+                by_range = {}
+                for card_id in ids:
+                    if card_id in used:
+                        continue
+                    for name, first_id, last_id in ranges:
+                        if first_id <= card_id <= last_id:
+                            by_range.setdefault(name, []).append(card_id)
+                            break
+                
+                for name, range_ids in by_range.items():
+                    cursor.execute("SELECT first_id, last_id FROM id_free WHERE range_name = ?",
+                                   (name,))
+                    free = _merge_intervals(cursor.fetchall() + _id_runs(range_ids))
+                    cursor.execute("DELETE FROM id_free WHERE range_name = ?", (name,))
+                    cursor.executemany("INSERT INTO id_free (range_name, first_id, last_id) VALUES (?, ?, ?)",
+                                       [(name, first, last) for first, last in free])
+            
+            return sum(len(range_ids) for range_ids in by_range.values())
+        except sqlite3.Error as e:
+            print(f"✗ Database error: {e}")
+            return 0
+    
+    def rebuild_id_range(self, name: str) -> bool:
+        """
+        Recompute a range's free list from the cards in the database
+        
+        Use this after bulk edits made with other tools. IDs handed out by
+        allocate_ids but not yet written become free again, so run it while
+        no creation job is in progress.
+        
+        Args:
+            name: Range to rebuild
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.ensure_id_allocator():
+            return False
+        try:
+            with self._write_transaction() as cursor:
+                cursor.execute("SELECT first_id, last_id FROM id_ranges WHERE name = ?", (name,))
+                bounds = cursor.fetchone()
+                if bounds is None:
+                    print(f"✗ Unknown ID range: {name}")
+                    return False
+                cursor.execute("DELETE FROM id_free WHERE range_name = ?", (name,))
+                cursor.executemany("INSERT INTO id_free (range_name, first_id, last_id) VALUES (?, ?, ?)",
+                                   [(name, first, last)
+                                    for first, last in self._range_gaps(cursor, name, *bounds)])
+            return True
+        except sqlite3.Error as e:
+            print(f"✗ Database error: {e}")
+            return False
 
 
 def create_blank_database(db_path: str) -> bool:
@@ -426,6 +2266,25 @@ def create_blank_database(db_path: str) -> bool:
             )
         """)
         
+        # Indexes for find_cards
+        for statement in QUERY_INDEXES:
+            cursor.execute(statement)
+        
+        # Card ID allocator (free ID ranges, refilled when cards are deleted)
+        for statement in ID_ALLOCATOR_SCHEMA:
+            cursor.execute(statement)
+        
+        # Change log for delta exports
+        for statement in CHANGE_LOG_SCHEMA:
+            cursor.execute(statement)
+        
+        # Full-text search index over names and effect text
+        try:
+            for statement in SEARCH_SCHEMA:
+                cursor.execute(statement)
+        except sqlite3.OperationalError as e:
+            print(f"Warning: Full-text search index not created ({e})")
+        
         conn.commit()
         conn.close()
         
@@ -0,0 +1,396 @@
+"""
+Duplicate Card Name Detection
+Finds cards whose names are the same once case, punctuation and accents are
+ignored, and names that are merely similar (typos, missing words)
+"""
+
+import math
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# Optional side table holding the normalized key of every card name, so a
+# long-lived tool does not renormalize every name on startup. The stored
+# name shows when a row is stale.
+NAME_KEYS_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS card_name_keys (
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        name_key TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_card_name_keys_key ON card_name_keys(name_key)",
+]
+
+# Names are compared as sets of character n-grams (Jaccard similarity)
+NGRAM_SIZE = 3
+NEAR_DUPLICATE_THRESHOLD = 0.7
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """
+    Lowercase a name, strip accents and turn punctuation into single spaces
+    
+    Example: "Blue-Eyes  White Dragón!" -> "blue eyes white dragon"
+    """
+    if not name:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', name.casefold())
+    cleaned = []
+    for char in decomposed:
+        if unicodedata.combining(char):
+            continue
+        cleaned.append(char if char.isalnum() else ' ')
+    return ' '.join(''.join(cleaned).split())
+
+
+def name_key(name: Optional[str]) -> str:
+    """Exact-duplicate key: the normalized name without spaces"""
+    return normalize_name(name).replace(' ', '')
+
+
+def name_ngrams(name: Optional[str], size: int = NGRAM_SIZE) -> Set[str]:
+    """Character n-grams of the normalized name, padded so short names still have some"""
+    text = f" {normalize_name(name)} "
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _jaccard(left: Set[str], right: Set[str]) -> float:
+    """Jaccard similarity of two n-gram sets"""
+    overlap = len(left & right)
+    return overlap / (len(left) + len(right) - overlap)
+
+
+def _prefix_length(size: int, threshold: float) -> int:
+    """
+    Number of rarest n-grams that must be indexed/probed for a name of size n-grams
+    
+    Two names with Jaccard >= threshold share at least ceil(threshold * size)
+    n-grams, so they must share one among the first size - that + 1 in any
+    fixed global order.
+    """
+    return size - math.ceil(threshold * size) + 1
+
+
+class NameIndex:
+    """
+    In-memory index of card names for duplicate and near-duplicate lookups
+    
+    Exact duplicates share a name_key. Near duplicates are found with n-gram
+    blocking: each name is only compared with names sharing one of its rarest
+    n-grams (prefix filtering), and sizes that cannot reach the threshold are
+    skipped, so the work grows with the number of similar pairs rather than
+    with the square of the number of names.
+    """
+    
+    def __init__(self, records: Iterable[Tuple[int, str]] = (),
+                 threshold: float = NEAR_DUPLICATE_THRESHOLD):
+        """
+        Args:
+            records: (card ID, name) pairs
+            threshold: Minimum Jaccard similarity of a near duplicate
+        """
+        self.threshold = threshold
+        self._names = {}
+        self._grams = {}
+        self._keys = {}
+        self._postings = {}
+        for card_id, name in records:
+            self.add(card_id, name)
+    
+    def __len__(self) -> int:
+        return len(self._names)
+    
+    def add(self, card_id: int, name: str):
+        """Index a card name (replacing the card's previous name)"""
+        self.remove(card_id)
+        grams = name_ngrams(name)
+        self._names[card_id] = name
+        self._grams[card_id] = grams
+        self._keys.setdefault(name_key(name), set()).add(card_id)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(card_id)
+    
+    def remove(self, card_id: int):
+        """Drop a card from the index"""
+        name = self._names.pop(card_id, None)
+        if name is None:
+            return
+        key = name_key(name)
+        self._keys[key].discard(card_id)
+        if not self._keys[key]:
+            del self._keys[key]
+        for gram in self._grams.pop(card_id):
+            self._postings[gram].discard(card_id)
+            if not self._postings[gram]:
+                del self._postings[gram]
+    
+    def name(self, card_id: int) -> Optional[str]:
+        """Indexed name of a card"""
+        return self._names.get(card_id)
+    
+    def ids(self) -> List[int]:
+        """IDs of all indexed cards"""
+        return list(self._names)
+    
+    def exact(self, name: str, exclude_id: Optional[int] = None) -> List[int]:
+        """IDs of cards whose name has the same key"""
+        return self.key_ids(name_key(name), exclude_id)
+    
+    def key_ids(self, key: str, exclude_id: Optional[int] = None) -> List[int]:
+        """IDs of cards with a given name_key"""
+        return sorted(card_id for card_id in self._keys.get(key, ()) if card_id != exclude_id)
+    
+    def duplicate_groups(self, min_id: int = 0,
+                         max_id: int = 2 ** 63 - 1) -> List[List[int]]:
+        """IDs (between min_id and max_id) sharing a non-empty name_key, grouped by key"""
+        groups = []
+        for key in sorted(self._keys):
+            ids = sorted(card_id for card_id in self._keys[key] if min_id <= card_id <= max_id)
+            if key and len(ids) > 1:
+                groups.append(ids)
+        return groups
+    
+    def similar(self, name: str, threshold: Optional[float] = None,
+                exclude_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Cards with a similar name, best match first
+        
+        Args:
+            name: Name to look up
+            threshold: Minimum Jaccard similarity (default: the index threshold)
+            exclude_id: Card ID to leave out (e.g. the card being updated)
+        
+        Returns:
+            List of (card ID, similarity) tuples, exact duplicates included
+        """
+        threshold = self.threshold if threshold is None else threshold
+        grams = name_ngrams(name)
+        ordered = sorted(grams, key=lambda gram: (len(self._postings.get(gram, ())), gram))
+        candidates = set()
+        for gram in ordered[:_prefix_length(len(grams), threshold)]:
+            candidates.update(self._postings.get(gram, ()))
+        candidates.discard(exclude_id)
+        
+        matches = []
+        for card_id in candidates:
+            other = self._grams[card_id]
+            if threshold * len(grams) <= len(other) <= len(grams) / threshold:
+                similarity = _jaccard(grams, other)
+                if similarity >= threshold:
+                    matches.append((card_id, similarity))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches
+    
+    def near_duplicate_pairs(self, threshold: Optional[float] = None) -> List[Tuple[int, int, float]]:
+        """
+        Every pair of cards with similar names (AllPairs prefix filtering)
+        
+        Args:
+            threshold: Minimum Jaccard similarity (default: the index threshold)
+        
+        Returns:
+            List of (card ID, card ID, similarity), most similar first
+        """
+        threshold = self.threshold if threshold is None else threshold
+        frequency = {gram: len(ids) for gram, ids in self._postings.items()}
+        records = sorted(self._grams.items(), key=lambda item: (len(item[1]), item[0]))
+        
+        prefixes = {}
+        pairs = []
+        for card_id, grams in records:
+            ordered = sorted(grams, key=lambda gram: (frequency[gram], gram))
+            prefix = ordered[:_prefix_length(len(grams), threshold)]
+            candidates = set()
+            for gram in prefix:
+                candidates.update(prefixes.get(gram, ()))
+            for other_id in candidates:
+                other = self._grams[other_id]
+                # Records arrive in size order, so only the lower bound can fail
+                if len(other) >= threshold * len(grams):
+                    similarity = _jaccard(grams, other)
+                    if similarity >= threshold:
+                        pairs.append((min(card_id, other_id), max(card_id, other_id), similarity))
+            for gram in prefix:
+                prefixes.setdefault(gram, []).append(card_id)
+        
+        pairs.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+        return pairs
+
+
+class DuplicateDetector:
+    """
+    Duplicate name checks for one card database
+    
+    The name index is built in memory from texts. Cards written by the
+    DatabaseManager that owns the detector are added to it directly; when
+    anything else changed the database since the last check, the index is
+    brought up to date from texts (new, renamed and deleted cards only), so
+    edits made with other tools are picked up too. Nothing is written to the
+    database unless persist is set.
+    """
+    
+    def __init__(self, db_manager, threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                 persist: bool = False):
+        """
+        Args:
+            db_manager: DatabaseManager of the database to check
+            threshold: Minimum Jaccard similarity of a near duplicate
+            persist: Keep the normalized keys in the card_name_keys side
+                table of the database (created on first sync)
+        """
+        self.db_manager = db_manager
+        self.index = NameIndex(threshold=threshold)
+        self.persist = persist
+        self._schema_ready = False
+        self._synced_version = None
+    
+    def sync(self) -> int:
+        """
+        Update the in-memory index (and side table, if persisted) from texts
+        
+        Returns:
+            Number of cards whose key was added, changed or removed
+        """
+        version = self.db_manager.data_version()
+        if version == self._synced_version:
+            return 0
+        if self.persist:
+            changed, removed = self._sync_side_table()
+        else:
+            with self.db_manager.connection() as conn:
+                names = dict(conn.execute("SELECT id, name FROM texts"))
+            changed = [(card_id, name) for card_id, name in names.items()
+                       if self.index.name(card_id) != name]
+            removed = [card_id for card_id in self.index.ids() if card_id not in names]
+        
+        for card_id, name in changed:
+            self.index.add(card_id, name)
+        for card_id in removed:
+            self.index.remove(card_id)
+        self._synced_version = version
+        return len(changed) + len(removed)
+    
+    def is_synced(self) -> bool:
+        """True if the in-memory index reflects every commit made so far"""
+        return (not self.persist and self._synced_version is not None
+                and self.db_manager.data_version() == self._synced_version)
+    
+    def index_written(self, records: Iterable[Tuple[int, str]]):
+        """
+        Index cards the caller just committed, instead of rescanning texts
+        
+        Only valid when is_synced() was True inside the write transaction, so
+        the caller's commit is the only change since the last sync. A commit
+        by another connection in the moment between the caller's commit and
+        this call goes unnoticed until the next change to the database.
+        """
+        for card_id, name in records:
+            self.index.add(card_id, name)
+        self._synced_version = self.db_manager.data_version()
+    
+    def _sync_side_table(self) -> Tuple[List[Tuple[int, str]], List[int]]:
+        """Bring card_name_keys up to date; returns (changed, removed) cards"""
+        with self.db_manager.connection() as conn:
+            if not self._schema_ready:
+                for statement in NAME_KEYS_SCHEMA:
+                    conn.execute(statement)
+                conn.commit()
+                self._schema_ready = True
+            
+            if not len(self.index):
+                # First sync: index every key already stored
+                for card_id, name in conn.execute("SELECT id, name FROM card_name_keys"):
+                    self.index.add(card_id, name)
+            
+            changed = conn.execute("""
+                SELECT texts.id, texts.name FROM texts
+                LEFT JOIN card_name_keys k ON k.id = texts.id
+                WHERE k.id IS NULL OR k.name IS NOT texts.name
+            """).fetchall()
+            removed = [row[0] for row in conn.execute("""
+                SELECT k.id FROM card_name_keys k
+                LEFT JOIN texts ON texts.id = k.id
+                WHERE texts.id IS NULL
+            """)]
+        
+        if changed or removed:
+            with self.db_manager.write_transaction() as cursor:
+                cursor.executemany("INSERT OR REPLACE INTO card_name_keys (id, name, name_key) "
+                                   "VALUES (?, ?, ?)",
+                                   [(card_id, name, name_key(name)) for card_id, name in changed])
+                cursor.executemany("DELETE FROM card_name_keys WHERE id = ?",
+                                   [(card_id,) for card_id in removed])
+        return changed, removed
+    
+    def check_name(self, name: str, exclude_id: Optional[int] = None) -> Dict[str, List[tuple]]:
+        """
+        Pre-insert check for a new (or renamed) card
+        
+        Args:
+            name: Proposed card name
+            exclude_id: ID of the card itself, when renaming
+        
+        Returns:
+            Dictionary with 'exact' ([(id, name)], same normalized name) and
+            'near' ([(id, name, similarity)], similar names)
+        """
+        self.sync()
+        exact = [(card_id, self.index.name(card_id))
+                 for card_id in self.index.exact(name, exclude_id=exclude_id)]
+        exact_ids = {card_id for card_id, _ in exact}
+        near = [(card_id, self.index.name(card_id), round(similarity, 3))
+                for card_id, similarity in self.index.similar(name, exclude_id=exclude_id)
+                if card_id not in exact_ids]
+        return {'exact': exact, 'near': near}
+    
+    def existing_keys(self, names: Iterable[str], synced: bool = False) -> Dict[str, List[int]]:
+        """
+        Look up many names at once (used by bulk imports)
+        
+        Args:
+            names: Names to look up
+            synced: The caller already called sync() (e.g. before opening the
+                write transaction the lookup runs in)
+        
+        Returns:
+            Dictionary mapping each name_key that already exists to its card IDs
+        """
+        if not synced:
+            self.sync()
+        found = {}
+        for key in {name_key(name) for name in names} - {''}:
+            ids = self.index.key_ids(key)
+            if ids:
+                found[key] = ids
+        return found
+    
+    def exact_duplicates(self, min_id: int = 0,
+                         max_id: int = 2 ** 63 - 1) -> List[List[Tuple[int, str]]]:
+        """
+        Groups of cards whose names normalize to the same key
+        
+        Returns:
+            List of groups, each a list of (id, name)
+        """
+        self.sync()
+        return [[(card_id, self.index.name(card_id)) for card_id in group]
+                for group in self.index.duplicate_groups(min_id, max_id)]
+    
+    def near_duplicates(self, min_id: int = 0, max_id: int = 2 ** 63 - 1,
+                        threshold: Optional[float] = None) -> List[Tuple[int, int, float]]:
+        """
+        Pairs of cards with similar (but not identical) normalized names
+        
+        Returns:
+            List of (card ID, card ID, similarity), most similar first
+        """
+        self.sync()
+        index = self.index
+        if min_id > 0 or max_id < 2 ** 63 - 1:
+            index = NameIndex(((card_id, index.name(card_id)) for card_id in index.ids()
+                               if min_id <= card_id <= max_id), threshold=index.threshold)
+        return [(a, b, round(similarity, 3))
+                for a, b, similarity in index.near_duplicate_pairs(threshold)
+                if name_key(index.name(a)) != name_key(index.name(b))]
@@ -3,15 +3,24 @@ Image Downloader and Manager for Yu-Gi-Oh! Card Images
 Handles downloading, resizing, and validating card images from URLs
 """
 
+import hashlib
+import json
 import os
 import requests
 import shutil
-from typing import Optional, Tuple
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Optional, Tuple, Dict, Iterable, Union, Mapping, Any
 from pathlib import Path
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from asset_index import AssetIndex, IMAGE_EXTENSIONS, replace_file
+from constants import printer
 
 try:
     from PIL import Image
-    from io import BytesIO
     PIL_AVAILABLE = True
 except ImportError:
     PIL_AVAILABLE = False
@@ -19,6 +28,202 @@ except ImportError:
     print("Install with: pip install Pillow")
 
 
+# JPEG quality used for every processed card image
+JPEG_QUALITY = 95
+
+# Draft decoding and Image.reduce stop at this multiple of the target size
+REDUCING_GAP = 2
+
+# Modes Image.reduce handles; other images are converted first
+RESAMPLE_MODES = ('L', 'LA', 'RGB', 'RGBA', 'CMYK')
+
+# Reduced-size art tiers stored in subdirectories of pics: name -> (width, height).
+# 'thumbnail' matches the folder EDOPro reads for list views; 'mid' is optional.
+THUMBNAIL_TIERS = {
+    'thumbnail': (44, 64),
+    'mid': (89, 128),
+}
+
+
+class ImageRejectedError(ValueError):
+    """Raised when a source image exceeds the configured size limits"""
+
+
+def _temp_path(directory: str, suffix: str) -> str:
+    """Create an empty temporary file next to its final location"""
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=suffix)
+    os.close(fd)
+    return temp_path
+
+
+def _open_image(path: str):
+    """
+    Image.open, reporting Pillow's decompression bomb check as ImageRejectedError
+    
+    Pillow refuses images far beyond Image.MAX_IMAGE_PIXELS inside
+    Image.open (and warns, or raises if warnings are errors, for smaller
+    ones), before our own pixel limit can be checked.
+    """
+    try:
+        return Image.open(path)
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        raise ImageRejectedError(str(e)) from e
+
+
+def _resample_ready(img):
+    """
+    Convert an image to a mode Image.reduce and LANCZOS resampling support
+    
+    Palette images become RGBA so their transparency is still flattened onto
+    white afterwards; 1-bit and 16/32-bit single-band images become L.
+    """
+    if img.mode in RESAMPLE_MODES:
+        return img
+    if img.mode in ('P', 'PA'):
+        return img.convert('RGBA')
+    if len(img.getbands()) == 1:
+        return img.convert('L')
+    return img.convert('RGB')
+
+
+def _to_card_image(img, width: int, height: int):
+    """
+    Resize an image to the card dimensions and flatten it to RGB
+    
+    Large sources are shrunk cheaply before the final LANCZOS resample: JPEGs
+    are decoded in draft mode (DCT scaling by 1/2, 1/4 or 1/8) and the result
+    is pre-shrunk with Image.reduce, both stopping at REDUCING_GAP times the
+    target size so the final resample still has enough detail to work with.
+    Must be called on a freshly opened (not yet loaded) image for draft mode
+    to apply.
+    """
+    if img.size != (width, height):
+        target = (width * REDUCING_GAP, height * REDUCING_GAP)
+        if img.format == 'JPEG' and img.size[0] > target[0] and img.size[1] > target[1]:
+            img.draft('RGB', target)
+        img = _resample_ready(img)
+        
+        factor = min(img.size[0] // target[0], img.size[1] // target[1])
+        if factor >= 2:
+            img = img.reduce(factor)
+        
+        img = img.resize(
+            (width, height),
+            Image.Resampling.LANCZOS if hasattr(Image, 'Resampling') else Image.LANCZOS
+        )
+    
+    # Convert to RGB if necessary (for PNG with transparency)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        rgb_img.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        img = rgb_img
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    return img
+
+
+def _save_jpeg_atomic(img, save_path: str):
+    """Save an image as JPEG through a temporary file and os.replace"""
+    temp_path = _temp_path(os.path.dirname(save_path) or '.', '.jpg')
+    try:
+        img.save(temp_path, 'JPEG', quality=JPEG_QUALITY)
+        replace_file(temp_path, save_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _tier_path(pics_directory: str, tier: str, card_id) -> str:
+    """Path of a card's image in a reduced-size tier directory"""
+    return os.path.join(pics_directory, tier, f"{card_id}.jpg")
+
+
+def _generate_tiers(source_path: str, tiers: Dict[str, Tuple[int, int]],
+                    force: bool = False) -> Dict[str, Any]:
+    """
+    Write the reduced-size tier images for one card image
+    
+    A tier file is only regenerated when it is missing or older than the
+    source. Runs in worker processes during backfill, so it only takes and
+    returns plain values.
+    
+    Returns:
+        Dictionary with 'source', 'written' (list of tier names) and 'error'
+    """
+    result = {'source': source_path, 'written': [], 'error': None}
+    pics_directory, filename = os.path.split(source_path)
+    card_id = os.path.splitext(filename)[0]
+    try:
+        source_mtime = os.stat(source_path).st_mtime_ns
+        for tier, (width, height) in tiers.items():
+            tier_path = _tier_path(pics_directory, tier, card_id)
+            if not force:
+                try:
+                    if os.stat(tier_path).st_mtime_ns >= source_mtime:
+                        continue
+                except FileNotFoundError:
+                    pass
+            os.makedirs(os.path.dirname(tier_path), exist_ok=True)
+            # Reopen per tier so draft decoding applies to each target size
+            with Image.open(source_path) as img:
+                _save_jpeg_atomic(_to_card_image(img, width, height), tier_path)
+            result['written'].append(tier)
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def _normalize_image_file(path: str, width: int, height: int,
+                          max_pixels: int) -> Dict[str, Any]:
+    """
+    Bring one pics file to card size, RGB mode and JPEG format (.jpg)
+    
+    Runs in a worker process, so it only takes and returns plain values.
+    
+    Returns:
+        Dictionary with 'source', 'path', 'status' ('ok', 'normalized',
+        'conflict' or 'failed'), 'detail' and 'stat' ((size, mtime_ns) of
+        the resulting file)
+    """
+    result = {'source': path, 'path': path, 'status': 'ok', 'detail': '', 'stat': None}
+    stem, ext = os.path.splitext(path)
+    target = stem + '.jpg'
+    try:
+        if ext.lower() != '.jpg' and os.path.exists(target):
+            result.update(status='conflict', detail=f"{os.path.basename(target)} already exists")
+            return result
+        
+        with _open_image(path) as img:
+            problems = []
+            if img.size != (width, height):
+                problems.append(f"size {img.size[0]}x{img.size[1]}")
+            if img.mode != 'RGB':
+                problems.append(f"mode {img.mode}")
+            if img.format != 'JPEG':
+                problems.append(f"format {img.format}")
+            if ext != '.jpg':
+                problems.append(f"extension {ext}")
+            
+            if problems:
+                if img.size[0] * img.size[1] > max_pixels:
+                    raise ImageRejectedError(f"image is {img.size[0]}x{img.size[1]}")
+                _save_jpeg_atomic(_to_card_image(img, width, height), target)
+                result.update(status='normalized', path=target, detail=', '.join(problems))
+        
+        # Drop the old .png/.jpeg once the .jpg is in place (but never the
+        # new file itself on case-insensitive filesystems)
+        if target != path and os.path.exists(target) and not os.path.samefile(path, target):
+            os.remove(path)
+        stat = os.stat(result['path'])
+        result['stat'] = (stat.st_size, stat.st_mtime_ns)
+    except Exception as e:
+        result.update(status='failed', detail=str(e))
+    return result
+
+
 class ImageDownloader:
     """Manages card image downloading and processing"""
     
@@ -26,15 +231,156 @@ class ImageDownloader:
     RECOMMENDED_WIDTH = 177
     RECOMMENDED_HEIGHT = 254
     
-    def __init__(self, pics_directory: str = "../pics"):
+    # Bulk download defaults
+    DEFAULT_WORKERS = 8
+    DEFAULT_PER_HOST_LIMIT = 4
+    REQUEST_TIMEOUT = 30
+    
+    # Limits that keep memory use predictable for large or hostile images
+    MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+    MAX_IMAGE_PIXELS = 40_000_000
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+    
+    # URL -> validators/content hash manifest used for conditional requests
+    MANIFEST_FILENAME = '.image_manifest.json'
+    
+    # filename -> (size, mtime) of files already checked by normalize_pics
+    NORMALIZE_CACHE_FILENAME = '.normalize_cache.json'
+    
+    def __init__(self, pics_directory: str = "../pics", max_workers: int = DEFAULT_WORKERS,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT, thumbnails: bool = True,
+                 mid_tier: bool = False):
         """
         Initialize image downloader
         
         Args:
             pics_directory: Directory where card images should be saved
+            max_workers: Maximum number of concurrent downloads in download_many
+            per_host_limit: Maximum number of concurrent requests to one host
+            thumbnails: Write pics/thumbnail/<id>.jpg whenever an image is saved
+            mid_tier: Also write the mid-size tier (pics/mid/<id>.jpg)
         """
         self.pics_directory = pics_directory
+        self.tiers = {}
+        if thumbnails:
+            self.tiers['thumbnail'] = THUMBNAIL_TIERS['thumbnail']
+        if mid_tier:
+            self.tiers['mid'] = THUMBNAIL_TIERS['mid']
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self._session = None
+        self._lock = threading.Lock()
+        self._host_slots = {}
+        self._manifest = None
+        self._manifest_dirty = False
+        self._manifest_hold = 0
         self._ensure_directory_exists()
+        self.asset_index = AssetIndex(pics_directory, script_directory=None)
+    
+    @property
+    def manifest_path(self) -> str:
+        """Path of the download manifest inside the pics directory"""
+        return os.path.join(self.pics_directory, self.MANIFEST_FILENAME)
+    
+    def _load_manifest(self) -> Dict[str, Dict]:
+        """Load the download manifest (call with self._lock held)"""
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+    
+    def _manifest_entry(self, url: str, card_id: int) -> Optional[Dict]:
+        """Get the manifest entry for a URL if it still describes this card's file"""
+        with self._lock:
+            entry = self._load_manifest().get(url)
+        if entry and entry.get('card_id') == card_id and os.path.exists(entry.get('path', '')):
+            return entry
+        return None
+    
+    def _record_download(self, url: str, card_id: int, path: str, response_headers,
+                         sha256: str):
+        """Store validators and content hash for a downloaded URL"""
+        with self._lock:
+            self._load_manifest()[url] = {
+                'card_id': card_id,
+                'path': path,
+                'etag': response_headers.get('etag'),
+                'last_modified': response_headers.get('last-modified'),
+                'sha256': sha256
+            }
+            self._manifest_dirty = True
+        self._maybe_save_manifest()
+    
+    def _maybe_save_manifest(self):
+        """Save the manifest unless a bulk operation is deferring saves"""
+        with self._lock:
+            if self._manifest_hold:
+                return
+        self.save_manifest()
+    
+    def save_manifest(self):
+        """Write pending manifest changes to disk atomically"""
+        with self._lock:
+            if not self._manifest_dirty:
+                return
+            temp_path = _temp_path(self.pics_directory, '.json')
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._manifest, f, indent=1, sort_keys=True)
+                replace_file(temp_path, self.manifest_path)
+                self._manifest_dirty = False
+            except OSError as e:
+                print(f"Warning: Could not save image manifest: {e}")
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+    
+    @property
+    def session(self) -> requests.Session:
+        """
+        Shared HTTP session, created on first use
+        
+        The connection pool is sized for the worker count so concurrent
+        downloads reuse keep-alive connections, and transient failures
+        (connection errors, 429 and 5xx responses) are retried with backoff.
+        """
+        with self._lock:
+            if self._session is None:
+                retry = Retry(
+                    total=2,
+                    backoff_factor=0.5,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(['GET', 'HEAD'])
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=self.max_workers,
+                    pool_maxsize=self.max_workers,
+                    max_retries=retry
+                )
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+    
+    def close(self):
+        """Close the shared HTTP session and its pooled connections"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+    
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Get the semaphore limiting concurrent requests to the URL's host"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
     
     def _ensure_directory_exists(self):
         """Create pics directory if it doesn't exist"""
@@ -43,39 +389,78 @@ class ImageDownloader:
             print(f"Created directory: {self.pics_directory}")
     
     def download_image(self, url: str, card_id: int, resize: bool = True, 
-                       overwrite: bool = False) -> Optional[str]:
+                       overwrite: bool = False, verbose: bool = True) -> Optional[str]:
         """
         Download an image from a URL and save it as the card image
         
+        The response is streamed in chunks to a temporary file in the pics
+        directory, so the body is never held in memory. Downloads larger than
+        MAX_DOWNLOAD_BYTES or images with more than MAX_IMAGE_PIXELS pixels are
+        rejected, and the final file is moved into place atomically.
+        
+        When the URL was downloaded before for this card, the request carries
+        If-None-Match / If-Modified-Since from the manifest; a 304 response or
+        an unchanged content hash keeps the existing file without re-encoding.
+        Such an image is revalidated even without overwrite, since the server
+        says whether it changed; overwrite only matters for images the
+        manifest has no validator for.
+        
         Args:
             url: URL of the image to download
             card_id: Card ID (used for filename)
             resize: Whether to resize the image to recommended dimensions
             overwrite: Whether to overwrite existing image files
+            verbose: Print progress and errors
         
         Returns:
             Path to saved image file or None if failed
         """
+        log = printer(verbose)
+        temp_path = None
         try:
-            # Check if image already exists
+            # Previous download of this URL, used for a conditional request
+            entry = self._manifest_entry(url, card_id)
+            headers = {}
+            if entry:
+                if entry.get('etag'):
+                    headers['If-None-Match'] = entry['etag']
+                if entry.get('last_modified'):
+                    headers['If-Modified-Since'] = entry['last_modified']
+            
+            # Check if image already exists (and cannot be revalidated)
             existing_path = self.find_existing_image(card_id)
-            if existing_path and not overwrite:
-                print(f"Image already exists: {existing_path}")
-                print(f"Use overwrite=True to replace it")
+            if existing_path and not overwrite and not headers:
+                log(f"Image already exists: {existing_path}")
+                log(f"Use overwrite=True to replace it")
                 return existing_path
             
-            # Download image
-            print(f"Downloading image from: {url}")
-            response = requests.get(url, timeout=30, stream=True)
-            response.raise_for_status()
-            
-            # Check content type
-            content_type = response.headers.get('content-type', '')
-            if 'image' not in content_type.lower():
-                print(f"Warning: URL may not be an image (content-type: {content_type})")
+            # Download image (the host slot caps concurrent requests per host)
+            log(f"Downloading image from: {url}")
+            with self._host_slot(url):
+                response = self.session.get(url, timeout=self.REQUEST_TIMEOUT, stream=True,
+                                            headers=headers)
+                try:
+                    if response.status_code == 304 and entry:
+                        log(f"✓ Image not modified: {entry['path']}")
+                        return entry['path']
+                    response.raise_for_status()
+                    
+                    # Check content type
+                    content_type = response.headers.get('content-type', '')
+                    if 'image' not in content_type.lower():
+                        log(f"Warning: URL may not be an image (content-type: {content_type})")
+                    
+                    # Stream image data to a temporary file
+                    temp_path, sha256 = self._stream_to_temp(response)
+                    response_headers = response.headers
+                finally:
+                    response.close()
             
-            # Get image data
-            image_data = response.content
+            # Same bytes as last time: keep the processed file
+            if entry and entry.get('sha256') == sha256:
+                log(f"✓ Image unchanged: {entry['path']}")
+                self._record_download(url, card_id, entry['path'], response_headers, sha256)
+                return entry['path']
             
             # Determine file extension
             extension = self._get_extension_from_url(url, content_type)
@@ -88,54 +473,109 @@ class ImageDownloader:
             # Process image if PIL is available and resize is requested
             if PIL_AVAILABLE and resize:
                 try:
-                    # Open image with PIL
-                    img = Image.open(BytesIO(image_data))
-                    
-                    # Get original dimensions
-                    orig_width, orig_height = img.size
-                    print(f"Original image size: {orig_width}x{orig_height}")
-                    
-                    # Resize if necessary
-                    if orig_width != self.RECOMMENDED_WIDTH or orig_height != self.RECOMMENDED_HEIGHT:
-                        print(f"Resizing to recommended size: {self.RECOMMENDED_WIDTH}x{self.RECOMMENDED_HEIGHT}")
-                        img = img.resize(
-                            (self.RECOMMENDED_WIDTH, self.RECOMMENDED_HEIGHT),
-                            Image.Resampling.LANCZOS if hasattr(Image, 'Resampling') else Image.LANCZOS
-                        )
-                    
-                    # Convert to RGB if necessary (for PNG with transparency)
-                    if img.mode in ('RGBA', 'LA', 'P'):
-                        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                        if img.mode == 'P':
-                            img = img.convert('RGBA')
-                        rgb_img.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                        img = rgb_img
-                    
-                    # Save as JPEG
-                    img.save(save_path, 'JPEG', quality=95)
-                    print(f"✓ Image processed and saved: {save_path}")
-                    
+                    self._process_image_file(temp_path, save_path, verbose)
+                    log(f"✓ Image processed and saved: {save_path}")
+                except ImageRejectedError:
+                    raise
                 except Exception as e:
-                    print(f"Warning: Could not process image with PIL: {e}")
-                    print(f"Saving original image without processing...")
-                    # Save raw image data
-                    with open(save_path, 'wb') as f:
-                        f.write(image_data)
-                    print(f"✓ Image saved (original): {save_path}")
+                    log(f"Warning: Could not process image with PIL: {e}")
+                    log(f"Saving original image without processing...")
+                    # Move raw image data into place
+                    replace_file(temp_path, save_path)
+                    log(f"✓ Image saved (original): {save_path}")
             else:
-                # Save raw image data without processing
-                with open(save_path, 'wb') as f:
-                    f.write(image_data)
-                print(f"✓ Image saved: {save_path}")
+                # Move raw image data into place without processing
+                replace_file(temp_path, save_path)
+                log(f"✓ Image saved: {save_path}")
             
+            self.asset_index.invalidate()
+            self._record_download(url, card_id, save_path, response_headers, sha256)
+            self._save_tiers(save_path, verbose)
             return save_path
             
         except requests.exceptions.RequestException as e:
-            print(f"✗ Error downloading image: {e}")
+            log(f"✗ Error downloading image: {e}")
+            return None
+        except ImageRejectedError as e:
+            log(f"✗ Image rejected: {e}")
             return None
         except Exception as e:
-            print(f"✗ Error saving image: {e}")
+            log(f"✗ Error saving image: {e}")
             return None
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def _save_tiers(self, image_path: str, verbose: bool = True):
+        """Regenerate the reduced-size tiers after a card image was saved"""
+        if not PIL_AVAILABLE or not self.tiers:
+            return
+        log = printer(verbose)
+        result = _generate_tiers(image_path, self.tiers, force=True)
+        if result['error']:
+            log(f"Warning: Could not create thumbnails: {result['error']}")
+        elif result['written']:
+            log(f"✓ Thumbnails updated: {', '.join(result['written'])}")
+    
+    def _stream_to_temp(self, response: requests.Response) -> Tuple[str, str]:
+        """
+        Write a streamed response body to a temporary file in the pics directory
+        
+        Raises:
+            ImageRejectedError: If the body is larger than MAX_DOWNLOAD_BYTES
+        
+        Returns:
+            Tuple of (temporary file path, SHA-256 hex digest of the body)
+        """
+        content_length = response.headers.get('content-length')
+        if content_length and content_length.isdigit() and int(content_length) > self.MAX_DOWNLOAD_BYTES:
+            raise ImageRejectedError(
+                f"download is {int(content_length)} bytes (limit {self.MAX_DOWNLOAD_BYTES})")
+        
+        temp_path = _temp_path(self.pics_directory, '.part')
+        try:
+            received = 0
+            digest = hashlib.sha256()
+            with open(temp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                    received += len(chunk)
+                    if received > self.MAX_DOWNLOAD_BYTES:
+                        raise ImageRejectedError(
+                            f"download exceeds {self.MAX_DOWNLOAD_BYTES} bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+            return temp_path, digest.hexdigest()
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    
+    def _process_image_file(self, source_path: str, save_path: str, verbose: bool = True):
+        """
+        Resize and re-encode an image file as the card JPEG
+        
+        The source is opened lazily, so its pixel count is checked from the
+        header before anything is decoded. The result is written to a temporary
+        file and renamed over save_path.
+        
+        Raises:
+            ImageRejectedError: If the image has more than MAX_IMAGE_PIXELS pixels
+        """
+        with _open_image(source_path) as img:
+            # Get original dimensions
+            orig_width, orig_height = img.size
+            if orig_width * orig_height > self.MAX_IMAGE_PIXELS:
+                raise ImageRejectedError(
+                    f"image is {orig_width}x{orig_height} (limit {self.MAX_IMAGE_PIXELS} pixels)")
+            log = printer(verbose)
+            log(f"Original image size: {orig_width}x{orig_height}")
+            
+            # Resize if necessary
+            if orig_width != self.RECOMMENDED_WIDTH or orig_height != self.RECOMMENDED_HEIGHT:
+                log(f"Resizing to recommended size: {self.RECOMMENDED_WIDTH}x{self.RECOMMENDED_HEIGHT}")
+            img = _to_card_image(img, self.RECOMMENDED_WIDTH, self.RECOMMENDED_HEIGHT)
+            
+            # Save as JPEG, then rename into place
+            _save_jpeg_atomic(img, save_path)
     
     def _get_extension_from_url(self, url: str, content_type: str = '') -> Optional[str]:
         """
@@ -177,20 +617,16 @@ class ImageDownloader:
         """
         Find an existing image file for a card
         
+        Uses the shared asset index, so repeated lookups cost one directory
+        stat rather than one os.path.exists call per extension.
+        
         Args:
             card_id: Card ID to search for
         
         Returns:
             Path to existing image or None if not found
         """
-        extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
-        
-        for ext in extensions:
-            path = os.path.join(self.pics_directory, f"{card_id}{ext}")
-            if os.path.exists(path):
-                return path
-        
-        return None
+        return self.asset_index.image_path(card_id)
     
     def verify_image(self, card_id: int) -> Tuple[bool, Optional[str]]:
         """
@@ -245,14 +681,25 @@ class ImageDownloader:
         
         try:
             os.remove(image_path)
+            self.asset_index.invalidate()
             print(f"✓ Deleted image: {image_path}")
+            for tier in THUMBNAIL_TIERS:
+                tier_path = _tier_path(self.pics_directory, tier, card_id)
+                if os.path.exists(tier_path):
+                    os.remove(tier_path)
+            with self._lock:
+                manifest = self._load_manifest()
+                for url in [u for u, e in manifest.items() if e.get('card_id') == card_id]:
+                    del manifest[url]
+                    self._manifest_dirty = True
+            self.save_manifest()
             return True
         except Exception as e:
             print(f"✗ Error deleting image: {e}")
             return False
     
     def copy_local_image(self, source_path: str, card_id: int, resize: bool = True,
-                        overwrite: bool = False) -> Optional[str]:
+                        overwrite: bool = False, verbose: bool = True) -> Optional[str]:
         """
         Copy a local image file to the pics directory
         
@@ -261,24 +708,26 @@ class ImageDownloader:
             card_id: Card ID (used for filename)
             resize: Whether to resize the image to recommended dimensions
             overwrite: Whether to overwrite existing image files
+            verbose: Print progress and errors
         
         Returns:
             Path to saved image file or None if failed
         """
+        log = printer(verbose)
         try:
             # Check if source file exists
             if not os.path.exists(source_path):
-                print(f"✗ Source image file not found: {source_path}")
+                log(f"✗ Source image file not found: {source_path}")
                 return None
             
             # Check if image already exists
             existing_path = self.find_existing_image(card_id)
             if existing_path and not overwrite:
-                print(f"Image already exists: {existing_path}")
-                print(f"Use overwrite=True to replace it")
+                log(f"Image already exists: {existing_path}")
+                log(f"Use overwrite=True to replace it")
                 return existing_path
             
-            print(f"Copying image from: {source_path}")
+            log(f"Copying image from: {source_path}")
             
             # Determine file extension from source
             source_ext = os.path.splitext(source_path)[1].lower()
@@ -291,51 +740,33 @@ class ImageDownloader:
             # Process image if PIL is available and resize is requested
             if PIL_AVAILABLE and resize:
                 try:
-                    # Open image with PIL
-                    with Image.open(source_path) as img:
-                        # Get original dimensions
-                        orig_width, orig_height = img.size
-                        print(f"Original image size: {orig_width}x{orig_height}")
-                        
-                        # Resize if necessary
-                        if orig_width != self.RECOMMENDED_WIDTH or orig_height != self.RECOMMENDED_HEIGHT:
-                            print(f"Resizing to recommended size: {self.RECOMMENDED_WIDTH}x{self.RECOMMENDED_HEIGHT}")
-                            img = img.resize(
-                                (self.RECOMMENDED_WIDTH, self.RECOMMENDED_HEIGHT),
-                                Image.Resampling.LANCZOS if hasattr(Image, 'Resampling') else Image.LANCZOS
-                            )
-                        
-                        # Convert to RGB if necessary (for PNG with transparency)
-                        if img.mode in ('RGBA', 'LA', 'P'):
-                            rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                            if img.mode == 'P':
-                                img = img.convert('RGBA')
-                            rgb_img.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                            img = rgb_img
-                        
-                        # Save as JPEG
-                        img.save(save_path, 'JPEG', quality=95)
-                        print(f"✓ Image processed and saved: {save_path}")
-                        
+                    self._process_image_file(source_path, save_path, verbose)
+                    log(f"✓ Image processed and saved: {save_path}")
+                except ImageRejectedError as e:
+                    log(f"✗ Image rejected: {e}")
+                    return None
                 except Exception as e:
-                    print(f"Warning: Could not process image with PIL: {e}")
-                    print(f"Copying original image without processing...")
+                    log(f"Warning: Could not process image with PIL: {e}")
+                    log(f"Copying original image without processing...")
                     # Copy original file
                     shutil.copy2(source_path, save_path)
-                    print(f"✓ Image copied (original): {save_path}")
+                    log(f"✓ Image copied (original): {save_path}")
             else:
                 # Copy file without processing
                 shutil.copy2(source_path, save_path)
-                print(f"✓ Image copied: {save_path}")
+                log(f"✓ Image copied: {save_path}")
             
+            self.asset_index.invalidate()
+            self._save_tiers(save_path, verbose)
             return save_path
             
         except Exception as e:
-            print(f"✗ Error copying image: {e}")
+            log(f"✗ Error copying image: {e}")
             return None
     
     def download_with_retry(self, url: str, card_id: int, max_retries: int = 3,
-                           resize: bool = True, overwrite: bool = False) -> Optional[str]:
+                           resize: bool = True, overwrite: bool = False,
+                           verbose: bool = True) -> Optional[str]:
         """
         Download an image with retry logic
         
@@ -345,24 +776,227 @@ class ImageDownloader:
             max_retries: Maximum number of retry attempts
             resize: Whether to resize image
             overwrite: Whether to overwrite existing files
+            verbose: Print progress and errors
         
         Returns:
             Path to saved image or None if all attempts failed
         """
+        log = printer(verbose)
         for attempt in range(1, max_retries + 1):
             if attempt > 1:
-                print(f"Retry attempt {attempt}/{max_retries}...")
+                log(f"Retry attempt {attempt}/{max_retries}...")
             
-            result = self.download_image(url, card_id, resize, overwrite)
+            result = self.download_image(url, card_id, resize, overwrite, verbose)
             
             if result:
                 return result
             
             if attempt < max_retries:
-                print(f"Download failed, retrying...")
+                log(f"Download failed, retrying...")
         
-        print(f"✗ All {max_retries} download attempts failed")
+        log(f"✗ All {max_retries} download attempts failed")
         return None
+    
+    def download_many(self, images: Union[Mapping[int, str], Iterable[Tuple[int, str]]],
+                      resize: bool = True, overwrite: bool = False,
+                      max_workers: Optional[int] = None) -> Dict[int, Optional[str]]:
+        """
+        Download many card images concurrently
+        
+        Downloads share one pooled HTTP session and run on a bounded thread
+        pool; requests to the same host are additionally capped by
+        per_host_limit. Transient errors are retried by the session with
+        backoff, so one slow card does not hold up the others.
+        
+        Args:
+            images: Mapping of card ID to URL, or iterable of (card_id, url) pairs
+            resize: Whether to resize images
+            overwrite: Whether to overwrite existing files
+            max_workers: Override the number of worker threads
+        
+        Returns:
+            Dictionary mapping each card ID to the saved path, or None if it failed
+        """
+        items = list(images.items() if isinstance(images, Mapping) else images)
+        if not items:
+            return {}
+        
+        workers = min(max_workers or self.max_workers, len(items))
+        
+        def fetch(item: Tuple[int, str]) -> Optional[str]:
+            card_id, url = item
+            return self.download_image(url, card_id, resize, overwrite)
+        
+        with self._lock:
+            self._manifest_hold += 1
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                paths = executor.map(fetch, items)
+                results = {card_id: path for (card_id, _), path in zip(items, paths)}
+        finally:
+            with self._lock:
+                self._manifest_hold -= 1
+            self._maybe_save_manifest()
+        
+        succeeded = sum(1 for path in results.values() if path)
+        print(f"✓ Downloaded {succeeded}/{len(results)} images")
+        return results
+    
+    def normalize_pics(self, workers: Optional[int] = None, force: bool = False) -> Dict[str, Any]:
+        """
+        Normalize every card image in the pics directory in parallel
+        
+        Files that are not card-sized RGB JPEGs with a .jpg extension are
+        resized and re-encoded on a process pool (one worker per CPU core by
+        default). Files whose size and mtime match the normalize cache were
+        already checked and are skipped unless force is set.
+        
+        Args:
+            workers: Number of worker processes (default: CPU count)
+            force: Re-check every file, ignoring the cache
+        
+        Returns:
+            Summary dictionary with 'checked', 'skipped', 'normalized' counts
+            and a 'failed' list of (filename, reason) tuples
+        """
+        summary = {'checked': 0, 'skipped': 0, 'normalized': 0, 'failed': []}
+        if not PIL_AVAILABLE:
+            print("✗ Pillow is required to normalize images")
+            return summary
+        
+        cache_path = os.path.join(self.pics_directory, self.NORMALIZE_CACHE_FILENAME)
+        cache = {}
+        if not force:
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+        
+        # One directory pass; card images are named <id>.<ext>
+        pending = []
+        present = set()
+        with os.scandir(self.pics_directory) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if not stem.isdigit() or ext.lower() not in IMAGE_EXTENSIONS or not entry.is_file():
+                    continue
+                present.add(entry.name)
+                stat = entry.stat()
+                if cache.get(entry.name) == [stat.st_size, stat.st_mtime_ns]:
+                    summary['skipped'] += 1
+                    continue
+                pending.append(entry.path)
+        
+        new_cache = {name: value for name, value in cache.items() if name in present}
+        self.asset_index.invalidate()
+        if pending:
+            print(f"Checking {len(pending)} images ({summary['skipped']} cached)...")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(
+                    _normalize_image_file, pending,
+                    [self.RECOMMENDED_WIDTH] * len(pending),
+                    [self.RECOMMENDED_HEIGHT] * len(pending),
+                    [self.MAX_IMAGE_PIXELS] * len(pending),
+                    chunksize=max(1, len(pending) // (4 * (workers or os.cpu_count() or 1)))
+                )
+                for result in results:
+                    summary['checked'] += 1
+                    source_name = os.path.basename(result['source'])
+                    if result['status'] in ('failed', 'conflict'):
+                        summary['failed'].append((source_name, result['detail']))
+                        new_cache.pop(source_name, None)
+                        continue
+                    if result['status'] == 'normalized':
+                        summary['normalized'] += 1
+                        print(f"✓ Normalized {source_name}: {result['detail']}")
+                        new_cache.pop(source_name, None)
+                    new_cache[os.path.basename(result['path'])] = list(result['stat'])
+        
+        temp_path = _temp_path(self.pics_directory, '.json')
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(new_cache, f, indent=1, sort_keys=True)
+            replace_file(temp_path, cache_path)
+        except OSError as e:
+            print(f"Warning: Could not save normalize cache: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        
+        return summary
+    
+    def generate_thumbnails(self, workers: Optional[int] = None,
+                            force: bool = False) -> Dict[str, Any]:
+        """
+        Backfill the reduced-size tiers for every card image in parallel
+        
+        Only images whose tier files are missing or older than the source are
+        sent to the process pool, so repeat runs are cheap.
+        
+        Args:
+            workers: Number of worker processes (default: CPU count)
+            force: Regenerate every tier file
+        
+        Returns:
+            Summary dictionary with 'up_to_date', 'updated' counts and a
+            'failed' list of (filename, reason) tuples
+        """
+        summary = {'up_to_date': 0, 'updated': 0, 'failed': []}
+        if not PIL_AVAILABLE or not self.tiers:
+            return summary
+        
+        # Tier mtimes from one scandir per tier directory
+        tier_mtimes = {}
+        for tier in self.tiers:
+            tier_dir = os.path.join(self.pics_directory, tier)
+            mtimes = {}
+            if os.path.isdir(tier_dir):
+                with os.scandir(tier_dir) as entries:
+                    for entry in entries:
+                        mtimes[entry.name] = entry.stat().st_mtime_ns
+            tier_mtimes[tier] = mtimes
+        
+        pending = []
+        with os.scandir(self.pics_directory) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if not stem.isdigit() or ext.lower() not in IMAGE_EXTENSIONS or not entry.is_file():
+                    continue
+                source_mtime = entry.stat().st_mtime_ns
+                stale = force or any(
+                    tier_mtimes[tier].get(f"{stem}.jpg", -1) < source_mtime for tier in self.tiers
+                )
+                if stale:
+                    pending.append(entry.path)
+                else:
+                    summary['up_to_date'] += 1
+        
+        if pending:
+            print(f"Generating thumbnails for {len(pending)} images...")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for result in executor.map(_generate_tiers, pending,
+                                           [self.tiers] * len(pending),
+                                           [force] * len(pending)):
+                    if result['error']:
+                        summary['failed'].append((os.path.basename(result['source']), result['error']))
+                    else:
+                        summary['updated'] += 1
+        
+        return summary
+    
+    def refresh_images(self, resize: bool = True) -> Dict[int, Optional[str]]:
+        """
+        Re-check every image recorded in the download manifest
+        
+        Each URL is fetched conditionally, so art that has not changed on the
+        server costs a 304 response and no re-encode.
+        
+        Returns:
+            Dictionary mapping each card ID to its image path, or None if it failed
+        """
+        with self._lock:
+            images = [(entry['card_id'], url) for url, entry in self._load_manifest().items()]
+        return self.download_many(images, resize=resize, overwrite=True)
 
 
 def download_card_image(url: str, card_id: int, pics_dir: str = "../pics", 
@@ -384,6 +1018,59 @@ def download_card_image(url: str, card_id: int, pics_dir: str = "../pics",
     return result is not None
 
 
+def normalize_pics_main(argv) -> int:
+    """Entry point for 'card_creator.py normalize-pics'"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog='card_creator.py normalize-pics',
+        description='Resize and re-encode card images in the pics directory in parallel'
+    )
+    parser.add_argument('--pics-dir', type=str, default='../pics',
+                        help='Images directory (default: ../pics)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Ignore the cache and re-check every file')
+    args = parser.parse_args(argv)
+    
+    downloader = ImageDownloader(args.pics_dir)
+    summary = downloader.normalize_pics(workers=args.workers, force=args.force)
+    
+    print("=" * 70)
+    print(f"Checked: {summary['checked']}  Normalized: {summary['normalized']}  "
+          f"Skipped (cached): {summary['skipped']}  Failed: {len(summary['failed'])}")
+    for name, reason in summary['failed']:
+        print(f"  ✗ {name}: {reason}")
+    print("=" * 70)
+    return 0 if not summary['failed'] else 1
+
+
+def thumbnails_main(argv) -> int:
+    """Entry point for 'card_creator.py thumbnails'"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog='card_creator.py thumbnails',
+        description='Backfill pics/thumbnail (and optionally pics/mid) from the card images'
+    )
+    parser.add_argument('--pics-dir', type=str, default='../pics',
+                        help='Images directory (default: ../pics)')
+    parser.add_argument('--mid', action='store_true', help='Also generate the mid-size tier')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Regenerate every tier file')
+    args = parser.parse_args(argv)
+    
+    downloader = ImageDownloader(args.pics_dir, mid_tier=args.mid)
+    summary = downloader.generate_thumbnails(workers=args.workers, force=args.force)
+    
+    print("=" * 70)
+    print(f"Updated: {summary['updated']}  Up to date: {summary['up_to_date']}  "
+          f"Failed: {len(summary['failed'])}")
+    for name, reason in summary['failed']:
+        print(f"  ✗ {name}: {reason}")
+    print("=" * 70)
+    return 0 if not summary['failed'] else 1
+
+
 if __name__ == "__main__":
     # Test the image downloader
     print("Image Downloader Test")
@@ -3,42 +3,349 @@ Lua Script Generator for Yu-Gi-Oh! Cards
 Generates card scripts from templates based on card type and effects
 """
 
+import hashlib
+import json
 import os
-from typing import Dict, Any, Optional
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, Iterable, Union
 from constants import *
+from asset_index import AssetIndex, replace_file
+
+
+# Template placeholders are upper case ({CARD_ID}); pattern fragments take
+# their parameters by any identifier ({amount}). Lua table constructors such
+# as {c} in a template are therefore never mistaken for placeholders.
+TEMPLATE_PLACEHOLDER = re.compile(r'\{([A-Z][A-Z0-9_]*)\}')
+FRAGMENT_PLACEHOLDER = re.compile(r'\{([A-Za-z_][A-Za-z0-9_]*)\}')
+
+# Placeholders filled when no effect pattern applies
+DEFAULT_EFFECT_VALUES = {
+    'EFFECT_OPERATION': '-- TODO: Add effect operation here',
+    'ADDITIONAL_PROPERTIES': '',
+    'EFFECT_CODE': '-- TODO: Add effect code here',
+    'EFFECT_TYPE': 'Custom Effect',
+}
+
+# Worker threads used by generate_many
+SCRIPT_WORKERS = 8
+
+# Hex digits kept from SHA-256 in the script manifest (64 bits is plenty to
+# tell versions of one card's inputs apart)
+HASH_LENGTH = 16
+
+# Manifest fields describing a script's inputs; regeneration is needed when
+# any of them differs from the current values
+SCRIPT_INPUT_KEYS = ('template', 'template_hash', 'effect_pattern', 'params_hash', 'card_hash')
+
+# Effect patterns live in templates/patterns/<name>.json, triggers and costs
+# in its triggers/ and costs/ subdirectories
+PATTERNS_DIRNAME = 'patterns'
+PATTERN_KINDS = {'effect': '', 'trigger': 'triggers', 'cost': 'costs'}
+PATTERN_NAME = re.compile(r'[A-Za-z0-9_]+')
+PARAM_TYPES = ('int', 'bool', 'string', 'lua')
+# Pattern fields compiled as fragments ({e} is the effect variable, e.g. e2)
+FRAGMENT_FIELDS = ('description', 'setup', 'code', 'properties', 'condition', 'body',
+                   'target', 'operation', 'extra')
+
+# Template used for cards with a list of effects
+COMPOSED_TEMPLATE = 'composed'
+
+# Trigger used when an effect does not name one: (is monster, continuous) -> trigger
+DEFAULT_TRIGGERS = {
+    (False, False): 'activate',
+    (False, True): 'field',
+    (True, False): 'ignition',
+    (True, True): 'monster_field',
+}
+
+# Effect functions a composed effect can register: (part, field, setter, signature)
+EFFECT_FUNCTIONS = [
+    ('trigger', 'condition', 'condition', 'e,tp,eg,ep,ev,re,r,rp'),
+    ('cost', 'body', 'cost', 'e,tp,eg,ep,ev,re,r,rp,chk'),
+    ('pattern', 'target', 'target', 'e,tp,eg,ep,ev,re,r,rp,chk'),
+    ('pattern', 'operation', 'operation', 'e,tp,eg,ep,ev,re,r,rp'),
+]
+
+# Effect pattern keys and the template placeholder each one fills
+PATTERN_SLOTS = [('operation', 'EFFECT_OPERATION'), ('properties', 'ADDITIONAL_PROPERTIES'),
+                 ('code', 'EFFECT_CODE')]
+
+
+def content_hash(text: str) -> str:
+    """Short SHA-256 of a text, as stored in the script manifest"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+
+
+class CompiledTemplate:
+    """
+    A template split at its placeholders
+    
+    The source is scanned once; offsets holds (start, end, name) of every
+    placeholder and literals the text between them, so rendering is a
+    single join instead of one str.replace pass per placeholder.
+    """
+    
+    __slots__ = ('source', 'digest', 'offsets', 'literals', 'names')
+    
+    def __init__(self, source: str, placeholder=TEMPLATE_PLACEHOLDER):
+        self.source = source
+        self.digest = content_hash(source)
+        self.offsets = tuple((m.start(), m.end(), m.group(1)) for m in placeholder.finditer(source))
+        literals = []
+        position = 0
+        for start, end, _ in self.offsets:
+            literals.append(source[position:start])
+            position = end
+        literals.append(source[position:])
+        self.literals = tuple(literals)
+        self.names = tuple(name for _, _, name in self.offsets)
+    
+    @property
+    def placeholders(self) -> List[str]:
+        """Distinct placeholder names in order of first appearance"""
+        return list(dict.fromkeys(self.names))
+    
+    def render(self, values: Dict[str, Any]) -> Tuple[str, List[str]]:
+        """
+        Fill the placeholders in one pass
+        
+        Values are inserted verbatim (never rescanned), and placeholders
+        without a value are kept as written.
+        
+        Args:
+            values: Placeholder name to value (converted with str)
+        
+        Returns:
+            (rendered text, names of unresolved placeholders)
+        """
+        literals = self.literals
+        parts = [literals[0]]
+        unresolved = []
+        for index, name in enumerate(self.names, start=1):
+            value = values.get(name)
+            if value is None:
+                unresolved.append(name)
+                parts.append('{' + name + '}')
+            else:
+                parts.append(str(value))
+            parts.append(literals[index])
+        return ''.join(parts), list(dict.fromkeys(unresolved))
+
+
+# Compiled templates and patterns keyed by path, with the file's (mtime, size)
+# when read
+_template_cache = {}
+_pattern_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_template(template_path: str) -> CompiledTemplate:
+    """
+    Compile a template file, reusing the cached copy while the file is unchanged
+    
+    Raises:
+        OSError: If the file cannot be read
+    """
+    stat = os.stat(template_path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _template_cache.get(template_path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    with open(template_path, 'r', encoding='utf-8') as f:
+        compiled = CompiledTemplate(f.read())
+    with _cache_lock:
+        _template_cache[template_path] = (stamp, compiled)
+    return compiled
+
+
+def _lua_value(value: Any, param_type: str, name: str) -> str:
+    """Lua source for a typed pattern parameter"""
+    if param_type == 'int':
+        try:
+            if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+                raise ValueError
+            return str(int(value, 0) if isinstance(value, str) else int(value))
+        except (TypeError, ValueError):
+            raise ValueError(f"Parameter '{name}' must be an integer, got {value!r}")
+    if param_type == 'bool':
+        if isinstance(value, str):
+            value = value.strip().lower() in ('1', 'true', 'yes', 'y')
+        return 'true' if value else 'false'
+    if param_type == 'string':
+        # JSON string escapes are valid Lua escapes once non-ASCII is kept as is
+        return json.dumps(str(value), ensure_ascii=False)
+    return str(value)
+
+
+class EffectPattern:
+    """
+    One effect, trigger or cost pattern with typed parameters
+    
+    Every fragment is compiled when the file is loaded, so rendering a
+    pattern for thousands of cards never rescans its text.
+    """
+    
+    __slots__ = ('name', 'kind', 'data', 'params', 'fragments', 'category', 'continuous')
+    
+    def __init__(self, name: str, kind: str, data: Dict[str, Any]):
+        """
+        Raises:
+            ValueError: If the pattern definition is invalid
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"{kind} pattern '{name}' must be a JSON object")
+        self.name = name
+        self.kind = kind
+        self.data = data
+        self.params = {}
+        for param, spec in (data.get('params') or {}).items():
+            spec = {'type': spec} if isinstance(spec, str) else dict(spec)
+            if spec.get('type', 'lua') not in PARAM_TYPES:
+                raise ValueError(f"{kind} pattern '{name}': parameter '{param}' has unknown type "
+                                 f"'{spec.get('type')}' (use {', '.join(PARAM_TYPES)})")
+            if param == 'e':
+                raise ValueError(f"{kind} pattern '{name}': 'e' is reserved for the effect variable")
+            spec.setdefault('type', 'lua')
+            self.params[param] = spec
+        self.fragments = {field: CompiledTemplate(data[field], FRAGMENT_PLACEHOLDER)
+                          for field in FRAGMENT_FIELDS if isinstance(data.get(field), str)}
+        self.category = data.get('category')
+        self.continuous = bool(data.get('continuous', False))
+    
+    def has(self, field: str) -> bool:
+        """Check whether the pattern defines a fragment"""
+        return field in self.fragments
+    
+    def values(self, params: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Lua source of each declared parameter (given value or default)
+        
+        Parameters without a value or default are left out, so they show up
+        as unresolved placeholders. Parameters the pattern does not declare
+        are ignored.
+        
+        Raises:
+            ValueError: If a value does not match its type
+        """
+        values = {}
+        for param, spec in self.params.items():
+            if param in params:
+                values[param] = _lua_value(params[param], spec['type'], param)
+            elif 'default' in spec:
+                values[param] = _lua_value(spec['default'], spec['type'], param)
+        return values
+    
+    def render(self, field: str, values: Dict[str, Any]) -> Tuple[str, List[str]]:
+        """Render one fragment (see CompiledTemplate.render)"""
+        return self.fragments[field].render(values)
+
+
+def load_pattern(path: str, name: str, kind: str) -> EffectPattern:
+    """
+    Load a pattern file, reusing the cached copy while the file is unchanged
+    
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If it is not a valid pattern
+    """
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _pattern_cache.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"Invalid {kind} pattern {path}: {e}")
+    pattern = EffectPattern(name, kind, data)
+    with _cache_lock:
+        _pattern_cache[path] = (stamp, pattern)
+    return pattern
+
+
+class PatternRegistry:
+    """
+    Effect, trigger and cost patterns loaded on demand from a directory
+    
+    A pattern is read and compiled the first time it is used and reread
+    only when its file changes; adding a pattern is dropping a .json file
+    into the directory.
+    """
+    
+    def __init__(self, directory: str):
+        """
+        Initialize pattern registry
+        
+        Args:
+            directory: Directory with <name>.json effect patterns and the
+                triggers/ and costs/ subdirectories
+        """
+        self.directory = directory
+    
+    def _kind_directory(self, kind: str) -> str:
+        """Directory holding the patterns of one kind"""
+        if kind not in PATTERN_KINDS:
+            raise ValueError(f"Unknown pattern kind '{kind}'")
+        return os.path.join(self.directory, PATTERN_KINDS[kind])
+    
+    def get(self, name: str, kind: str = 'effect') -> EffectPattern:
+        """
+        Get a pattern by name
+        
+        Raises:
+            ValueError: If the pattern does not exist or is invalid
+        """
+        if not isinstance(name, str) or not PATTERN_NAME.fullmatch(name):
+            raise ValueError(f"Invalid {kind} pattern name {name!r}")
+        path = os.path.join(self._kind_directory(kind), f"{name}.json")
+        try:
+            return load_pattern(path, name, kind)
+        except FileNotFoundError:
+            raise ValueError(f"Unknown {kind} pattern '{name}' (available: "
+                             f"{', '.join(self.names(kind)) or 'none'})")
+    
+    def names(self, kind: str = 'effect') -> List[str]:
+        """Names of the available patterns of one kind, sorted"""
+        directory = self._kind_directory(kind)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(directory)
+                      if name.endswith('.json') and PATTERN_NAME.fullmatch(name[:-5]))
+
+
+def write_script_atomic(filepath: str, content: str):
+    """
+    Write a script through a temporary file in the same directory and os.replace
+    
+    EDOPro never sees a half-written script: the old file stays in place until
+    the new one is complete.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(filepath) or '.', prefix='.tmp-', suffix='.lua')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        replace_file(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# A single effect pattern name, or a list of effects to compose
+EffectSpec = Union[str, List[Any], None]
 
 
 class ScriptGenerator:
     """Generates Lua scripts for Yu-Gi-Oh! cards"""
     
-    # Common effect patterns
-    EFFECT_PATTERNS = {
-        'recover_lp': {
-            'operation': 'Duel.Recover(tp,{amount},REASON_EFFECT)',
-            'properties': 'e1:SetProperty(EFFECT_FLAG_PLAYER_TARGET)',
-            'description': 'Recover {amount} Life Points'
-        },
-        'damage': {
-            'operation': 'Duel.Damage(1-tp,{amount},REASON_EFFECT)',
-            'properties': 'e1:SetProperty(EFFECT_FLAG_PLAYER_TARGET)',
-            'description': 'Inflict {amount} damage to opponent'
-        },
-        'draw': {
-            'operation': 'Duel.Draw(tp,{amount},REASON_EFFECT)',
-            'properties': '',
-            'description': 'Draw {amount} card(s)'
-        },
-        'atk_boost': {
-            'code': 'e1:SetCode(EFFECT_UPDATE_ATTACK)',
-            'properties': 'e1:SetTargetRange(LOCATION_MZONE,0)\n\te1:SetValue({amount})',
-            'description': 'All your monsters gain {amount} ATK'
-        },
-        'def_boost': {
-            'code': 'e1:SetCode(EFFECT_UPDATE_DEFENSE)',
-            'properties': 'e1:SetTargetRange(LOCATION_MZONE,0)\n\te1:SetValue({amount})',
-            'description': 'All your monsters gain {amount} DEF'
-        }
-    }
+    # Card ID -> input hashes and output hash of every generated script
+    MANIFEST_FILENAME = '.script_manifest.json'
     
     def __init__(self, templates_dir: str = None, output_dir: str = None):
         """
@@ -55,6 +362,10 @@ class ScriptGenerator:
         
         self.templates_dir = templates_dir
         self.output_dir = output_dir
+        self.patterns = PatternRegistry(os.path.join(templates_dir, PATTERNS_DIRNAME))
+        self._manifest = None
+        self._manifest_dirty = False
+        self._lock = threading.Lock()
         self._ensure_output_dir()
     
     def _ensure_output_dir(self):
@@ -63,26 +374,136 @@ class ScriptGenerator:
             os.makedirs(self.output_dir)
             print(f"Created directory: {self.output_dir}")
     
-    def _load_template(self, template_name: str) -> Optional[str]:
+    @property
+    def manifest_path(self) -> str:
+        """Path of the script manifest inside the output directory"""
+        return os.path.join(self.output_dir, self.MANIFEST_FILENAME)
+    
+    def _load_manifest(self) -> Dict[str, Dict]:
+        """Load the script manifest (call with self._lock held)"""
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+    
+    def save_manifest(self):
+        """Write pending manifest changes to disk atomically"""
+        with self._lock:
+            if not self._manifest_dirty:
+                return
+            fd, temp_path = tempfile.mkstemp(dir=self.output_dir, prefix='.tmp-', suffix='.json')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self._manifest, f, indent=1, sort_keys=True)
+                replace_file(temp_path, self.manifest_path)
+                self._manifest_dirty = False
+            except OSError as e:
+                print(f"Warning: Could not save script manifest: {e}")
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+    
+    def manifest_entry(self, card_id: int) -> Optional[Dict[str, Any]]:
+        """Manifest entry of a generated script, or None if it was not generated here"""
+        with self._lock:
+            entry = self._load_manifest().get(str(card_id))
+        return dict(entry) if entry else None
+    
+    def manifest_ids(self) -> List[int]:
+        """IDs of every card whose script is in the manifest"""
+        with self._lock:
+            return sorted(int(key) for key in self._load_manifest())
+    
+    def script_inputs(self, card_data: Dict[str, Any], effect_pattern: EffectSpec = None,
+                      effect_params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Describe what a card's script is generated from
+        
+        Returns:
+            Manifest fields (template name and hash, effect pattern and
+            parameters with their hash, card hash), or None if the template
+            is missing
+        """
+        template_name = self._template_name_for(card_data['type'], effect_pattern)
+        template = self._load_template(template_name)
+        if template is None:
+            return None
+        pattern = self._pattern_sources(card_data['type'], effect_pattern)
+        return {
+            'template': template_name,
+            'template_hash': template.digest,
+            'effect_pattern': effect_pattern,
+            'effect_params': effect_params,
+            # The pattern's fragments count as parameters: editing a pattern
+            # changes every script that uses it
+            'params_hash': content_hash(json.dumps([pattern, effect_params], sort_keys=True, default=str)),
+            'card_hash': content_hash(json.dumps([card_data['id'], card_data['name'],
+                                                  card_data.get('desc', ''), card_data['type']])),
+        }
+    
+    def _pattern_sources(self, card_type: int, effect_pattern: EffectSpec) -> Any:
+        """Definitions of every pattern a script uses (None for missing ones)"""
+        if isinstance(effect_pattern, (list, tuple)):
+            sources = []
+            for number, spec in enumerate(effect_pattern, start=1):
+                try:
+                    sources.append([part.data if part else None
+                                    for part in self._effect_parts(card_type, spec, number)])
+                except ValueError:
+                    sources.append(None)
+            return sources
+        if not effect_pattern:
+            return None
+        try:
+            return self.patterns.get(effect_pattern).data
+        except ValueError:
+            return None
+    
+    def _record_script(self, card_id: int, inputs: Optional[Dict[str, Any]], script: str):
+        """Store a written script's inputs and output hash in the manifest"""
+        if inputs is None:
+            return
+        with self._lock:
+            self._load_manifest()[str(card_id)] = dict(inputs, output_hash=content_hash(script))
+            self._manifest_dirty = True
+    
+    def _read_script(self, card_id: int) -> Optional[str]:
+        """Current content of a card's script (newlines normalized), or None if missing"""
+        try:
+            with open(os.path.join(self.output_dir, f"c{card_id}.lua"), 'r', encoding='utf-8') as f:
+                return f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+    
+    def is_hand_edited(self, card_id: int) -> bool:
+        """Check whether a generated script was changed since it was written"""
+        entry = self.manifest_entry(card_id)
+        script = self._read_script(card_id)
+        return bool(entry) and script is not None and content_hash(script) != entry.get('output_hash')
+    
+    def _load_template(self, template_name: str, verbose: bool = True) -> Optional[CompiledTemplate]:
         """
-        Load a template file
+        Load a compiled template (read from disk only when the file changed)
         
         Args:
             template_name: Name of template file (without .lua extension)
+            verbose: Print why the template could not be loaded
         
         Returns:
-            Template content as string or None if not found
+            Compiled template or None if not found
         """
         template_path = os.path.join(self.templates_dir, f"{template_name}.lua")
+        log = printer(verbose)
         
         try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                return f.read()
+            return load_template(template_path)
         except FileNotFoundError:
-            print(f"Error: Template not found: {template_path}")
+            log(f"Error: Template not found: {template_path}")
             return None
         except Exception as e:
-            print(f"Error loading template: {e}")
+            log(f"Error loading template: {e}")
             return None
     
     def _get_template_name(self, card_type: int) -> str:
@@ -117,74 +538,208 @@ class ScriptGenerator:
         
         return 'spell_basic'  # Default
     
-    def generate_script(self, card_data: Dict[str, Any], effect_pattern: Optional[str] = None,
+    def _template_name_for(self, card_type: int, effect_pattern: EffectSpec) -> str:
+        """Template for a card: the composed template for a list of effects"""
+        if isinstance(effect_pattern, (list, tuple)):
+            return COMPOSED_TEMPLATE
+        return self._get_template_name(card_type)
+    
+    def generate_script(self, card_data: Dict[str, Any], effect_pattern: EffectSpec = None,
                        effect_params: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """
         Generate a Lua script for a card
         
         Args:
             card_data: Dictionary containing card information (must include 'id', 'name', 'type')
-            effect_pattern: Name of effect pattern to use (e.g., 'recover_lp', 'draw')
+            effect_pattern: Name of effect pattern to use (e.g., 'recover_lp', 'draw'),
+                or a list of effects to compose (see compose_effects)
             effect_params: Parameters for the effect pattern (e.g., {'amount': 500})
         
         Returns:
             Generated script content or None if failed
         """
+        rendered = self.render_script(card_data, effect_pattern, effect_params)
+        if rendered is None:
+            return None
+        
+        script, unresolved = rendered
+        if unresolved:
+            print(f"Warning: Unresolved placeholders in script for card {card_data['id']}: "
+                  f"{', '.join('{' + name + '}' for name in unresolved)}")
+        return script
+    
+    def render_script(self, card_data: Dict[str, Any], effect_pattern: EffectSpec = None,
+                      effect_params: Optional[Dict[str, Any]] = None,
+                      verbose: bool = True) -> Optional[Tuple[str, List[str]]]:
+        """
+        Render a card's script and report the placeholders left unfilled
+        
+        Same arguments as generate_script; verbose=False keeps errors off stdout.
+        
+        Returns:
+            (script, unresolved placeholder names) or None if failed
+        """
+        log = printer(verbose)
+        
         # Validate required fields
         if 'id' not in card_data or 'name' not in card_data or 'type' not in card_data:
-            print("Error: card_data must include 'id', 'name', and 'type'")
+            log("Error: card_data must include 'id', 'name', and 'type'")
             return None
         
-        card_id = card_data['id']
-        card_name = card_data['name']
-        card_type = card_data['type']
-        effect_desc = card_data.get('desc', '')
+        if isinstance(effect_pattern, (list, tuple)):
+            try:
+                return self.compose_effects(card_data, effect_pattern)
+            except ValueError as e:
+                log(f"Error: Card {card_data['id']}: {e}")
+                return None
         
         # Get appropriate template
-        template_name = self._get_template_name(card_type)
-        template = self._load_template(template_name)
-        
-        if not template:
+        template = self._load_template(self._get_template_name(card_data['type']), verbose)
+        if template is None:
             return None
         
-        # Replace basic placeholders
-        script = template.replace('{CARD_ID}', str(card_id))
-        script = script.replace('{CARD_NAME}', card_name)
-        script = script.replace('{EFFECT_DESC}', effect_desc)
+        values = {
+            'CARD_ID': card_data['id'],
+            'CARD_NAME': card_data['name'],
+            'EFFECT_DESC': card_data.get('desc', ''),
+        }
+        unresolved = []
+        
+        pattern = None
+        if effect_pattern:
+            try:
+                pattern = self.patterns.get(effect_pattern)
+            except ValueError as e:
+                log(f"Warning: {e}")
         
         # Apply effect pattern if specified
-        if effect_pattern and effect_pattern in self.EFFECT_PATTERNS:
-            pattern = self.EFFECT_PATTERNS[effect_pattern]
-            params = effect_params or {}
-            
-            # Replace operation
-            if 'operation' in pattern:
-                operation = pattern['operation']
-                for key, value in params.items():
-                    operation = operation.replace(f'{{{key}}}', str(value))
-                script = script.replace('{EFFECT_OPERATION}', operation)
+        if pattern is not None:
+            try:
+                params = pattern.values(effect_params or {})
+            except ValueError as e:
+                log(f"Error: Card {card_data['id']}: {e}")
+                return None
+            # Single-pattern templates hard-code the effect variable e1
+            params['e'] = 'e1'
+            for key, placeholder in PATTERN_SLOTS:
+                if pattern.has(key):
+                    values[placeholder], missing = pattern.render(key, params)
+                    unresolved.extend(missing)
+        else:
+            # Fill effect placeholders with defaults if no pattern specified
+            values.update(DEFAULT_EFFECT_VALUES)
+        
+        script, missing = template.render(values)
+        unresolved.extend(missing)
+        return script, list(dict.fromkeys(unresolved))
+    
+    def _effect_parts(self, card_type: int, spec: Any,
+                      number: int) -> Tuple[EffectPattern, EffectPattern, Optional[EffectPattern]]:
+        """Resolve one effect of a composed script into its pattern, trigger and cost"""
+        if isinstance(spec, str):
+            spec = {'pattern': spec}
+        if not isinstance(spec, dict) or not spec.get('pattern'):
+            raise ValueError(f"Effect {number} needs a 'pattern'")
+        pattern = self.patterns.get(spec['pattern'])
+        trigger_name = spec.get('trigger') or DEFAULT_TRIGGERS[(is_monster(card_type), pattern.continuous)]
+        trigger = self.patterns.get(trigger_name, 'trigger')
+        cost = self.patterns.get(spec['cost'], 'cost') if spec.get('cost') else None
+        return pattern, trigger, cost
+    
+    def compose_effects(self, card_data: Dict[str, Any],
+                        effects: List[Any]) -> Tuple[str, List[str]]:
+        """
+        Render a script with several effects, e1 to eN
+        
+        Each effect is a pattern name or a dictionary with:
+            pattern: Effect pattern (templates/patterns/<name>.json)
+            trigger: Trigger pattern (templates/patterns/triggers/); default
+                'activate' for spells and traps, 'ignition' for monsters
+                ('field' / 'monster_field' for continuous patterns)
+            cost: Optional cost pattern (templates/patterns/costs/)
+            params: Parameters for the pattern, trigger and cost together
+        
+        A spell or trap without an 'activate' effect gets a plain activation
+        effect so it can be played.
+        
+        Args:
+            card_data: Dictionary containing card information (must include 'id', 'name', 'type')
+            effects: Effects in order
+        
+        Returns:
+            (script, unresolved placeholder names)
+        
+        Raises:
+            ValueError: For unknown patterns, parameters or invalid values
+        """
+        template = self._load_template(COMPOSED_TEMPLATE)
+        if template is None:
+            raise ValueError(f"Template '{COMPOSED_TEMPLATE}' not found")
+        if not effects:
+            raise ValueError("At least one effect is required")
+        card_id = card_data['id']
+        blocks = []
+        functions = []
+        unresolved = []
+        activated = False
+        
+        for number, spec in enumerate(effects, start=1):
+            parts = dict(zip(('pattern', 'trigger', 'cost'),
+                             self._effect_parts(card_data['type'], spec, number)))
+            params = (spec.get('params') if isinstance(spec, dict) else None) or {}
+            unknown = set(params).difference(*(part.params for part in parts.values() if part))
+            if unknown:
+                raise ValueError(f"Effect {number}: unknown parameter(s) {', '.join(sorted(unknown))}")
+            values = {}
+            for part in parts.values():
+                if part is not None:
+                    values.update(part.values(params))
+            values['e'] = f"e{number}"
             
-            # Replace properties
-            if 'properties' in pattern:
-                properties = pattern['properties']
-                for key, value in params.items():
-                    properties = properties.replace(f'{{{key}}}', str(value))
-                script = script.replace('{ADDITIONAL_PROPERTIES}', properties)
+            def fragment(part: EffectPattern, field: str) -> str:
+                text, missing = part.render(field, values)
+                unresolved.extend(missing)
+                return text
             
-            # Replace effect code
-            if 'code' in pattern:
-                code = pattern['code']
-                for key, value in params.items():
-                    code = code.replace(f'{{{key}}}', str(value))
-                script = script.replace('{EFFECT_CODE}', code)
-        else:
-            # Remove placeholder tags if no pattern specified
-            script = script.replace('{EFFECT_OPERATION}', '-- TODO: Add effect operation here')
-            script = script.replace('{ADDITIONAL_PROPERTIES}', '')
-            script = script.replace('{EFFECT_CODE}', '-- TODO: Add effect code here')
-            script = script.replace('{EFFECT_TYPE}', 'Custom Effect')
+            pattern, trigger = parts['pattern'], parts['trigger']
+            activated = activated or trigger.name == 'activate'
+            description = fragment(pattern, 'description') if pattern.has('description') else pattern.name
+            lines = [f"\t-- Effect {number}: {description}",
+                     f"\tlocal e{number}=Effect.CreateEffect(c)"]
+            if pattern.category:
+                lines.append(f"\te{number}:SetCategory({pattern.category})")
+            for part, field in ((trigger, 'setup'), (pattern, 'code'), (pattern, 'properties')):
+                if part.has(field):
+                    text = fragment(part, field)
+                    if text:
+                        lines.append('\t' + text)
+            for part_name, field, setter, signature in EFFECT_FUNCTIONS:
+                part = parts[part_name]
+                if part is None or not part.has(field):
+                    continue
+                function = f"c{card_id}.{setter}{number}"
+                lines.append(f"\te{number}:Set{setter.capitalize()}({function})")
+                functions.append(f"\n-- Effect {number} {setter}\nfunction {function}({signature})\n"
+                                 f"\t{fragment(part, field)}\nend\n")
+            lines.append(f"\tc:RegisterEffect(e{number})")
+            if trigger.has('extra'):
+                lines.append('\t' + fragment(trigger, 'extra'))
+            blocks.append('\n'.join(lines))
         
-        return script
+        if not activated and not is_monster(card_data['type']):
+            blocks.insert(0, "\t-- Activate\n\tlocal e0=Effect.CreateEffect(c)\n"
+                             "\te0:SetType(EFFECT_TYPE_ACTIVATE)\n\te0:SetCode(EVENT_FREE_CHAIN)\n"
+                             "\tc:RegisterEffect(e0)")
+        
+        script, missing = template.render({
+            'CARD_ID': card_id,
+            'CARD_NAME': card_data['name'],
+            'EFFECT_DESC': card_data.get('desc', ''),
+            'EFFECTS': '\n'.join(blocks),
+            'FUNCTIONS': ''.join(functions),
+        })
+        unresolved.extend(missing)
+        return script, list(dict.fromkeys(unresolved))
     
     def save_script(self, card_id: int, script_content: str, overwrite: bool = False) -> bool:
         """
@@ -208,8 +763,7 @@ class ScriptGenerator:
             return False
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(script_content)
+            write_script_atomic(filepath, script_content)
             print(f"✓ Script saved: {filepath}")
             return True
         except Exception as e:
@@ -236,7 +790,129 @@ class ScriptGenerator:
         if not script:
             return False
         
-        return self.save_script(card_data['id'], script, overwrite)
+        if not self.save_script(card_data['id'], script, overwrite):
+            return False
+        self._record_script(card_data['id'], self.script_inputs(card_data, effect_pattern, effect_params),
+                            script)
+        self.save_manifest()
+        return True
+    
+    def generate_many(self, cards: Iterable[Union[Dict[str, Any], Tuple]], overwrite: bool = False,
+                      workers: int = SCRIPT_WORKERS, verbose: bool = True) -> Dict[str, Any]:
+        """
+        Generate and save scripts for many cards concurrently
+        
+        Existing scripts are found with one listing of the output directory
+        instead of a stat per card, and every file is written atomically.
+        
+        Args:
+            cards: Card dictionaries, or (card_data, effect_pattern, effect_params)
+                tuples for cards with an effect pattern
+            overwrite: Whether to overwrite existing files
+            workers: Number of worker threads
+            verbose: Print per-card errors and the result summary
+        
+        Returns:
+            Dictionary with 'written' (count), 'skipped' (IDs whose script
+            already exists), 'failed' (list of (card_id, reason) tuples) and
+            'unresolved' (card ID to placeholders left unfilled)
+        """
+        result = {'written': 0, 'skipped': [], 'failed': [], 'unresolved': {}}
+        existing = set() if overwrite else AssetIndex(None, self.output_dir).script_ids()
+        jobs = []
+        for item in cards:
+            card_data, effect_pattern, effect_params = (item, None, None) if isinstance(item, dict) else item
+            if card_data.get('id') in existing:
+                result['skipped'].append(card_data['id'])
+            else:
+                jobs.append((card_data, effect_pattern, effect_params))
+        
+        def process(job: Tuple[Dict[str, Any], Optional[str], Optional[Dict[str, Any]]]):
+            card_data, effect_pattern, effect_params = job
+            rendered = self.render_script(card_data, effect_pattern, effect_params, verbose)
+            if rendered is None:
+                return card_data.get('id'), None, "Script generation failed"
+            script, unresolved = rendered
+            try:
+                write_script_atomic(os.path.join(self.output_dir, f"c{card_data['id']}.lua"), script)
+            except OSError as e:
+                return card_data['id'], unresolved, str(e)
+            self._record_script(card_data['id'],
+                                self.script_inputs(card_data, effect_pattern, effect_params), script)
+            return card_data['id'], unresolved, None
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for card_id, unresolved, error in executor.map(process, jobs):
+                if error:
+                    result['failed'].append((card_id, error))
+                    continue
+                result['written'] += 1
+                if unresolved:
+                    result['unresolved'][card_id] = unresolved
+        self.save_manifest()
+        
+        log = printer(verbose)
+        log(f"✓ Generated {result['written']} scripts ({len(result['skipped'])} skipped, "
+            f"{len(result['failed'])} failed)")
+        if result['unresolved']:
+            log(f"Warning: {len(result['unresolved'])} script(s) have unresolved placeholders")
+        return result
+    
+    def regenerate(self, cards: Dict[int, Dict[str, Any]], changed_only: bool = True,
+                   force: bool = False, workers: int = SCRIPT_WORKERS) -> Dict[str, Any]:
+        """
+        Rewrite the scripts in the manifest from the current card data
+        
+        The effect pattern and parameters come from each card's manifest
+        entry. A script whose file no longer matches its recorded output
+        hash was edited by hand and is left alone unless force is set.
+        Checking an unchanged card only compares hashes, so a routine run
+        reads no scripts and renders nothing.
+        
+        Args:
+            cards: Current card data by ID (e.g. from DatabaseManager.iter_cards)
+            changed_only: Only rewrite scripts whose inputs changed (or whose
+                file is missing)
+            force: Also overwrite hand-edited scripts
+            workers: Number of worker threads
+        
+        Returns:
+            Dictionary with 'written', 'unchanged' (counts), 'edited' (IDs of
+            hand-edited scripts kept), 'missing' (manifest IDs without card
+            data) and 'failed' (list of (card_id, reason) tuples)
+        """
+        result = {'written': 0, 'unchanged': 0, 'edited': [], 'missing': [], 'failed': []}
+        with self._lock:
+            manifest = {int(key): dict(entry) for key, entry in self._load_manifest().items()}
+        present = AssetIndex(None, self.output_dir).script_ids()
+        jobs = []
+        
+        for card_id in sorted(manifest):
+            entry = manifest[card_id]
+            card_data = cards.get(card_id)
+            if card_data is None:
+                result['missing'].append(card_id)
+                continue
+            effect_pattern, effect_params = entry.get('effect_pattern'), entry.get('effect_params')
+            inputs = self.script_inputs(card_data, effect_pattern, effect_params)
+            if inputs is None:
+                result['failed'].append((card_id, "Template not found"))
+                continue
+            exists = card_id in present
+            if (changed_only and exists
+                    and all(inputs[key] == entry.get(key) for key in SCRIPT_INPUT_KEYS)):
+                result['unchanged'] += 1
+                continue
+            if exists and not force and self.is_hand_edited(card_id):
+                result['edited'].append(card_id)
+                continue
+            jobs.append((card_data, effect_pattern, effect_params))
+        
+        if jobs:
+            written = self.generate_many(jobs, overwrite=True, workers=workers)
+            result['written'] = written['written']
+            result['failed'].extend(written['failed'])
+        return result
     
     def delete_script(self, card_id: int) -> bool:
         """
@@ -257,22 +933,32 @@ class ScriptGenerator:
         
         try:
             os.remove(filepath)
+            with self._lock:
+                if self._load_manifest().pop(str(card_id), None) is not None:
+                    self._manifest_dirty = True
+            self.save_manifest()
             print(f"✓ Deleted script: {filepath}")
             return True
         except Exception as e:
             print(f"✗ Error deleting script: {e}")
             return False
     
-    def list_available_patterns(self) -> Dict[str, str]:
+    def list_available_patterns(self, kind: str = 'effect') -> Dict[str, str]:
         """
-        Get list of available effect patterns with descriptions
+        Get list of available patterns with descriptions
+        
+        Args:
+            kind: 'effect', 'trigger' or 'cost'
         
         Returns:
             Dictionary of pattern names and descriptions
         """
         patterns = {}
-        for name, pattern in self.EFFECT_PATTERNS.items():
-            patterns[name] = pattern.get('description', name)
+        for name in self.patterns.names(kind):
+            try:
+                patterns[name] = self.patterns.get(name, kind).data.get('description', name)
+            except ValueError as e:
+                print(f"Warning: {e}")
         return patterns
 
 
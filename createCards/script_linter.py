@@ -0,0 +1,371 @@
+"""
+Lua Script Linter
+Checks card scripts before EDOPro loads them: unbalanced blocks and
+brackets, template placeholders left in the text, and initial_effect
+functions that do not belong to the file's card
+"""
+
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, Iterable
+
+from asset_index import replace_file
+from collision_checker import CollisionChecker, _contains
+from script_generator import content_hash, load_template, TEMPLATE_PLACEHOLDER
+
+
+# Card scripts are script/c<ID>.lua; other .lua files there (utility
+# libraries) are not card scripts and are not linted
+SCRIPT_FILENAME = re.compile(r'c(\d+)\.lua')
+
+# Bumped whenever the checks change, so cached results from an older linter
+# are not reused
+LINT_VERSION = 1
+
+# Results cache kept next to the scripts
+LINT_CACHE_FILENAME = '.lint_cache.json'
+
+# Below this many files to check, the process pool costs more than it saves
+PARALLEL_MIN_FILES = 64
+LINT_CHUNK_SIZE = 32
+
+# One alternative per Lua token; long comments and strings come before the
+# short forms so '--[[' and '[[' are not read as a line comment or brackets
+LUA_TOKEN = re.compile(r"""
+    (?P<comment>--\[(?P<comment_level>=*)\[.*?\](?P=comment_level)\]|--[^\n]*)
+  | (?P<string>\[(?P<string_level>=*)\[.*?\](?P=string_level)\]
+        |"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<unfinished>--\[=*\[|\[=*\[|["'])
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<number>0[xX][0-9A-Fa-f.]+(?:[pP][+-]?\d+)?|\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)
+  | (?P<symbol>\.\.\.|\.\.|==|~=|<=|>=|::|//|<<|>>|[-+*/%^\#&~|<>=(){}\[\];:,.])
+  | (?P<space>\s+)
+  | (?P<invalid>.)
+""", re.DOTALL | re.VERBOSE)
+
+# Keywords opening a block closed by 'end' ('while' and 'for' open theirs
+# with 'do'); 'repeat' is closed by 'until'
+BLOCK_OPENERS = {'function', 'if', 'do', 'repeat'}
+BRACKETS = {')': '(', ']': '[', '}': '{'}
+
+
+def _line(text: str, position: int) -> int:
+    """1-based line number of a position in text"""
+    return text.count('\n', 0, position) + 1
+
+
+def lint_source(text: str, card_id: int,
+                placeholders: Iterable[str] = ()) -> List[Tuple[int, str]]:
+    """
+    Tokenize a card script and check its structure
+    
+    Args:
+        text: Script source
+        card_id: Card ID from the file name
+        placeholders: Template placeholder names to report when left in the text
+    
+    Returns:
+        Issues as (line, message), sorted by line
+    """
+    issues = []
+    stack = []
+    has_initial_effect = False
+    # Tokens after 'function' up to the parameter list, e.g. c123 . initial_effect
+    signature = None
+    
+    for match in LUA_TOKEN.finditer(text):
+        kind = match.lastgroup
+        if kind in ('space', 'comment', 'string'):
+            continue
+        token = match.group()
+        position = match.start()
+        
+        if kind in ('unfinished', 'invalid'):
+            if kind == 'unfinished':
+                what = 'long comment' if token.startswith('--') else 'string'
+                issues.append((_line(text, position), f"Unfinished {what}"))
+                # Nothing after an unfinished string or comment can be trusted
+                stack.clear()
+                break
+            issues.append((_line(text, position), f"Unexpected character {token!r}"))
+            continue
+        
+        if signature is not None:
+            if token == '(' or len(signature) == 3:
+                if len(signature) == 3 and signature[1] in ('.', ':'):
+                    owner, method = signature[0], signature[2]
+                    if method == 'initial_effect':
+                        has_initial_effect = True
+                    # Scripts using 'local s,id=GetID()' define s.initial_effect
+                    owner_id = SCRIPT_FILENAME.fullmatch(owner + '.lua')
+                    if owner_id and int(owner_id.group(1)) != card_id:
+                        issues.append((_line(text, position),
+                                       f"function {owner}.{method} does not belong to card {card_id}"))
+                signature = None
+            else:
+                signature.append(token)
+        
+        if kind == 'name':
+            if token in BLOCK_OPENERS:
+                stack.append((token, position))
+                if token == 'function':
+                    signature = []
+            elif token in ('end', 'until'):
+                if not stack:
+                    issues.append((_line(text, position), f"'{token}' without an open block"))
+                    continue
+                if stack[-1][0] in ('(', '[', '{'):
+                    opener, opened_at = stack[-1]
+                    issues.append((_line(text, position), f"'{token}' inside '{opener}' "
+                                   f"from line {_line(text, opened_at)}"))
+                    continue
+                opener, opened_at = stack[-1]
+                if (opener == 'repeat') != (token == 'until'):
+                    issues.append((_line(text, position), f"'{token}' closes '{opener}' "
+                                   f"from line {_line(text, opened_at)}"))
+                stack.pop()
+        elif kind == 'symbol':
+            if token in ('(', '[', '{'):
+                stack.append((token, position))
+            elif token in BRACKETS:
+                if stack and stack[-1][0] == BRACKETS[token]:
+                    stack.pop()
+                    continue
+                if stack:
+                    opener, opened_at = stack[-1]
+                    issues.append((_line(text, position), f"'{token}' closes '{opener}' "
+                                   f"from line {_line(text, opened_at)}"))
+                    if opener in ('(', '[', '{'):
+                        stack.pop()
+                else:
+                    issues.append((_line(text, position), f"'{token}' without an opening bracket"))
+    
+    for opener, opened_at in stack:
+        closer = {'(': ')', '[': ']', '{': '}', 'repeat': 'until'}.get(opener, 'end')
+        issues.append((_line(text, opened_at), f"'{opener}' is never closed with '{closer}'"))
+    
+    names = set(placeholders)
+    if names:
+        for match in TEMPLATE_PLACEHOLDER.finditer(text):
+            if match.group(1) in names:
+                issues.append((_line(text, match.start()), f"Unfilled template placeholder {match.group()}"))
+    
+    if not has_initial_effect:
+        issues.append((1, f"No initial_effect function (expected c{card_id}.initial_effect)"))
+    issues.sort(key=lambda issue: issue[0])
+    return issues
+
+
+def _lint_file(path: str, cached_hash: Optional[str],
+               placeholders: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    Lint one script file unless its content hash matches the cached result
+    
+    Runs in worker processes, so it only takes and returns plain values.
+    
+    Returns:
+        Dictionary with 'name', 'mtime', 'size', 'hash', 'issues' (None when
+        the cached result still applies) and 'error'
+    """
+    name = os.path.basename(path)
+    result = {'name': name, 'mtime': None, 'size': None, 'hash': None, 'issues': None, 'error': None}
+    try:
+        stat = os.stat(path)
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+    except OSError as e:
+        result['error'] = str(e)
+        return result
+    result.update(mtime=stat.st_mtime_ns, size=stat.st_size, hash=content_hash(text))
+    if result['hash'] != cached_hash:
+        card_id = int(SCRIPT_FILENAME.fullmatch(name).group(1))
+        result['issues'] = [list(issue) for issue in lint_source(text, card_id, placeholders)]
+    return result
+
+
+class ScriptLinter:
+    """
+    Lints every card script in a directory
+    
+    Results are cached per file with its mtime, size and content hash. A
+    file whose stat is unchanged is not even opened; one that was touched
+    but has the same content is not retokenized. The card ID check against
+    the database is not cached, since it depends on the database.
+    """
+    
+    def __init__(self, script_dir: str = "../script", templates_dir: Optional[str] = None):
+        """
+        Initialize script linter
+        
+        Args:
+            script_dir: Directory containing c<ID>.lua scripts
+            templates_dir: Template directory whose placeholders are reported
+                when left in a script (default: the generator's templates)
+        """
+        if templates_dir is None:
+            templates_dir = os.path.join(os.path.dirname(__file__), 'templates')
+        self.script_dir = script_dir
+        self.templates_dir = templates_dir
+        self.placeholders = self._template_placeholders()
+    
+    @property
+    def cache_path(self) -> str:
+        """Path of the results cache inside the script directory"""
+        return os.path.join(self.script_dir, LINT_CACHE_FILENAME)
+    
+    def _template_placeholders(self) -> Tuple[str, ...]:
+        """Placeholder names used by the script templates"""
+        names = set()
+        if os.path.isdir(self.templates_dir):
+            for filename in os.listdir(self.templates_dir):
+                if filename.endswith('.lua'):
+                    try:
+                        names.update(load_template(os.path.join(self.templates_dir, filename)).placeholders)
+                    except OSError as e:
+                        print(f"Warning: Could not read template {filename}: {e}")
+        return tuple(sorted(names))
+    
+    def _cache_key(self) -> str:
+        """Identifies the checks a cached result was produced with"""
+        return f"{LINT_VERSION}:{content_hash(' '.join(self.placeholders))}"
+    
+    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
+        """Cached results by file name (empty if missing or from other checks)"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cache, dict) or cache.get('key') != self._cache_key():
+            return {}
+        return cache.get('files', {})
+    
+    def _save_cache(self, files: Dict[str, Dict[str, Any]]):
+        """Write the results cache atomically"""
+        fd, temp_path = tempfile.mkstemp(dir=self.script_dir, prefix='.tmp-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'key': self._cache_key(), 'files': files}, f, separators=(',', ':'))
+            replace_file(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"Warning: Could not save lint cache: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def lint(self, db_path: Optional[str] = None, workers: Optional[int] = None,
+             force: bool = False) -> Dict[str, Any]:
+        """
+        Lint every c<ID>.lua in the script directory
+        
+        Args:
+            db_path: Card database each script's ID must exist in (None to
+                skip the check)
+            workers: Number of worker processes (default: CPU count)
+            force: Ignore cached results
+        
+        Returns:
+            Summary dictionary with 'checked' and 'cached' counts, 'issues'
+            (file name -> list of (line, message)) and 'failed' list of
+            (file name, reason) tuples
+        """
+        summary = {'checked': 0, 'cached': 0, 'issues': {}, 'failed': []}
+        if not os.path.isdir(self.script_dir):
+            print(f"Error: Script directory not found: {self.script_dir}")
+            return summary
+        
+        cache = {} if force else self._load_cache()
+        files = {}
+        pending = []
+        with os.scandir(self.script_dir) as entries:
+            for entry in entries:
+                if not SCRIPT_FILENAME.fullmatch(entry.name) or not entry.is_file():
+                    continue
+                cached = cache.get(entry.name)
+                stat = entry.stat()
+                if cached and cached['mtime'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+                    files[entry.name] = cached
+                    summary['cached'] += 1
+                else:
+                    pending.append((entry.path, cached['hash'] if cached else None))
+        
+        if pending:
+            paths = [path for path, _ in pending]
+            hashes = [cached_hash for _, cached_hash in pending]
+            placeholders = [self.placeholders] * len(pending)
+            if workers == 1 or len(pending) < PARALLEL_MIN_FILES:
+                results = map(_lint_file, paths, hashes, placeholders)
+                executor = None
+            else:
+                executor = ProcessPoolExecutor(max_workers=workers)
+                results = executor.map(_lint_file, paths, hashes, placeholders, chunksize=LINT_CHUNK_SIZE)
+            try:
+                for result in results:
+                    name = result['name']
+                    if result['error']:
+                        summary['failed'].append((name, result['error']))
+                        continue
+                    if result['issues'] is None:
+                        # Touched but unchanged: keep the cached issues
+                        issues = cache[name]['issues']
+                        summary['cached'] += 1
+                    else:
+                        issues = result['issues']
+                        summary['checked'] += 1
+                    files[name] = {'mtime': result['mtime'], 'size': result['size'],
+                                   'hash': result['hash'], 'issues': issues}
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+        
+        if force or pending or len(files) != len(cache):
+            self._save_cache(files)
+        
+        known_ids = None
+        if db_path:
+            if os.path.exists(db_path):
+                known_ids = CollisionChecker._read_ids(db_path)
+            else:
+                print(f"Warning: Database not found: {db_path} (card IDs not checked)")
+        
+        for card_id, name in sorted((int(SCRIPT_FILENAME.fullmatch(name).group(1)), name) for name in files):
+            issues = [tuple(issue) for issue in files[name]['issues']]
+            if known_ids is not None and not _contains(known_ids, card_id):
+                issues.insert(0, (0, f"Card {card_id} is not in {os.path.basename(db_path)}"))
+            if issues:
+                summary['issues'][name] = issues
+        return summary
+
+
+def lint_scripts_main(argv) -> int:
+    """Entry point for 'card_creator.py lint-scripts'"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog='card_creator.py lint-scripts',
+        description='Check card scripts for unbalanced blocks, leftover placeholders and wrong IDs'
+    )
+    parser.add_argument('--script-dir', type=str, default='../script',
+                        help='Script directory (default: ../script)')
+    parser.add_argument('--db', type=str, default='../expansions/cards.cdb',
+                        help='Database path (default: ../expansions/cards.cdb)')
+    parser.add_argument('--no-db', action='store_true', help='Skip the card ID check against the database')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Ignore cached results and recheck every script')
+    args = parser.parse_args(argv)
+    
+    linter = ScriptLinter(args.script_dir)
+    summary = linter.lint(db_path=None if args.no_db else args.db, workers=args.workers, force=args.force)
+    
+    print("=" * 70)
+    for name, issues in summary['issues'].items():
+        for line, message in issues:
+            print(f"  {name}:{line}: {message}" if line else f"  {name}: {message}")
+    for name, reason in summary['failed']:
+        print(f"  ✗ {name}: {reason}")
+    print(f"Checked: {summary['checked']}  Cached: {summary['cached']}  "
+          f"With issues: {len(summary['issues'])}  Failed: {len(summary['failed'])}")
+    print("=" * 70)
+    return 0 if not (summary['issues'] or summary['failed']) else 1
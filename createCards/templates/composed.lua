@@ -0,0 +1,9 @@
+-- Multi-Effect Card Template
+-- Card ID: {CARD_ID}
+-- Card Name: {CARD_NAME}
+-- Effect: {EFFECT_DESC}
+
+function c{CARD_ID}.initial_effect(c)
+{EFFECTS}
+end
+{FUNCTIONS}
@@ -0,0 +1,38 @@
+"""Tests for asset_index"""
+
+import os
+
+from asset_index import AssetIndex
+
+
+def _touch(path):
+    path.write_bytes(b'')
+    return path
+
+
+def test_image_path_keeps_the_name_on_disk(tmp_path):
+    _touch(tmp_path / '10000100.JPG')
+    _touch(tmp_path / '10000101.Png')
+    index = AssetIndex(str(tmp_path), None)
+    
+    assert index.image_path(10000100) == str(tmp_path / '10000100.JPG')
+    assert os.path.exists(index.image_path(10000100))
+    assert index.image_path(10000101) == str(tmp_path / '10000101.Png')
+    assert index.image_extensions(10000100) == ['.jpg']
+    assert index.has_image(10000101, ['.png'])
+
+
+def test_zero_padded_names_are_not_card_files(tmp_path):
+    pics = tmp_path / 'pics'
+    scripts = tmp_path / 'script'
+    pics.mkdir()
+    scripts.mkdir()
+    _touch(pics / '0123.jpg')
+    _touch(pics / '123.png')
+    _touch(scripts / 'c0456.lua')
+    index = AssetIndex(str(pics), str(scripts))
+    
+    assert index.image_ids() == {123}
+    assert index.image_path(123) == str(pics / '123.png')
+    assert index.script_ids() == set()
+    assert index.script_path(456) is None
@@ -0,0 +1,60 @@
+"""Tests for the DatabaseManager card cache"""
+
+import sqlite3
+
+import pytest
+
+from card_creator import build_card_data
+from database_manager import DatabaseManager, create_blank_database
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'cards.cdb')
+    create_blank_database(path)
+    DatabaseManager(path).add_card(build_card_data(
+        {'id': 10000100, 'name': 'Cached', 'desc': 'Test', 'type': 'spell', 'script': False}))
+    return path
+
+
+def test_cache_serves_repeated_lookups(db_path):
+    db = DatabaseManager(db_path, cache_size=16)
+    
+    assert db.get_card(10000100)['name'] == 'Cached'
+    assert db.get_card(10000100)['name'] == 'Cached'
+    assert not db.card_exists(10000101)
+    assert not db.card_exists(10000101)
+    
+    info = db.cache_info()
+    assert (info['hits'], info['misses'], info['size']) == (2, 2, 2)
+    db.close_cache()
+
+
+def test_cache_sees_writes_from_other_connections(db_path):
+    db = DatabaseManager(db_path, cache_size=16)
+    assert db.get_card(10000100)['name'] == 'Cached'
+    assert not db.card_exists(10000101)
+    
+    # Another manager and a plain connection write to the same file
+    other = DatabaseManager(db_path)
+    other.add_card(build_card_data(
+        {'id': 10000101, 'name': 'Added', 'desc': 'Test', 'type': 'spell', 'script': False}))
+    assert db.card_exists(10000101)
+    
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE texts SET name = 'Renamed' WHERE id = 10000100")
+    conn.commit()
+    conn.close()
+    assert db.get_card(10000100)['name'] == 'Renamed'
+    db.close_cache()
+
+
+def test_cache_does_not_create_a_missing_database(tmp_path):
+    path = tmp_path / 'missing.cdb'
+    db = DatabaseManager(str(path), cache_size=16)
+    
+    assert not db.card_exists(10000100)
+    assert db.get_card(10000100) is None
+    assert not path.exists()
+    with pytest.raises(FileNotFoundError):
+        db._data_version()
@@ -0,0 +1,58 @@
+"""Tests for card_creator"""
+
+import sys
+import threading
+
+import pytest
+
+from card_creator import CardCreator, build_card_data, load_manifest
+from database_manager import create_blank_database
+
+
+@pytest.fixture
+def creator(tmp_path, monkeypatch):
+    # Keep CardCreator's collision checker away from the repository's databases
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / 'cards.cdb')
+    create_blank_database(path)
+    return CardCreator(path, script_dir='script', pics_dir='pics')
+
+
+def test_quiet_batch_leaves_stdout_to_other_threads(creator, tmp_path, capsys):
+    (tmp_path / 'art.jpg').write_bytes(b'not an image')
+    entries = [{'name': f'Card {i}', 'desc': 'Test', 'type': 'spell', 'image': str(tmp_path / 'art.jpg')}
+               for i in range(3)]
+    capsys.readouterr()
+    
+    streams = []
+    process_image = creator._process_image
+    
+    def spy(*args):
+        # Output of unrelated threads must still reach the real stdout
+        streams.append(sys.stdout)
+        thread = threading.Thread(target=print, args=('from another thread',))
+        thread.start()
+        thread.join()
+        return process_image(*args)
+    
+    creator._process_image = spy
+    summary = creator.create_batch(entries, verbose=False)
+    
+    assert (summary['added'], summary['scripts'], summary['images']) == (3, 3, 3)
+    out = capsys.readouterr().out
+    assert out.splitlines() == ['from another thread'] * 3
+    assert all(stream is sys.stdout for stream in streams)
+
+
+def test_csv_manifest_converts_numeric_columns(tmp_path):
+    path = tmp_path / 'cards.csv'
+    path.write_text('id,name,desc,type,ot,atk,def,level,attribute,race,setcode\n'
+                    '0100,Decimal,Test,33,3,0900,0,04,16,8192,0x1a\n'
+                    ',Named,Test,monster,,1000,1000,4,LIGHT,Dragon,\n', encoding='utf-8')
+    
+    decimal, named = load_manifest(str(path))
+    
+    assert decimal == {'id': 100, 'name': 'Decimal', 'desc': 'Test', 'type': 33, 'ot': 3, 'atk': 900,
+                       'def': 0, 'level': 4, 'attribute': 16, 'race': 8192, 'setcode': 0x1a}
+    assert (named['type'], named['attribute'], named['race']) == ('monster', 'LIGHT', 'Dragon')
+    assert build_card_data(decimal)['type'] == 33
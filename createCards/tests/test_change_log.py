@@ -0,0 +1,102 @@
+"""Tests for the change log and delta export/apply in database_manager"""
+
+import shutil
+import sqlite3
+
+import pytest
+
+from card_creator import build_card_data
+from database_manager import DatabaseManager, create_blank_database, CHANGE_LOG_TABLE
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'cards.cdb')
+    create_blank_database(path)
+    return path
+
+
+def _spell(card_id, name, desc='Test'):
+    return build_card_data({'id': card_id, 'name': name, 'desc': desc, 'type': 'spell', 'script': False})
+
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return (conn.execute("SELECT * FROM datas ORDER BY id").fetchall(),
+                conn.execute("SELECT * FROM texts ORDER BY id").fetchall())
+    finally:
+        conn.close()
+
+
+def _drop_change_log(path):
+    conn = sqlite3.connect(path)
+    triggers = [name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name IN ('datas', 'texts') "
+        "AND name LIKE ?", (CHANGE_LOG_TABLE + '%',))]
+    for name in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+    conn.execute(f"DROP TABLE {CHANGE_LOG_TABLE}")
+    conn.commit()
+    conn.close()
+
+
+def _has_change_log(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?",
+                            (CHANGE_LOG_TABLE,)).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def test_writes_do_not_install_the_change_log(db_path, tmp_path):
+    _drop_change_log(db_path)
+    db = DatabaseManager(db_path)
+    
+    assert db.add_card(_spell(10000100, 'Untracked'))
+    assert not _has_change_log(db_path)
+    assert db.export_delta(0, str(tmp_path / 'delta.cdb')) is None
+    assert not (tmp_path / 'delta.cdb').exists()
+    
+    assert db.migrate()
+    assert db.add_card(_spell(10000101, 'Tracked'))
+    assert db.export_delta(0, str(tmp_path / 'delta.cdb'))['changed'] == 1
+
+
+def test_apply_delta_needs_a_change_log(db_path, tmp_path):
+    source = DatabaseManager(db_path)
+    assert source.add_card(_spell(10000100, 'Added'))
+    patch = str(tmp_path / 'delta.cdb')
+    assert source.export_delta(0, patch)
+    
+    client_path = str(tmp_path / 'client.cdb')
+    create_blank_database(client_path)
+    _drop_change_log(client_path)
+    
+    assert not DatabaseManager(client_path).apply_delta(patch)
+    assert _rows(client_path) == ([], [])
+
+
+def test_delta_round_trip(db_path, tmp_path):
+    source = DatabaseManager(db_path)
+    for card_id in (10000100, 10000101, 10000102):
+        assert source.add_card(_spell(card_id, f'Card {card_id}'))
+    client_path = str(tmp_path / 'client.cdb')
+    shutil.copy(db_path, client_path)
+    since = source.change_log_version()
+    
+    assert source.update_card(_spell(10000100, 'Card 10000100', desc='Changed'))
+    assert source.delete_card(10000101)
+    assert source.add_card(_spell(10000103, 'Card 10000103'))
+    patch = str(tmp_path / 'delta.cdb')
+    result = source.export_delta(since, patch)
+    
+    assert (result['changed'], result['deleted']) == (2, 1)
+    client = DatabaseManager(client_path)
+    assert client.apply_delta(patch)
+    assert _rows(client_path) == _rows(db_path)
+    assert client.change_log_version() == source.change_log_version()
+    # Applying the same patch again is a no-op
+    assert client.apply_delta(patch)
+    assert _rows(client_path) == _rows(db_path)
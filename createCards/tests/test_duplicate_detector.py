@@ -0,0 +1,113 @@
+"""Tests for duplicate_detector"""
+
+import sqlite3
+
+import pytest
+
+from card_creator import CardCreator, build_card_data
+from check_duplicates import check_duplicates
+from database_manager import DatabaseManager, create_blank_database
+from duplicate_detector import DuplicateDetector
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'cards.cdb')
+    create_blank_database(path)
+    db = DatabaseManager(path)
+    db.add_cards(build_card_data({'id': card_id, 'name': name, 'desc': 'Test', 'type': 'spell'})
+                 for card_id, name in [(10000100, 'Blue-Eyes White Dragon'),
+                                       (10000101, 'blue eyes white dragón'),
+                                       (10000102, 'Dark Magician'),
+                                       (10000103, 'Dark Magicians')])
+    return path
+
+
+def _schema(path):
+    conn = sqlite3.connect(path)
+    try:
+        return sorted(conn.execute("SELECT type, name FROM sqlite_master").fetchall())
+    finally:
+        conn.close()
+
+
+def test_report_does_not_modify_the_database(db_path):
+    schema = _schema(db_path)
+    
+    result = check_duplicates(db_path, min_id=10000100, check_other_databases=False)
+    
+    assert [[card_id for card_id, _ in group] for group in result['exact']] == [[10000100, 10000101]]
+    assert [pair[:2] for pair in result['near']] == [(10000102, 10000103)]
+    assert _schema(db_path) == schema
+
+
+def test_index_follows_writes_from_other_connections(db_path):
+    detector = DuplicateDetector(DatabaseManager(db_path))
+    assert detector.check_name('Dark Magician')['exact'] == [(10000102, 'Dark Magician')]
+    
+    other = DatabaseManager(db_path)
+    assert other.delete_card(10000102)
+    assert other.add_card(build_card_data({'id': 10000104, 'name': 'Dark  Magician!', 'desc': 'Test',
+                                           'type': 'spell'}))
+    
+    assert detector.check_name('Dark Magician')['exact'] == [(10000104, 'Dark  Magician!')]
+
+
+def test_own_writes_update_the_index_without_rescanning(db_path, monkeypatch):
+    db = DatabaseManager(db_path, duplicate_check=True)
+    scans = []
+    connection = db.connection
+    monkeypatch.setattr(db, 'connection', lambda: scans.append(1) or connection())
+    
+    for number in range(5):
+        assert db.add_card(build_card_data({'id': 10000110 + number, 'name': f'Interleaved {number}',
+                                            'desc': 'Test', 'type': 'spell'}))
+    assert db.add_cards([build_card_data({'id': 10000120, 'name': 'Bulk Card', 'desc': 'Test',
+                                          'type': 'spell'})])['written'] == 1
+    assert len(scans) == 1
+    assert not db.add_card(build_card_data({'id': 10000121, 'name': 'interleaved 3', 'desc': 'Test',
+                                            'type': 'spell'}))
+    assert db.add_cards([build_card_data({'id': 10000122, 'name': 'Bulk-Card', 'desc': 'Test',
+                                          'type': 'spell'})])['written'] == 0
+    assert len(scans) == 1
+    
+    # A write from another connection is still picked up by a rescan
+    other = DatabaseManager(db_path)
+    assert other.add_card(build_card_data({'id': 10000123, 'name': 'Outside', 'desc': 'Test',
+                                           'type': 'spell'}))
+    assert not db.add_card(build_card_data({'id': 10000124, 'name': 'outside', 'desc': 'Test',
+                                            'type': 'spell'}))
+    assert len(scans) == 2
+    db.close_cache()
+
+
+def test_persisted_keys_are_opt_in(db_path):
+    detector = DuplicateDetector(DatabaseManager(db_path), persist=True)
+    
+    assert len(detector.exact_duplicates()) == 1
+    assert ('table', 'card_name_keys') in _schema(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM card_name_keys").fetchone()[0] == 4
+    conn.close()
+
+
+def test_card_creator_name_check_is_opt_in(db_path, tmp_path, monkeypatch):
+    # Keep CardCreator's collision checker away from the repository's databases
+    monkeypatch.chdir(tmp_path)
+    duplicate = build_card_data({'id': 10000110, 'name': 'Dark Magician', 'desc': 'Test', 'type': 'spell'})
+    
+    checked = CardCreator(db_path, script_dir='script', pics_dir='pics', duplicate_check=True)
+    assert not checked.create_card(dict(duplicate), generate_script=False)
+    
+    creator = CardCreator(db_path, script_dir='script', pics_dir='pics')
+    assert creator.db_manager.duplicate_detector is None
+    assert creator.create_card(dict(duplicate), generate_script=False)
+
+
+def test_card_creator_does_not_create_a_mistyped_database(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    creator = CardCreator(str(tmp_path / 'missing.cdb'), script_dir='script', pics_dir='pics')
+    
+    card = build_card_data({'id': 10000110, 'name': 'Lost', 'desc': 'Test', 'type': 'spell'})
+    assert not creator.create_card(card, generate_script=False)
+    assert not (tmp_path / 'missing.cdb').exists()
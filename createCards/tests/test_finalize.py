@@ -0,0 +1,49 @@
+"""Tests for DatabaseManager.finalize_for_release"""
+
+import os
+import sqlite3
+
+import pytest
+
+from card_creator import build_card_data
+from database_manager import DatabaseManager, create_blank_database
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'cards.cdb')
+    create_blank_database(path)
+    DatabaseManager(path, profile='concurrent').add_card(build_card_data(
+        {'id': 10000100, 'name': 'Shipped', 'desc': 'Test', 'type': 'spell', 'script': False}))
+    return path
+
+
+def _journal_mode(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_finalize_closes_other_managers_cache_connections(db_path):
+    reader = DatabaseManager(db_path, profile='concurrent', cache_size=16)
+    assert reader.get_card(10000100)['name'] == 'Shipped'
+    
+    assert DatabaseManager(db_path).finalize_for_release()
+    
+    assert _journal_mode(db_path) == 'delete'
+    assert not os.path.exists(db_path + '-wal')
+    # The other manager keeps working and reopens what it needs
+    assert reader.get_card(10000100)['name'] == 'Shipped'
+    reader.close_cache()
+
+
+def test_finalize_refuses_while_another_session_is_open(db_path, capsys):
+    writer = DatabaseManager(db_path, profile='concurrent')
+    with writer.session():
+        assert writer.card_exists(10000100)
+        assert not DatabaseManager(db_path).finalize_for_release()
+    
+    assert 'session open' in capsys.readouterr().out
+    assert _journal_mode(db_path) == 'wal'
@@ -0,0 +1,182 @@
+"""Tests for the card ID allocator in database_manager"""
+
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from card_creator import CardCreator, build_card_data
+from database_manager import (DatabaseManager, create_blank_database, DEFAULT_ID_RANGE,
+                              DEFAULT_ID_RANGE_BOUNDS, LEGACY_ID_RANGE_BOUNDS)
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # Keep CardCreator's collision checker away from the repository's databases
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / 'cards.cdb')
+    create_blank_database(path)
+    return path
+
+
+def _spell(name, card_id=None):
+    return {'id': card_id, 'name': name, 'desc': 'Test', 'type': 'spell', 'script': False}
+
+
+def test_default_range_skips_system_card_ids(db_path):
+    db = DatabaseManager(db_path)
+    
+    assert db.allocate_ids(3) == [10000100, 10000101, 10000102]
+    custom = next(r for r in db.list_id_ranges() if r['name'] == DEFAULT_ID_RANGE)
+    assert (custom['first_id'], custom['last_id']) == DEFAULT_ID_RANGE_BOUNDS
+
+
+def test_legacy_default_range_is_shrunk(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(f"""
+        DELETE FROM id_ranges;
+        DELETE FROM id_free;
+        INSERT INTO id_ranges VALUES ('{DEFAULT_ID_RANGE}', {LEGACY_ID_RANGE_BOUNDS[0]}, {LEGACY_ID_RANGE_BOUNDS[1]}, NULL);
+        INSERT INTO id_free VALUES ('{DEFAULT_ID_RANGE}', 10000005, 10000200);
+    """)
+    conn.close()
+    
+    db = DatabaseManager(db_path)
+    assert db.allocate_ids(2) == [10000100, 10000101]
+    custom = next(r for r in db.list_id_ranges() if r['name'] == DEFAULT_ID_RANGE)
+    assert custom['first_id'] == DEFAULT_ID_RANGE_BOUNDS[0]
+    assert custom['free'] == 10000200 - 10000102 + 1
+
+
+def test_batch_takes_a_contiguous_block(db_path):
+    db = DatabaseManager(db_path)
+    # Leave single-ID gaps at the start of the range
+    for card_id in (10000101, 10000103, 10000105):
+        assert db.add_card(build_card_data(_spell(f'Gap {card_id}', card_id)))
+    
+    creator = CardCreator(db_path, script_dir='script', pics_dir='pics')
+    summary = creator.create_batch([_spell(f'Batch {i}') for i in range(3)] + [_spell('Fixed', 10000107)])
+    
+    assert summary['failures'] == []
+    ids = sorted(card['id'] for card in DatabaseManager(db_path).list_custom_cards()
+                 if card['name'].startswith('Batch'))
+    assert ids == [10000108, 10000109, 10000110]
+
+
+def _free_list(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT first_id, last_id FROM id_free WHERE range_name = ? ORDER BY first_id",
+                            (DEFAULT_ID_RANGE,)).fetchall()
+    finally:
+        conn.close()
+
+
+def test_upsert_of_existing_card_keeps_its_id_allocated(db_path):
+    db = DatabaseManager(db_path)
+    ids = db.allocate_ids(3)
+    assert db.add_cards([build_card_data(_spell(f'Card {card_id}', card_id)) for card_id in ids])['written'] == 3
+    
+    result = db.upsert_cards([build_card_data(_spell('Renamed', ids[1]))])
+    
+    assert result['written'] == 1
+    assert _free_list(db_path) == [(ids[-1] + 1, DEFAULT_ID_RANGE_BOUNDS[1])]
+    assert db.allocate_ids(1) == [ids[-1] + 1]
+
+
+def test_deleted_card_id_is_freed_once_and_reused(db_path):
+    db = DatabaseManager(db_path)
+    ids = db.allocate_ids(3)
+    db.add_cards([build_card_data(_spell(f'Card {card_id}', card_id)) for card_id in ids])
+    
+    assert db.delete_card(ids[1])
+    assert _free_list(db_path) == [(ids[1], ids[1]), (ids[-1] + 1, DEFAULT_ID_RANGE_BOUNDS[1])]
+    custom = next(r for r in db.list_id_ranges() if r['name'] == DEFAULT_ID_RANGE)
+    assert custom['free'] == DEFAULT_ID_RANGE_BOUNDS[1] - DEFAULT_ID_RANGE_BOUNDS[0] + 1 - 2
+    assert db.allocate_ids(1) == [ids[1]]
+
+
+def test_cards_written_without_the_allocator_leave_the_free_list(db_path):
+    db = DatabaseManager(db_path)
+    db.allocate_ids(1)
+    db.add_card(build_card_data(_spell('Manual', 10000500)))
+    
+    assert _free_list(db_path) == [(10000101, 10000499), (10000501, DEFAULT_ID_RANGE_BOUNDS[1])]
+
+
+def test_upgrade_replaces_old_trigger_and_drops_stale_ids(db_path):
+    db = DatabaseManager(db_path)
+    ids = db.allocate_ids(2)
+    db.add_cards([build_card_data(_spell(f'Card {card_id}', card_id)) for card_id in ids])
+    conn = sqlite3.connect(db_path)
+    conn.executescript(f"""
+        DROP TRIGGER id_free_ai;
+        INSERT INTO id_free VALUES ('{DEFAULT_ID_RANGE}', {ids[0]}, {ids[0]});
+    """)
+    conn.close()
+    
+    custom = next(r for r in DatabaseManager(db_path).list_id_ranges() if r['name'] == DEFAULT_ID_RANGE)
+    
+    assert custom['free'] == DEFAULT_ID_RANGE_BOUNDS[1] - ids[-1]
+    assert _free_list(db_path) == [(ids[-1] + 1, DEFAULT_ID_RANGE_BOUNDS[1])]
+
+
+def test_excluded_ids_stay_free(db_path):
+    db = DatabaseManager(db_path)
+    
+    assert db.allocate_ids(2, exclude=[10000100, 10000102]) == [10000101, 10000103]
+    assert _free_list(db_path) == [(10000100, 10000100), (10000102, 10000102),
+                                   (10000104, DEFAULT_ID_RANGE_BOUNDS[1])]
+    assert db.allocate_ids(2) == [10000100, 10000102]
+
+
+def test_upgrade_replaces_outdated_triggers(db_path):
+    DatabaseManager(db_path).ensure_id_allocator()
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        DROP TRIGGER id_free_ai;
+        CREATE TRIGGER id_free_ai AFTER INSERT ON datas BEGIN
+            DELETE FROM id_free WHERE first_id = new.id;
+        END;
+    """)
+    conn.close()
+    
+    db = DatabaseManager(db_path)
+    assert db.reserve_id_range('set', 20000000, 20000099)
+    assert db.add_card(build_card_data(_spell('Inside', 10000500)))
+    assert db.add_card(build_card_data(_spell('Nested', 20000050)))
+    
+    assert _free_list(db_path) == [(10000100, 10000499), (10000501, 19999999),
+                                   (20000100, DEFAULT_ID_RANGE_BOUNDS[1])]
+    assert db.allocate_ids(1, range_name='set', exclude=[20000000]) == [20000001]
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT first_id, last_id FROM id_free WHERE range_name = 'set' "
+                        "ORDER BY first_id").fetchall() == [(20000000, 20000000), (20000002, 20000049),
+                                                            (20000051, 20000099)]
+    conn.close()
+
+
+def _allocate_and_write(db_path, worker, rounds=5, count=5):
+    """Allocate contiguous blocks and write a card to each ID, like a batch job"""
+    db = DatabaseManager(db_path)
+    blocks = []
+    for _ in range(rounds):
+        ids = db.allocate_ids(count, contiguous=True)
+        cards = [build_card_data(_spell(f'Worker {worker} card {card_id}', card_id)) for card_id in ids]
+        assert db.add_cards(cards)['written'] == count
+        blocks.append(ids)
+    return blocks
+
+
+def test_parallel_writers_get_disjoint_blocks(db_path):
+    workers = 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_allocate_and_write, [db_path] * workers, range(workers)))
+    
+    blocks = [ids for worker_blocks in results for ids in worker_blocks]
+    assert all(ids == list(range(ids[0], ids[0] + 5)) for ids in blocks)
+    allocated = sorted(card_id for ids in blocks for card_id in ids)
+    first = DEFAULT_ID_RANGE_BOUNDS[0]
+    assert allocated == list(range(first, first + workers * 25))
+    assert len(DatabaseManager(db_path).list_custom_cards()) == workers * 25
+    assert _free_list(db_path) == [(first + workers * 25, DEFAULT_ID_RANGE_BOUNDS[1])]
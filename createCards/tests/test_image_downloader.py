@@ -0,0 +1,214 @@
+"""Tests for image_downloader"""
+
+import io
+import os
+import stat
+import threading
+import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from asset_index import UMASK
+from image_downloader import ImageDownloader, _normalize_image_file, _generate_tiers, THUMBNAIL_TIERS
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    """Serves server.images (path -> (body, etag)) and answers If-None-Match with 304"""
+    
+    def do_GET(self):
+        server = self.server
+        host = self.headers['Host'].split(':')[0]
+        with server.lock:
+            server.requests.append((self.path, self.headers.get('If-None-Match')))
+            server.active[host] = server.active.get(host, 0) + 1
+            server.peak[host] = max(server.peak.get(host, 0), server.active[host])
+        try:
+            time.sleep(server.delay)
+            body, etag = server.images[self.path]
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active[host] -= 1
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def image_server(monkeypatch):
+    monkeypatch.setenv('NO_PROXY', '127.0.0.1,localhost')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ImageHandler)
+    server.images = {}
+    server.requests = []
+    server.active = {}
+    server.peak = {}
+    server.delay = 0
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _jpeg_bytes(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (ImageDownloader.RECOMMENDED_WIDTH, ImageDownloader.RECOMMENDED_HEIGHT),
+              color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def _make_image(path, mode, size=(1200, 1800)):
+    """Save a solid-colour test image in the given mode"""
+    img = Image.new(mode, size)
+    if mode == 'P':
+        img.putpalette([255, 0, 0] * 256)
+        img.info['transparency'] = 0
+    img.save(path)
+    return path
+
+
+@pytest.mark.parametrize('mode, filename', [('P', 'art.png'), ('P', 'art.gif'), ('1', 'art.png'),
+                                            ('I;16', 'art.png')])
+def test_copy_local_image_converts_large_non_rgb_sources(tmp_path, mode, filename):
+    source = _make_image(str(tmp_path / filename), mode)
+    downloader = ImageDownloader(str(tmp_path / 'pics'))
+    
+    saved = downloader.copy_local_image(source, 10000133)
+    
+    assert saved == str(tmp_path / 'pics' / '10000133.jpg')
+    with Image.open(saved) as img:
+        assert img.format == 'JPEG'
+        assert img.mode == 'RGB'
+        assert img.size == (ImageDownloader.RECOMMENDED_WIDTH, ImageDownloader.RECOMMENDED_HEIGHT)
+    with Image.open(str(tmp_path / 'pics' / 'thumbnail' / '10000133.jpg')) as img:
+        assert img.size == THUMBNAIL_TIERS['thumbnail']
+
+
+@pytest.mark.parametrize('mode', ['P', '1'])
+def test_normalize_and_tiers_handle_palette_and_bilevel(tmp_path, mode):
+    source = _make_image(str(tmp_path / '10000134.png'), mode)
+    
+    tiers = _generate_tiers(source, {'thumbnail': THUMBNAIL_TIERS['thumbnail']})
+    assert tiers['error'] is None
+    assert tiers['written'] == ['thumbnail']
+    
+    result = _normalize_image_file(source, ImageDownloader.RECOMMENDED_WIDTH,
+                                   ImageDownloader.RECOMMENDED_HEIGHT, ImageDownloader.MAX_IMAGE_PIXELS)
+    assert result['status'] == 'normalized', result['detail']
+    assert not os.path.exists(source)
+    with Image.open(result['path']) as img:
+        assert (img.format, img.mode) == ('JPEG', 'RGB')
+
+
+def test_written_images_are_not_owner_only(tmp_path):
+    source = _make_image(str(tmp_path / 'art.png'), 'RGB')
+    downloader = ImageDownloader(str(tmp_path / 'pics'))
+    
+    saved = downloader.copy_local_image(source, 10000135)
+    assert _mode(saved) == 0o666 & ~UMASK
+    assert _mode(str(tmp_path / 'pics' / 'thumbnail' / '10000135.jpg')) == 0o666 & ~UMASK
+    
+    # Replacing a file keeps the permissions it was given
+    os.chmod(saved, 0o640)
+    assert downloader.copy_local_image(source, 10000135, overwrite=True) == saved
+    assert _mode(saved) == 0o640
+
+
+def test_normalize_pics_output_is_not_owner_only(tmp_path):
+    pics = tmp_path / 'pics'
+    pics.mkdir()
+    _make_image(str(pics / '10000136.png'), 'RGB')
+    downloader = ImageDownloader(str(pics))
+    
+    summary = downloader.normalize_pics(workers=1)
+    
+    assert summary['normalized'] == 1
+    assert _mode(str(pics / '10000136.jpg')) == 0o666 & ~UMASK
+    assert _mode(str(pics / ImageDownloader.NORMALIZE_CACHE_FILENAME)) == 0o666 & ~UMASK
+
+
+def test_existing_download_is_revalidated_without_overwrite(tmp_path, image_server):
+    image_server.images['/art.jpg'] = (_jpeg_bytes('red'), '"v1"')
+    url = f"http://127.0.0.1:{image_server.server_port}/art.jpg"
+    downloader = ImageDownloader(str(tmp_path / 'pics'), thumbnails=False)
+    
+    saved = downloader.download_image(url, 10000137, resize=False)
+    assert downloader.download_image(url, 10000137, resize=False) == saved
+    assert image_server.requests[-1] == ('/art.jpg', '"v1"')
+    
+    image_server.images['/art.jpg'] = (_jpeg_bytes('blue'), '"v2"')
+    assert downloader.download_image(url, 10000137, resize=False) == saved
+    with open(saved, 'rb') as f:
+        assert f.read() == image_server.images['/art.jpg'][0]
+    
+    # Without validators an existing image is still left alone
+    (tmp_path / 'pics' / '10000138.jpg').write_bytes(b'local art')
+    assert downloader.download_image(url, 10000138, resize=False) == str(tmp_path / 'pics' / '10000138.jpg')
+    assert len(image_server.requests) == 3
+
+
+def test_download_many_caps_requests_per_host(tmp_path, image_server):
+    image_server.delay = 0.2
+    port = image_server.server_port
+    images = {}
+    for number in range(6):
+        path = f"/{number}.jpg"
+        image_server.images[path] = (_jpeg_bytes((number * 40, 0, 0)), f'"{number}"')
+        # Two host names for the same server: each gets its own limit
+        host = '127.0.0.1' if number % 2 else 'localhost'
+        images[10000140 + number] = f"http://{host}:{port}{path}"
+    downloader = ImageDownloader(str(tmp_path / 'pics'), max_workers=6, per_host_limit=2,
+                                 thumbnails=False)
+    
+    results = downloader.download_many(images, resize=False)
+    
+    assert results == {card_id: str(tmp_path / 'pics' / f"{card_id}.jpg") for card_id in images}
+    for card_id, url in images.items():
+        with open(results[card_id], 'rb') as f:
+            assert f.read() == image_server.images[url[url.rindex('/'):]][0]
+    assert image_server.peak == {'127.0.0.1': 2, 'localhost': 2}
+    assert len(image_server.requests) == 6
+
+
+def test_decompression_bombs_are_rejected_not_copied(tmp_path, monkeypatch):
+    # Pillow refuses images over twice its limit inside Image.open
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 100_000)
+    source = _make_image(str(tmp_path / 'bomb.png'), 'L', size=(500, 500))
+    downloader = ImageDownloader(str(tmp_path / 'pics'))
+    
+    assert downloader.copy_local_image(source, 10000139) is None
+    assert not (tmp_path / 'pics' / '10000139.jpg').exists()
+    
+    result = _normalize_image_file(source, ImageDownloader.RECOMMENDED_WIDTH,
+                                   ImageDownloader.RECOMMENDED_HEIGHT, ImageDownloader.MAX_IMAGE_PIXELS)
+    assert result['status'] == 'failed'
+    assert os.path.exists(source)
+
+
+def test_decompression_bomb_warnings_raised_as_errors_are_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 200_000)
+    source = _make_image(str(tmp_path / 'large.png'), 'L', size=(500, 500))
+    downloader = ImageDownloader(str(tmp_path / 'pics'))
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', Image.DecompressionBombWarning)
+        assert downloader.copy_local_image(source, 10000139) is None
+    assert not (tmp_path / 'pics' / '10000139.jpg').exists()
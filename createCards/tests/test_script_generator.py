@@ -0,0 +1,38 @@
+"""Tests for script_generator"""
+
+import os
+import stat
+
+from asset_index import UMASK
+from constants import TYPE_SPELL
+from script_generator import ScriptGenerator, write_script_atomic
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_write_script_atomic_uses_normal_permissions(tmp_path):
+    path = str(tmp_path / 'c10000100.lua')
+    
+    write_script_atomic(path, '-- first\n')
+    assert _mode(path) == 0o666 & ~UMASK
+    
+    # Rewriting a script keeps the permissions it was given
+    os.chmod(path, 0o644)
+    write_script_atomic(path, '-- second\n')
+    assert _mode(path) == 0o644
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == '-- second\n'
+    assert os.listdir(tmp_path) == ['c10000100.lua']
+
+
+def test_script_manifest_uses_normal_permissions(tmp_path):
+    generator = ScriptGenerator(output_dir=str(tmp_path / 'script'))
+    card = {'id': 10000100, 'name': 'Test Spell', 'desc': 'Test', 'type': TYPE_SPELL}
+    
+    result = generator.generate_many([card])
+    
+    assert result['written'] == 1
+    assert generator.manifest_entry(10000100) is not None
+    assert _mode(generator.manifest_path) == 0o666 & ~UMASK
@@ -0,0 +1,18 @@
+"""Tests for script_linter"""
+
+import os
+import stat
+
+from asset_index import UMASK
+from script_linter import ScriptLinter, LINT_CACHE_FILENAME
+
+
+def test_lint_cache_uses_normal_permissions(tmp_path):
+    (tmp_path / 'c10000100.lua').write_text(
+        "local s,id=GetID()\nfunction s.initial_effect(c)\nend\n", encoding='utf-8')
+    
+    summary = ScriptLinter(str(tmp_path)).lint(workers=1)
+    
+    assert summary['checked'] == 1
+    cache_path = str(tmp_path / LINT_CACHE_FILENAME)
+    assert stat.S_IMODE(os.stat(cache_path).st_mode) == 0o666 & ~UMASK
@@ -0,0 +1,53 @@
+"""Tests for DatabaseManager.search"""
+
+import sqlite3
+
+import pytest
+
+from card_creator import build_card_data
+from database_manager import DatabaseManager, create_blank_database, SEARCH_TABLE
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'cards.cdb')
+    create_blank_database(path)
+    DatabaseManager(path).add_cards(build_card_data(
+        {'id': card_id, 'name': name, 'desc': desc, 'type': 'spell', 'script': False})
+        for card_id, name, desc in [(10000100, 'Pot of Plenty', 'Draw 2 cards.'),
+                                    (10000101, 'Burning Field', 'Inflict 500 damage.')])
+    return path
+
+
+def _search_objects(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT name FROM sqlite_master WHERE name LIKE ?",
+                            (SEARCH_TABLE + '%',)).fetchall()
+    finally:
+        conn.close()
+
+
+def test_search_uses_the_index(db_path):
+    hits = DatabaseManager(db_path).search('draw')
+    
+    assert [hit['id'] for hit in hits] == [10000100]
+    assert '[Draw]' in hits[0]['snippet']
+
+
+def test_search_does_not_create_the_index(db_path):
+    conn = sqlite3.connect(db_path)
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE ?",
+                                (SEARCH_TABLE + '%',)).fetchall():
+        conn.execute(f"DROP TRIGGER {name}")
+    conn.execute(f"DROP TABLE {SEARCH_TABLE}")
+    conn.commit()
+    conn.close()
+    db = DatabaseManager(db_path)
+    
+    assert [hit['id'] for hit in db.search('damage')] == [10000101]
+    assert [hit['id'] for hit in db.search('plenty', name_only=True)] == [10000100]
+    assert _search_objects(db_path) == []
+    
+    assert db.migrate()
+    assert '[damage]' in db.search('damage')[0]['snippet']
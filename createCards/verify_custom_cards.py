@@ -2,11 +2,13 @@
 Verify which cards in the game are from your custom database
 """
 from database_manager import DatabaseManager
+from asset_index import AssetIndex
 import sqlite3
 
-def verify_custom_cards():
+def verify_custom_cards(pics_dir: str = '../pics', script_dir: str = '../script'):
     """Check what cards are in the custom database"""
     db = DatabaseManager('../expansions/cards.cdb')
+    index = AssetIndex(pics_dir, script_dir, auto_refresh=False)
     conn = db.connect()
     cursor = conn.cursor()
     
@@ -57,7 +59,17 @@ def verify_custom_cards():
             type_str = "Unknown"
             stats = ""
         
-        print(f"  ID: {card_id:8d} | {name:30s} | {type_str:20s} {stats}")
+        assets = ("img" if index.has_image(card_id) else "---") + " " + \
+                 ("lua" if index.has_script(card_id) else "---")
+        print(f"  ID: {card_id:8d} | {assets} | {name:30s} | {type_str:20s} {stats}")
+    
+    card_ids = {row[0] for row in custom_cards}
+    missing_images = sorted(card_ids - index.image_ids())
+    missing_scripts = sorted(card_ids - index.script_ids())
+    if missing_images:
+        print(f"\n⚠️  Cards without images: {', '.join(map(str, missing_images))}")
+    if missing_scripts:
+        print(f"⚠️  Cards without scripts: {', '.join(map(str, missing_scripts))}")
     
     print("\n" + "=" * 80)
     print("NOTE: EDOPro loads cards from multiple databases:")